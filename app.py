@@ -4,7 +4,8 @@ Dashboard Principal do Sistema ERP - VERSÃO FINAL CORRIGIDA
 import streamlit as st
 from auth.auth_manager import AuthManager
 import ui.dashboard as dashboard_ui
-from db.models import criar_todas_tabelas, migrar_tabelas
+from db.migracoes import executar_migracoes
+from db.models import iniciar_indices_busca
 from utils.menu_builder import MenuBuilder
 from utils.custom_css import apply_custom_css
 
@@ -19,12 +20,14 @@ st.set_page_config(
 # Aplicar CSS customizado
 apply_custom_css()
 
-# Criar tabelas
+# Migrações do banco (só executam na primeira vez do processo)
 try:
-    criar_todas_tabelas()
-    migrar_tabelas()
-except:
-    pass
+    executar_migracoes()
+except Exception as e:
+    print(f"❌ Erro nas migrações: {e}")
+
+# Índices de busca em memória (segundo plano, uma vez por processo)
+iniciar_indices_busca()
 
 # Verificar autenticação
 if not AuthManager.is_authenticated():
@@ -0,0 +1,42 @@
+"""
+Arquivamento do log de auditoria
+Move os registros mais antigos que AUDITORIA_RETENCAO_DIAS para tabelas
+mensais (LOG_AUDITORIA_AAAAMM), mantendo LOG_AUDITORIA pequena.
+
+Pode ser agendado (cron / Agendador de Tarefas), ex. diariamente:
+    python arquivar_auditoria.py
+    python arquivar_auditoria.py 180   (retenção em dias)
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from db.migracoes import executar_migracoes
+from db.models import LogAuditoria
+from config.empresa import AUDITORIA_RETENCAO_DIAS
+
+
+def main():
+    dias = int(sys.argv[1]) if len(sys.argv) > 1 else AUDITORIA_RETENCAO_DIAS
+
+    try:
+        executar_migracoes()
+
+        print(f"\n🗄️  Arquivando logs com mais de {dias} dia(s)...")
+        total = LogAuditoria.arquivar(dias)
+
+        print(f"  ✅ {total} registro(s) movidos")
+        print(f"  📊 LOG_AUDITORIA: {LogAuditoria.count_all()} registro(s)")
+        print(f"  📁 Tabelas de arquivo: {', '.join(LogAuditoria.tabelas_arquivo()) or 'nenhuma'}\n")
+        return 0
+
+    except Exception as e:
+        print(f"\n❌ ERRO: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,28 @@ Gerenciador de Autenticação
 ATUALIZADO: Usando novos models separados
 """
 import streamlit as st
-from db.models import Usuario, Permissao, LogAuditoria
-from auth.password import verify_password
+from collections import namedtuple
+from db.models import Usuario, Perfil, Permissao
+from db import auditoria
+from auth import verificador, limite_login
+
+# Autorização da sessão, calculada no login e guardada em session_state.
+# Imutável: permissões (frozenset de (MODULO, ACAO)), menu já filtrado e
+# a versão dos dados de que foi calculada.
+Autorizacao = namedtuple("Autorizacao", "perfil_id perfil_nome permissoes menu versao")
+
 
 class AuthManager:
     """Gerenciador central de autenticação e permissões"""
     
+    @staticmethod
+    def _origem():
+        """IP do cliente (None fora de uma sessão do Streamlit)"""
+        try:
+            return st.context.ip_address
+        except Exception:
+            return None
+    
     @staticmethod
     def login(email, senha):
         """
@@ -16,6 +32,9 @@ class AuthManager:
         Retorna: (sucesso: bool, mensagem: str)
         """
         try:
+            # Limite de tentativas por email/IP (antes de banco e PBKDF2)
+            limite_login.admitir(email, AuthManager._origem())
+            
             # Buscar usuário por email
             usuario = Usuario.buscar_por_email(email)
             
@@ -23,26 +42,45 @@ class AuthManager:
                 return False, "❌ Email ou senha incorretos"
             
             # Verificar se está ativo
-            if not usuario[5]:  # ATIVO
+            if not usuario.ativo:
                 return False, "❌ Usuário inativo. Contate o administrador."
             
-            # Verificar senha
-            if not verify_password(senha, usuario[3]):  # SENHA_HASH
+            # Verificar senha (no pool de verificação, fora desta thread)
+            try:
+                with limite_login.vaga_hash():
+                    correta, novo_hash = verificador.verificar(senha, usuario.senha_hash)
+            except (limite_login.LoginBloqueado, verificador.VerificacaoOcupada) as e:
+                auditoria.registrar(usuario.id, "LOGIN_RECUSADO", "SISTEMA", f"Servidor ocupado: {email} ({e})")
+                return False, "⏳ Servidor ocupado: muitos acessos simultâneos. Tente novamente em instantes."
+            
+            if not correta:
                 return False, "❌ Email ou senha incorretos"
             
+            # Hash legado ou com custo antigo: regravar com o custo atual
+            if novo_hash:
+                try:
+                    Usuario.atualizar_hash(usuario.id, novo_hash)
+                except Exception as e:
+                    print(f"⚠️ Erro ao atualizar hash da senha: {e}")
+            
             # Login bem-sucedido - salvar na sessão
-            st.session_state.user_id = usuario[0]
-            st.session_state.user_name = usuario[1]
-            st.session_state.user_email = usuario[2]
-            st.session_state.user_perfil_id = usuario[4]
-            st.session_state.user_perfil_nome = usuario[6]
+            st.session_state.user_id = usuario.id
+            st.session_state.user_name = usuario.nome
+            st.session_state.user_email = usuario.email
+            st.session_state.user_perfil_id = usuario.perfil_id
+            st.session_state.user_perfil_nome = usuario.perfil_nome
+            st.session_state.autorizacao = AuthManager._montar_autorizacao(
+                usuario.perfil_id, usuario.perfil_nome, AuthManager._versao_autorizacao()
+            )
             st.session_state.authenticated = True
             
-            # Registrar no log
-            LogAuditoria.registrar(usuario[0], "LOGIN", "SISTEMA", f"Login realizado: {email}")
+            # Registrar no log (em segundo plano)
+            auditoria.registrar(usuario.id, "LOGIN", "SISTEMA", f"Login realizado: {email}")
             
-            return True, f"✅ Bem-vindo, {usuario[1]}!"
+            return True, f"✅ Bem-vindo, {usuario.nome}!"
             
+        except limite_login.LoginBloqueado as e:
+            return False, f"⏳ Muitas tentativas de login. Tente novamente em {e.espera} s."
         except Exception as e:
             return False, f"❌ Erro ao fazer login: {str(e)}"
     
@@ -51,7 +89,7 @@ class AuthManager:
         """Realiza logout do usuário"""
         try:
             if 'user_id' in st.session_state:
-                LogAuditoria.registrar(
+                auditoria.registrar(
                     st.session_state.user_id,
                     "LOGOUT",
                     "SISTEMA",
@@ -87,12 +125,68 @@ class AuthManager:
     @staticmethod
     def get_user_perfil():
         """Retorna nome do perfil do usuário"""
-        return st.session_state.get('user_perfil_nome', 'Desconhecido')
+        autorizacao = AuthManager.autorizacao()
+        return autorizacao.perfil_nome if autorizacao else 'Desconhecido'
     
     @staticmethod
     def get_user_perfil_id():
         """Retorna ID do perfil do usuário"""
-        return st.session_state.get('user_perfil_id')
+        autorizacao = AuthManager.autorizacao()
+        return autorizacao.perfil_id if autorizacao else None
+    
+    # ==================== AUTORIZAÇÃO DA SESSÃO ====================
+    
+    @staticmethod
+    def _versao_autorizacao():
+        """
+        Versão dos dados que compõem a autorização (só leitura em memória)
+        Muda quando PERMISSOES, PERFIS ou USUARIOS são alterados ou a
+        estrutura do menu é recarregada
+        """
+        from utils.menu_builder import MenuBuilder
+        
+        return (Permissao.versao_dados(), Perfil.versao_dados(), Usuario.versao_dados(), MenuBuilder.versao_menu())
+    
+    @staticmethod
+    def _montar_autorizacao(perfil_id, perfil_nome, versao):
+        """Calcula a autorização de um perfil (permissões + menu compilado do perfil)"""
+        from utils.menu_builder import MenuBuilder
+        
+        permissoes = Permissao.permissoes_do_perfil(perfil_id)
+        return Autorizacao(perfil_id, perfil_nome, permissoes, MenuBuilder.menu_do_perfil(perfil_id, permissoes), versao)
+    
+    @staticmethod
+    def autorizacao():
+        """
+        Autorização da sessão (None se não autenticado)
+        Recalculada apenas quando a versão dos dados mudou desde o login
+        ou a última atualização; nos demais reruns não há consulta.
+        """
+        if not AuthManager.is_authenticated():
+            return None
+        
+        autorizacao = st.session_state.get('autorizacao')
+        versao = AuthManager._versao_autorizacao()
+        if autorizacao is not None and autorizacao.versao == versao:
+            return autorizacao
+        
+        try:
+            # Perfil do usuário pode ter mudado (ou o usuário sido desativado)
+            usuario = Usuario.find_by_id(AuthManager.get_user_id())
+            if usuario is None or not usuario.ativo:
+                autorizacao = Autorizacao(None, 'Desconhecido', frozenset(), (), versao)
+            else:
+                perfil = Perfil.find_by_id(usuario.perfil_id)
+                perfil_nome = perfil.nome if perfil else 'Desconhecido'
+                autorizacao = AuthManager._montar_autorizacao(usuario.perfil_id, perfil_nome, versao)
+        except Exception as e:
+            print(f"Erro ao atualizar autorização: {e}")
+            return st.session_state.get('autorizacao')
+        
+        st.session_state.autorizacao = autorizacao
+        st.session_state.user_perfil_id = autorizacao.perfil_id
+        st.session_state.user_perfil_nome = autorizacao.perfil_nome
+        return autorizacao
     
     @staticmethod
     def has_permission(modulo, acao):
@@ -102,20 +196,15 @@ class AuthManager:
             modulo: Nome do módulo (ex: 'CLIENTES', 'PRODUTOS')
             acao: Ação desejada (ex: 'VISUALIZAR', 'CRIAR', 'EDITAR', 'EXCLUIR')
         """
-        if not AuthManager.is_authenticated():
-            return False
-        
-        perfil_id = AuthManager.get_user_perfil_id()
-        
-        try:
-            return Permissao.verificar_permissao(perfil_id, modulo, acao)
-        except:
-            return False
+        # Conjunto de permissões da sessão (sem consulta por rerun)
+        autorizacao = AuthManager.autorizacao()
+        return autorizacao is not None and (modulo, acao) in autorizacao.permissoes
     
     @staticmethod
     def audit_log(acao, modulo, detalhes=""):
         """
-        Registra ação no log de auditoria
+        Registra ação no log de auditoria (gravado em lote, em segundo plano)
+        Dentro de transaction(), só é registrada se a transação for confirmada
         Args:
             acao: Ação realizada (ex: 'CRIAR_CLIENTE')
             modulo: Módulo (ex: 'CLIENTES')
@@ -125,7 +214,7 @@ class AuthManager:
             return
         
         try:
-            LogAuditoria.registrar(
+            auditoria.registrar(
                 AuthManager.get_user_id(),
                 acao,
                 modulo,
@@ -0,0 +1,181 @@
+"""
+Controle de admissão de tentativas de login (orçamento de CPU)
+Cada verificação de senha custa um PBKDF2 inteiro; este módulo decide,
+antes da verificação, se a tentativa pode seguir:
+
+- Balde de fichas por email: poucas tentativas por minuto para a mesma conta
+- Balde de fichas por origem (IP): limita um cliente que testa várias contas
+- Teto global de hashes simultâneos: a tentativa espera até
+  LOGIN_ESPERA_MAX segundos por uma vaga; passou disso, é recusada
+
+Tentativas recusadas não chegam ao banco nem ao PBKDF2. Contadores em
+estatisticas() para monitoramento.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from config.empresa import (
+    LOGIN_EMAIL_TENTATIVAS, LOGIN_ORIGEM_TENTATIVAS, LOGIN_JANELA,
+    LOGIN_HASH_SIMULTANEOS, LOGIN_ESPERA_MAX, LOGIN_CHAVES_MAX
+)
+
+
+class LoginBloqueado(Exception):
+    """Tentativa recusada; `espera` = segundos sugeridos até tentar de novo"""
+    
+    def __init__(self, motivo, espera):
+        super().__init__(motivo)
+        self.motivo = motivo
+        self.espera = max(1, int(espera + 0.999))
+
+
+class BaldeFichas:
+    """
+    Baldes de fichas por chave (email ou origem)
+    
+    Cada chave começa com `capacidade` fichas e recupera `capacidade`
+    fichas por `janela` segundos. Só as `maximo_chaves` chaves usadas
+    mais recentemente são mantidas (ataque com milhares de emails não
+    cresce a memória sem limite).
+    """
+    
+    def __init__(self, capacidade, janela, maximo_chaves=LOGIN_CHAVES_MAX):
+        self.capacidade = capacidade
+        self.taxa = capacidade / janela if janela else 0  # Fichas por segundo
+        self.maximo_chaves = maximo_chaves
+        self._baldes = OrderedDict()  # {chave: (fichas, instante)}
+    
+    def consumir(self, chave, agora):
+        """
+        Retira uma ficha da chave
+        Returns: 0 se admitida, ou segundos até haver uma ficha
+        """
+        if self.capacidade <= 0:
+            return 0  # Limite desligado
+        
+        fichas, instante = self._baldes.pop(chave, (self.capacidade, agora))
+        fichas = min(self.capacidade, fichas + (agora - instante) * self.taxa)
+        
+        if fichas >= 1:
+            fichas -= 1
+            espera = 0
+        else:
+            espera = (1 - fichas) / self.taxa if self.taxa else float('inf')
+        
+        self._baldes[chave] = (fichas, agora)
+        while len(self._baldes) > self.maximo_chaves:
+            self._baldes.popitem(last=False)
+        return espera
+    
+    def devolver(self, chave):
+        """Devolve a ficha consumida (a outra verificação recusou a tentativa)"""
+        if chave in self._baldes:
+            fichas, instante = self._baldes[chave]
+            self._baldes[chave] = (min(self.capacidade, fichas + 1), instante)
+    
+    def __len__(self):
+        return len(self._baldes)
+
+
+class ControleLogin:
+    """Baldes por email e por origem + teto de hashes simultâneos"""
+    
+    def __init__(self, por_email=LOGIN_EMAIL_TENTATIVAS, por_origem=LOGIN_ORIGEM_TENTATIVAS,
+                 janela=LOGIN_JANELA, simultaneos=LOGIN_HASH_SIMULTANEOS, espera_max=LOGIN_ESPERA_MAX):
+        self.espera_max = espera_max
+        self.simultaneos = simultaneos or (os.cpu_count() or 1)
+        self._emails = BaldeFichas(por_email, janela)
+        self._origens = BaldeFichas(por_origem, janela)
+        self._vagas = threading.BoundedSemaphore(self.simultaneos)
+        self._lock = threading.Lock()
+        self._em_uso = 0
+        self._metricas = {
+            'admitidas': 0,
+            'bloqueadas_email': 0,
+            'bloqueadas_origem': 0,
+            'esperas': 0,
+            'recusadas_ocupado': 0,
+            'maior_simultaneo': 0,
+        }
+    
+    def admitir(self, email, origem=None):
+        """
+        Consome uma ficha do email e uma da origem
+        Levanta LoginBloqueado se algum dos baldes estiver vazio
+        """
+        email = (email or "").strip().lower()
+        agora = time.monotonic()
+        
+        with self._lock:
+            espera = self._emails.consumir(email, agora)
+            if espera:
+                self._metricas['bloqueadas_email'] += 1
+                raise LoginBloqueado("email", espera)
+            
+            if origem:
+                espera = self._origens.consumir(origem, agora)
+                if espera:
+                    self._emails.devolver(email)
+                    self._metricas['bloqueadas_origem'] += 1
+                    raise LoginBloqueado("origem", espera)
+            
+            self._metricas['admitidas'] += 1
+    
+    @contextmanager
+    def vaga_hash(self):
+        """
+        Ocupa uma vaga do teto global durante a verificação da senha
+        Espera até espera_max segundos; depois levanta LoginBloqueado
+        """
+        if not self._vagas.acquire(blocking=False):
+            self._contar('esperas')
+            if not self._vagas.acquire(timeout=self.espera_max):
+                self._contar('recusadas_ocupado')
+                raise LoginBloqueado("ocupado", self.espera_max)
+        
+        with self._lock:
+            self._em_uso += 1
+            if self._em_uso > self._metricas['maior_simultaneo']:
+                self._metricas['maior_simultaneo'] = self._em_uso
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._em_uso -= 1
+            self._vagas.release()
+    
+    def _contar(self, metrica):
+        with self._lock:
+            self._metricas[metrica] += 1
+    
+    def estatisticas(self):
+        """Contadores de admissão e ocupação"""
+        with self._lock:
+            return {
+                'hashes_em_uso': self._em_uso,
+                'hashes_max': self.simultaneos,
+                'emails_rastreados': len(self._emails),
+                'origens_rastreadas': len(self._origens),
+                **self._metricas,
+            }
+
+
+# Instância do processo
+controle = ControleLogin()
+
+
+def admitir(email, origem=None):
+    """Admite (ou recusa com LoginBloqueado) uma tentativa de login"""
+    controle.admitir(email, origem)
+
+
+def vaga_hash():
+    """Context manager: vaga no teto global de verificações de senha"""
+    return controle.vaga_hash()
+
+
+def estatisticas():
+    """Métricas do controle de tentativas de login"""
+    return controle.estatisticas()
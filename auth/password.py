@@ -1,33 +1,71 @@
 """
 Utilitários para criptografia de senhas
 Usa PBKDF2 com SHA-256 para segurança
+
+Formato do hash (autodescritivo):
+    pbkdf2_sha256$<iterações>$<salt>$<hash>
+
+Hashes antigos (salt de 32 caracteres + hash, 100.000 iterações, sem
+prefixo) continuam válidos e são regravados no formato novo no próximo
+login (precisa_rehash).
 """
 import hashlib
+import hmac
 import secrets
+from config.empresa import SENHA_ITERACOES
+
+ALGORITMO = "pbkdf2_sha256"
+ITERACOES_LEGADO = 100000  # Custo fixo dos hashes sem prefixo
+
+
+def _derivar(password, salt, iteracoes):
+    """PBKDF2-SHA256 em hexadecimal (salt usado como texto, igual ao legado)"""
+    return hashlib.pbkdf2_hmac(
+        'sha256',
+        password.encode('utf-8'),
+        salt.encode('utf-8'),
+        iteracoes
+    ).hex()
 
-def hash_password(password: str) -> str:
+
+def _decompor(hashed):
+    """
+    Separa o hash armazenado em (algoritmo, iterações, salt, hash)
+    Retorna None se o formato não for reconhecido
+    """
+    if not hashed:
+        return None
+    
+    if hashed.startswith(ALGORITMO + "$"):
+        partes = hashed.split("$")
+        if len(partes) != 4 or not partes[1].isdigit():
+            return None
+        return ALGORITMO, int(partes[1]), partes[2], partes[3]
+    
+    # Legado: salt (32 caracteres) + hash
+    if len(hashed) < 32:
+        return None
+    return None, ITERACOES_LEGADO, hashed[:32], hashed[32:]
+
+
+def hash_password(password: str, iteracoes: int = None) -> str:
     """
     Cria hash seguro da senha usando SHA-256 com salt
     
     Args:
         password (str): Senha em texto plano
-        
+        iteracoes (int): Custo do PBKDF2 (padrão: SENHA_ITERACOES)
+    
     Returns:
-        str: Hash da senha (salt + hash)
+        str: Hash no formato pbkdf2_sha256$iterações$salt$hash
     """
+    iteracoes = iteracoes or SENHA_ITERACOES
+    
     # Gerar salt aleatório de 16 bytes
     salt = secrets.token_hex(16)
     
-    # Gerar hash usando PBKDF2
-    pwd_hash = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt.encode('utf-8'),
-        100000  # 100.000 iterações
-    )
-    
-    # Retornar salt + hash concatenados
-    return salt + pwd_hash.hex()
+    return f"{ALGORITMO}${iteracoes}${salt}${_derivar(password, salt, iteracoes)}"
+
 
 def verify_password(password: str, hashed: str) -> bool:
     """
@@ -35,25 +73,45 @@ def verify_password(password: str, hashed: str) -> bool:
     
     Args:
         password (str): Senha em texto plano
-        hashed (str): Hash armazenado no banco
-        
+        hashed (str): Hash armazenado no banco (formato novo ou legado)
+    
     Returns:
         bool: True se a senha está correta
     """
-    if not hashed or len(hashed) < 32:
+    partes = _decompor(hashed)
+    if partes is None:
         return False
     
-    # Extrair salt (primeiros 32 caracteres)
-    salt = hashed[:32]
-    stored_hash = hashed[32:]
+    _, iteracoes, salt, stored_hash = partes
     
-    # Gerar hash da senha fornecida
-    pwd_hash = hashlib.pbkdf2_hmac(
-        'sha256',
-        password.encode('utf-8'),
-        salt.encode('utf-8'),
-        100000
-    )
+    # Comparação em tempo constante
+    return hmac.compare_digest(_derivar(password, salt, iteracoes), stored_hash)
+
+
+def precisa_rehash(hashed: str, iteracoes: int = None) -> bool:
+    """
+    True se o hash está no formato legado ou com custo diferente do atual
+    (deve ser regravado após um login bem-sucedido)
+    """
+    partes = _decompor(hashed)
+    if partes is None:
+        return False
+    
+    algoritmo, atual, _, _ = partes
+    return algoritmo != ALGORITMO or atual != (iteracoes or SENHA_ITERACOES)
+
+
+def verificar_e_atualizar(password: str, hashed: str, iteracoes: int = None):
+    """
+    Verifica a senha e, se correta e o hash estiver desatualizado,
+    já gera o hash novo (uma única ida ao processo verificador)
+    
+    Returns:
+        tuple: (senha_correta: bool, novo_hash: str ou None)
+    """
+    if not verify_password(password, hashed):
+        return False, None
     
-    # Comparar hashes
-    return pwd_hash.hex() == stored_hash
+    if precisa_rehash(hashed, iteracoes):
+        return True, hash_password(password, iteracoes)
+    return True, None
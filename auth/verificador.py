@@ -0,0 +1,228 @@
+"""
+Verificação de senha fora da thread do script
+O PBKDF2 roda num pool limitado de processos (paralelismo real entre
+núcleos); a sessão que faz login só espera o resultado, e uma rajada de
+logins no início do turno se espalha pelos núcleos em vez de enfileirar
+numa thread só.
+
+SENHA_POOL:
+- "processos": ProcessPoolExecutor (spawn, seguro com as threads do Streamlit)
+- "threads": ThreadPoolExecutor (o hashlib solta o GIL durante o PBKDF2)
+- "desligado": verifica na própria thread (comportamento antigo)
+
+Pedidos além da capacidade (SENHA_FILA_MAX aguardando) recebem
+VerificacaoOcupada em vez de enfileirar sem limite; o mesmo vale para
+uma verificação que não termina em SENHA_TIMEOUT segundos. A vaga de um
+pedido só volta quando ele termina de fato: um PBKDF2 já em execução no
+pool não é interrompido pelo timeout e continua ocupando a capacidade.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturoTimeout
+from concurrent.futures.process import BrokenProcessPool
+from auth.password import verificar_e_atualizar
+from config.empresa import SENHA_POOL, SENHA_WORKERS, SENHA_FILA_MAX, SENHA_TIMEOUT
+
+
+class VerificacaoOcupada(Exception):
+    """Pool de verificação saturado (tente novamente em instantes)"""
+
+
+class VerificadorSenhas:
+    """
+    Pool limitado de verificação de senhas
+    
+    O pool é criado na primeira verificação; se um processo do pool
+    morrer, o pool é recriado e a verificação refeita na thread atual.
+    """
+    
+    def __init__(self, tipo=SENHA_POOL, workers=SENHA_WORKERS,
+                 fila_max=SENHA_FILA_MAX, timeout=SENHA_TIMEOUT):
+        self.tipo = tipo
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.timeout = timeout
+        self._vagas = threading.BoundedSemaphore(self.workers + max(0, fila_max))
+        self._lock = threading.Lock()
+        self._pool = None
+        self._metricas = {
+            'verificacoes': 0,
+            'rehash': 0,
+            'ocupado': 0,
+            'tempo_esgotado': 0,
+            'falhas_pool': 0,
+            'tempo_total_ms': 0.0,
+            'maior_ms': 0.0,
+        }
+    
+    # ==================== POOL ====================
+    
+    def _obter_pool(self):
+        if self._pool is not None:
+            return self._pool
+        
+        with self._lock:
+            if self._pool is None:
+                if self.tipo == "threads":
+                    self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="senha")
+                else:
+                    self._pool = ProcessPoolExecutor(
+                        self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+            return self._pool
+    
+    def _descartar_pool(self, pool):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+    
+    def _reservar(self):
+        if not self._vagas.acquire(timeout=self.timeout):
+            self._contar('ocupado')
+            raise VerificacaoOcupada("Muitas verificações de senha simultâneas")
+    
+    async def _reservar_async(self):
+        """
+        Mesma reserva de _reservar sem bloquear o event loop: tenta a vaga
+        sem esperar e, se não houver, aguarda com asyncio.sleep até o timeout
+        (cancelar a corrotina não deixa vaga presa)
+        """
+        limite = time.monotonic() + self.timeout
+        while not self._vagas.acquire(blocking=False):
+            if time.monotonic() >= limite:
+                self._contar('ocupado')
+                raise VerificacaoOcupada("Muitas verificações de senha simultâneas")
+            await asyncio.sleep(0.01)
+    
+    def _liberar(self, futuro):
+        """Callback do pedido concluído (ou cancelado): devolve a vaga"""
+        self._vagas.release()
+    
+    def _esgotado(self, futuro):
+        """
+        Verificação passou do timeout: recusa o login
+        cancel() só tira da fila um pedido ainda não iniciado; um PBKDF2 em
+        execução segue até o fim, com a vaga ocupada até o _liberar
+        """
+        futuro.cancel()
+        self._contar('tempo_esgotado')
+        return VerificacaoOcupada("Servidor ocupado: verificação de senha demorou demais")
+    
+    # ==================== VERIFICAÇÃO ====================
+    
+    def verificar(self, senha, senha_hash):
+        """
+        Verifica a senha no pool (bloqueia só a thread chamadora)
+        
+        Returns:
+            tuple: (senha_correta: bool, novo_hash: str ou None)
+        """
+        if self.tipo == "desligado":
+            return self._medir(time.perf_counter(), verificar_e_atualizar(senha, senha_hash))
+        
+        self._reservar()
+        inicio = time.perf_counter()
+        futuro = None
+        try:
+            pool = self._obter_pool()
+            try:
+                futuro = pool.submit(verificar_e_atualizar, senha, senha_hash)
+                futuro.add_done_callback(self._liberar)
+                resultado = futuro.result(self.timeout)
+            except FuturoTimeout:
+                raise self._esgotado(futuro) from None
+            except BrokenProcessPool:
+                self._contar('falhas_pool')
+                self._descartar_pool(pool)
+                resultado = verificar_e_atualizar(senha, senha_hash)
+        finally:
+            if futuro is None:
+                # Não chegou ao pool: a vaga volta aqui (senão, no _liberar)
+                self._vagas.release()
+        return self._medir(inicio, resultado)
+    
+    async def verificar_async(self, senha, senha_hash):
+        """Versão para event loop (FastHTML): aguarda sem bloquear o loop"""
+        if self.tipo == "desligado":
+            return await asyncio.to_thread(self.verificar, senha, senha_hash)
+        
+        await self._reservar_async()
+        inicio = time.perf_counter()
+        futuro = None
+        try:
+            pool = self._obter_pool()
+            try:
+                futuro = pool.submit(verificar_e_atualizar, senha, senha_hash)
+                futuro.add_done_callback(self._liberar)
+                resultado = await asyncio.wait_for(asyncio.wrap_future(futuro), self.timeout)
+            except (asyncio.TimeoutError, FuturoTimeout):
+                raise self._esgotado(futuro) from None
+            except BrokenProcessPool:
+                self._contar('falhas_pool')
+                self._descartar_pool(pool)
+                resultado = await asyncio.to_thread(verificar_e_atualizar, senha, senha_hash)
+        finally:
+            if futuro is None:
+                # Não chegou ao pool: a vaga volta aqui (senão, no _liberar)
+                self._vagas.release()
+        return self._medir(inicio, resultado)
+    
+    def _medir(self, inicio, resultado):
+        duracao = (time.perf_counter() - inicio) * 1000
+        with self._lock:
+            self._metricas['verificacoes'] += 1
+            self._metricas['rehash'] += 1 if resultado[1] else 0
+            self._metricas['tempo_total_ms'] += duracao
+            if duracao > self._metricas['maior_ms']:
+                self._metricas['maior_ms'] = round(duracao, 1)
+        return resultado
+    
+    def _contar(self, metrica):
+        with self._lock:
+            self._metricas[metrica] += 1
+    
+    def aquecer(self):
+        """Sobe os processos do pool antes do primeiro login (opcional)"""
+        if self.tipo == "desligado":
+            return
+        pool = self._obter_pool()
+        for futuro in [pool.submit(os.getpid) for _ in range(self.workers)]:
+            futuro.result()
+    
+    def encerrar(self):
+        """Fecha o pool"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+    
+    def estatisticas(self):
+        """Tamanho do pool e contadores"""
+        with self._lock:
+            verificacoes = self._metricas['verificacoes']
+            return {
+                'tipo': self.tipo,
+                'workers': self.workers,
+                'ativo': self._pool is not None,
+                **self._metricas,
+                'tempo_total_ms': round(self._metricas['tempo_total_ms'], 1),
+                'media_ms': round(self._metricas['tempo_total_ms'] / verificacoes, 1) if verificacoes else 0.0,
+            }
+
+
+# Instância do processo
+verificador = VerificadorSenhas()
+
+
+def verificar(senha, senha_hash):
+    """Verifica a senha no pool do processo: (correta, novo_hash ou None)"""
+    return verificador.verificar(senha, senha_hash)
+
+
+def estatisticas():
+    """Métricas do pool de verificação de senhas"""
+    return verificador.estatisticas()
@@ -0,0 +1,76 @@
+"""
+Microbenchmark: hidratação de linhas (tupla x namedtuple x classe com __slots__)
+Simula 100 mil linhas de CLIENTES vindas do cursor e mede tempo e memória
+de cada forma de representar a linha. Não acessa o banco.
+
+Uso: python benchmark_linhas.py [quantidade]
+"""
+
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+ClienteLinha = namedtuple("ClienteLinha", "id nome email telefone1 telefone2")
+
+
+class ClienteSlots:
+    __slots__ = ("id", "nome", "email", "telefone1", "telefone2")
+    
+    def __init__(self, id, nome, email, telefone1, telefone2):
+        self.id = id
+        self.nome = nome
+        self.email = email
+        self.telefone1 = telefone1
+        self.telefone2 = telefone2
+
+
+def gerar_linhas(quantidade):
+    """Linhas como o fdb devolve (tuplas)"""
+    return [
+        (i, f"CLIENTE {i:07d}", f"cliente{i}@exemplo.com", f"(11) 9{i % 10000:04d}-{i % 9999:04d}", None)
+        for i in range(1, quantidade + 1)
+    ]
+
+
+def medir(nome, converter, campo, linhas):
+    """
+    Converte as linhas e mede tempo (sem tracemalloc, que distorce o tempo),
+    memória alocada na conversão e leitura de um campo em todas as linhas
+    """
+    inicio = time.perf_counter()
+    resultado = converter(linhas)
+    duracao = time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    for linha in resultado:
+        campo(linha)
+    leitura = time.perf_counter() - inicio
+    del resultado
+    
+    tracemalloc.start()
+    resultado = converter(linhas)
+    memoria, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    print(f"  {nome:<12} {duracao * 1000:>9.1f} ms {memoria / (1024 * 1024):>9.1f} MB {leitura * 1000:>9.1f} ms")
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    linhas = gerar_linhas(quantidade)
+    
+    print(f"\n📊 Hidratação de {quantidade} linhas")
+    print(f"  {'tipo':<12} {'conversão':>12} {'memória':>12} {'leitura':>12}")
+    print("-" * 52)
+    
+    # "tupla" copia a lista (o custo mínimo de qualquer conversão)
+    medir("tupla", list, lambda r: r[1], linhas)
+    medir("namedtuple", lambda ls: [ClienteLinha._make(linha) for linha in ls], lambda r: r.nome, linhas)
+    medir("__slots__", lambda ls: [ClienteSlots(*linha) for linha in ls], lambda r: r.nome, linhas)
+    print("\nMemória = objetos criados na conversão. Nos models a tupla do cursor")
+    print("é descartada: namedtuple ocupa por linha o mesmo que a tupla original.")
+
+
+if __name__ == "__main__":
+    main()
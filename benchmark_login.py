@@ -0,0 +1,67 @@
+"""
+Benchmark: vazão de login (verificação de senha) por quantidade de núcleos
+Simula uma rajada de logins simultâneos (uma thread por sessão) e mede
+logins/s e latência com a verificação na própria thread, num pool de
+threads e num pool de processos. Não acessa o banco.
+
+Uso: python benchmark_login.py [logins] [iterações]
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from auth.password import hash_password
+from auth.verificador import VerificadorSenhas
+
+
+def rajada(verificador, logins, senha_hash):
+    """Dispara `logins` verificações ao mesmo tempo; retorna (duração, latências)"""
+    def login(_):
+        inicio = time.perf_counter()
+        correta, _ = verificador.verificar("senha123", senha_hash)
+        assert correta
+        return time.perf_counter() - inicio
+    
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(logins) as sessoes:
+        latencias = sorted(sessoes.map(login, range(logins)))
+    return time.perf_counter() - inicio, latencias
+
+
+def main():
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    iteracoes = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    senha_hash = hash_password("senha123", iteracoes)
+    nucleos = os.cpu_count() or 1
+    
+    print(f"\n📊 Rajada de {logins} logins, PBKDF2 com {iteracoes} iterações ({nucleos} núcleo(s))")
+    print(f"  {'modo':<12} {'workers':>7} {'logins/s':>10} {'p50':>10} {'p95':>10}")
+    print("-" * 54)
+    
+    cenarios = [("desligado", 1)]
+    workers = 1
+    while workers <= nucleos:
+        cenarios += [("threads", workers), ("processos", workers)]
+        workers *= 2
+    
+    for tipo, workers in cenarios:
+        verificador = VerificadorSenhas(tipo=tipo, workers=workers, fila_max=logins, timeout=600)
+        verificador.aquecer()
+        try:
+            duracao, latencias = rajada(verificador, logins, senha_hash)
+        finally:
+            verificador.encerrar()
+        
+        p50 = latencias[len(latencias) // 2] * 1000
+        p95 = latencias[int(len(latencias) * 0.95) - 1] * 1000
+        print(f"  {tipo:<12} {workers:>7} {logins / duracao:>10.1f} {p50:>8.0f} ms {p95:>7.0f} ms")
+    
+    print("\n\"desligado\" é o login antigo: as sessões disputam a mesma CPU sem limite.")
+    print("Com pool, a vazão cresce com os workers até o número de núcleos.")
+
+
+if __name__ == "__main__":
+    main()
@@ -68,6 +68,61 @@ BANCO_PASSWORD = config('BANCO_PASSWORD', default='masterkey')
 BANCO_CHARSET = config('BANCO_CHARSET', default='UTF8')
 BANCO_TIMEOUT = config('BANCO_TIMEOUT', default=30, cast=int)
 
+# Pool de conexões
+BANCO_POOL_MIN = config('BANCO_POOL_MIN', default=1, cast=int)  # Conexões mantidas abertas
+BANCO_POOL_MAX = config('BANCO_POOL_MAX', default=10, cast=int)  # Limite de attachments do processo
+BANCO_POOL_OCIOSO = config('BANCO_POOL_OCIOSO', default=300, cast=int)  # Segundos até fechar conexão ociosa
+BANCO_POOL_VERIFICAR = config('BANCO_POOL_VERIFICAR', default=30, cast=int)  # Segundos ociosa antes de testar na retirada
+
+# Listagens: True = total exato; False = "1000+" sem COUNT completo
+# O total exato custa um COUNT(*) do filtro inteiro a cada página exibida
+# (na primeira, junto com a página via COUNT(*) OVER () no Firebird 3+)
+LISTAGEM_TOTAL_EXATO = config('LISTAGEM_TOTAL_EXATO', default=False, cast=bool)
+
+# Índice de busca "contém" em memória (db/trigramas.py)
+# Montado só pelo app Streamlit: ele vê apenas as escritas do próprio processo
+# (o app FastHTML não monta o índice e busca sempre no banco)
+BUSCA_INDICE_ATIVO = config('BUSCA_INDICE_ATIVO', default=False, cast=bool)
+BUSCA_INDICE_MAX_REGISTROS = config('BUSCA_INDICE_MAX_REGISTROS', default=2000000, cast=int)  # Acima disso o índice não é montado
+
+# Versões dos dados (BaseModel.versao_dados): contador em memória do processo,
+# incrementado a cada escrita confirmada por ele. Chave dos caches de PDF, da
+# matriz de permissões, da autorização da sessão, dos menus e do filtro de
+# usuários da auditoria.
+# Limitação: pressupõe UM processo Streamlit por banco. Com vários processos
+# (ou escritas feitas por outro sistema), um processo não vê as escritas dos
+# outros e esses caches ficam desatualizados até reiniciar ou até a próxima
+# escrita local na tabela
+# (o cache de linhas abaixo é o único que expira sozinho, pelo TTL)
+
+# Cache de linhas por ID (find_by_id) compartilhado entre sessões (db/cache.py)
+CACHE_LINHAS_MAX = config('CACHE_LINHAS_MAX', default=5000, cast=int)  # 0 = desativado
+CACHE_LINHAS_TTL = config('CACHE_LINHAS_TTL', default=60, cast=int)  # Segundos (cobre escritas de outros processos)
+
+# Log de auditoria gravado em segundo plano, em lotes (db/auditoria.py)
+AUDITORIA_ASSINCRONA = config('AUDITORIA_ASSINCRONA', default=True, cast=bool)  # False = grava na hora
+AUDITORIA_FILA_MAX = config('AUDITORIA_FILA_MAX', default=10000, cast=int)  # Eventos aguardando gravação
+AUDITORIA_LOTE = config('AUDITORIA_LOTE', default=200, cast=int)  # Eventos por executemany
+AUDITORIA_INTERVALO = config('AUDITORIA_INTERVALO', default=1.0, cast=float)  # Segundos máximos até gravar
+AUDITORIA_FILA_CHEIA = config('AUDITORIA_FILA_CHEIA', default='sincrono')  # "sincrono" ou "descartar"
+AUDITORIA_RETENCAO_DIAS = config('AUDITORIA_RETENCAO_DIAS', default=90, cast=int)  # Mais antigos vão para LOG_AUDITORIA_AAAAMM
+AUDITORIA_CSV_MAX = config('AUDITORIA_CSV_MAX', default=100000, cast=int)  # Registros por CSV (o download fica inteiro na memória da sessão)
+
+# Senhas: custo do PBKDF2 e verificação fora da thread do script (auth/verificador.py)
+SENHA_ITERACOES = config('SENHA_ITERACOES', default=100000, cast=int)  # Hashes com outro custo são regravados no login
+SENHA_POOL = config('SENHA_POOL', default='processos')  # "processos", "threads" ou "desligado"
+SENHA_WORKERS = config('SENHA_WORKERS', default=0, cast=int)  # 0 = min(4, núcleos)
+SENHA_FILA_MAX = config('SENHA_FILA_MAX', default=32, cast=int)  # Verificações aguardando além dos workers
+SENHA_TIMEOUT = config('SENHA_TIMEOUT', default=10.0, cast=float)  # Segundos
+
+# Limite de tentativas de login antes do PBKDF2 (auth/limite_login.py)
+LOGIN_EMAIL_TENTATIVAS = config('LOGIN_EMAIL_TENTATIVAS', default=5, cast=int)  # Por email, a cada LOGIN_JANELA (0 = sem limite)
+LOGIN_ORIGEM_TENTATIVAS = config('LOGIN_ORIGEM_TENTATIVAS', default=20, cast=int)  # Por IP, a cada LOGIN_JANELA (0 = sem limite)
+LOGIN_JANELA = config('LOGIN_JANELA', default=60, cast=int)  # Segundos para recuperar todas as tentativas
+LOGIN_HASH_SIMULTANEOS = config('LOGIN_HASH_SIMULTANEOS', default=0, cast=int)  # Verificações ao mesmo tempo (0 = núcleos)
+LOGIN_ESPERA_MAX = config('LOGIN_ESPERA_MAX', default=2.0, cast=float)  # Segundos esperando vaga antes de recusar
+LOGIN_CHAVES_MAX = config('LOGIN_CHAVES_MAX', default=10000, cast=int)  # Emails/IPs rastreados (os mais recentes)
+
 # ==================== FUNÇÕES AUXILIARES ====================
 
 def get_endereco_completo():
@@ -95,6 +95,13 @@ MENU_STRUCTURE = [
                 "permission_module": "USUARIOS",
                 "permission_action": "VISUALIZAR"
             },
+            {
+                "label": "Auditoria",
+                "icon": "🕵️",
+                "page": "pages/97_Auditoria.py",
+                "permission_module": "AUDITORIA",
+                "permission_action": "VISUALIZAR"
+            },
             # Preparado para expansão:
             # {
             #     "label": "Parâmetros",
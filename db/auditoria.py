@@ -0,0 +1,212 @@
+"""
+Gravação assíncrona do log de auditoria
+As ações entram numa fila limitada em memória e uma thread grava em
+lotes (executemany) quando o lote enche ou a cada intervalo. Login,
+logout e cadastros não esperam o INSERT do log.
+
+Fila cheia (AUDITORIA_FILA_CHEIA):
+- "sincrono": quem registrou grava o evento na hora (nada se perde)
+- "descartar": o evento é descartado e contado em 'descartados'
+
+Na saída do processo (atexit) a fila é esvaziada no banco.
+"""
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from db.connection import on_commit
+from config.empresa import (
+    AUDITORIA_ASSINCRONA, AUDITORIA_FILA_MAX, AUDITORIA_LOTE,
+    AUDITORIA_INTERVALO, AUDITORIA_FILA_CHEIA
+)
+
+TENTATIVAS = 3  # Gravações de um lote antes de desistir dele
+_FIM = object()  # Sinal na fila para a thread parar
+
+
+class GravadorAuditoria:
+    """
+    Fila limitada + thread gravadora de eventos de auditoria
+    
+    Cada evento é (USUARIO_ID, ACAO, MODULO, DETALHES, DATA_HORA); a
+    data/hora é a do registro, não a da gravação.
+    """
+    
+    def __init__(self, maximo=AUDITORIA_FILA_MAX, lote=AUDITORIA_LOTE,
+                 intervalo=AUDITORIA_INTERVALO, fila_cheia=AUDITORIA_FILA_CHEIA):
+        self.lote = max(1, lote)
+        self.intervalo = intervalo
+        self.fila_cheia = fila_cheia
+        self._fila = queue.Queue(maxsize=maximo)
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._metricas = {
+            'enfileirados': 0,
+            'gravados': 0,
+            'lotes': 0,
+            'sincronos': 0,
+            'descartados': 0,
+            'falhas': 0,
+            'perdidos': 0,
+            'maior_profundidade': 0,
+            'ultimo_lote_ms': 0.0,
+        }
+    
+    # ==================== REGISTRO ====================
+    
+    def registrar(self, usuario_id, acao, modulo, detalhes=""):
+        """Enfileira o evento (ou aplica a política de fila cheia)"""
+        evento = (usuario_id, acao, modulo, detalhes, datetime.now())
+        if self._parar.is_set():
+            # Processo encerrando: a thread não grava mais
+            self._contar('sincronos')
+            self._gravar([evento])
+            return
+        
+        self._iniciar()
+        try:
+            self._fila.put_nowait(evento)
+        except queue.Full:
+            if self.fila_cheia == "descartar":
+                self._contar('descartados')
+            else:
+                self._contar('sincronos')
+                self._gravar([evento])
+            return
+        
+        with self._lock:
+            self._metricas['enfileirados'] += 1
+            profundidade = self._fila.qsize()
+            if profundidade > self._metricas['maior_profundidade']:
+                self._metricas['maior_profundidade'] = profundidade
+    
+    def _contar(self, metrica, quantidade=1):
+        with self._lock:
+            self._metricas[metrica] += quantidade
+    
+    # ==================== THREAD GRAVADORA ====================
+    
+    def _iniciar(self):
+        """Sobe a thread na primeira chamada"""
+        if self._thread is not None:
+            return
+        
+        with self._lock:
+            if self._thread is None and not self._parar.is_set():
+                self._thread = threading.Thread(target=self._executar, name="auditoria", daemon=True)
+                self._thread.start()
+    
+    def _executar(self):
+        fim = False
+        while not fim:
+            evento = self._fila.get()
+            if evento is _FIM:
+                return
+            lote = [evento]
+            
+            # Junta mais eventos até encher o lote ou acabar o intervalo
+            limite = time.monotonic() + self.intervalo
+            while len(lote) < self.lote:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    evento = self._fila.get(timeout=restante)
+                except queue.Empty:
+                    break
+                if evento is _FIM:
+                    fim = True
+                    break
+                lote.append(evento)
+            
+            self._gravar(lote)
+    
+    def _gravar(self, eventos):
+        """Grava um lote com executemany (tenta TENTATIVAS vezes)"""
+        from db.models.log_auditoria import LogAuditoria
+        
+        for tentativa in range(1, TENTATIVAS + 1):
+            inicio = time.perf_counter()
+            try:
+                LogAuditoria.registrar_lote(eventos)
+            except Exception as e:
+                self._contar('falhas')
+                print(f"❌ Erro ao gravar log de auditoria ({tentativa}/{TENTATIVAS}): {e}")
+                if tentativa < TENTATIVAS and not self._parar.is_set():
+                    time.sleep(self.intervalo)
+                continue
+            
+            with self._lock:
+                self._metricas['gravados'] += len(eventos)
+                self._metricas['lotes'] += 1
+                self._metricas['ultimo_lote_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+            return
+        
+        self._contar('perdidos', len(eventos))
+    
+    # ==================== ENCERRAMENTO ====================
+    
+    def descarregar(self):
+        """Grava agora, na thread atual, tudo que está na fila"""
+        while True:
+            lote = []
+            try:
+                while len(lote) < self.lote:
+                    evento = self._fila.get_nowait()
+                    if evento is not _FIM:
+                        lote.append(evento)
+            except queue.Empty:
+                pass
+            
+            if not lote:
+                return
+            self._gravar(lote)
+    
+    def encerrar(self, espera=5.0):
+        """Para a thread e grava o que restou na fila (chamado no atexit)"""
+        self._parar.set()
+        if self._thread is not None:
+            try:
+                self._fila.put(_FIM, timeout=espera)
+            except queue.Full:
+                pass  # A thread ainda está gravando; o resto fica para descarregar()
+            self._thread.join(espera)
+        self.descarregar()
+    
+    def estatisticas(self):
+        """Profundidade da fila e contadores"""
+        with self._lock:
+            return {
+                'profundidade': self._fila.qsize(),
+                'maximo': self._fila.maxsize,
+                'ativa': self._thread is not None and self._thread.is_alive(),
+                **self._metricas,
+            }
+
+
+# Instância do processo
+gravador = GravadorAuditoria()
+atexit.register(gravador.encerrar)
+
+
+def registrar(usuario_id, acao, modulo, detalhes=""):
+    """
+    Registra ação no log de auditoria sem esperar a gravação
+    
+    Dentro de uma transaction(), o evento só entra na fila se a
+    transação for confirmada (ação desfeita não aparece no log).
+    Com AUDITORIA_ASSINCRONA desligado, grava na hora.
+    """
+    if not AUDITORIA_ASSINCRONA:
+        from db.models.log_auditoria import LogAuditoria
+        LogAuditoria.registrar(usuario_id, acao, modulo, detalhes)
+        return
+    
+    on_commit(lambda: gravador.registrar(usuario_id, acao, modulo, detalhes))
+
+
+def estatisticas():
+    """Métricas do gravador de auditoria"""
+    return gravador.estatisticas()
@@ -2,7 +2,30 @@
 Classe base para todos os models
 Fornece métodos CRUD comuns
 """
-from db.connection import get_db_cursor, execute_query
+import threading
+from itertools import islice
+from db.connection import (
+    get_db_cursor, execute_query, iter_query, on_commit, transaction, in_transaction, suporta_janelas
+)
+from db.keyset import (
+    paginar, paginar_com_total, codificar_cursor, decodificar_cursor, DESLOCAMENTO, CursorIncompativel
+)
+from db.busca import normalizar
+from db import trigramas, cache
+
+# Itens por IN (...) em find_by_ids (limite do Firebird: 1500 por lista)
+LOTE_IDS = 1500
+
+
+def _em_lotes(rows, tamanho):
+    """Divide um iterável (pode ser gerador) em listas de até `tamanho` itens"""
+    iterador = iter(rows)
+    while True:
+        lote = list(islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
 
 class BaseModel:
     """
@@ -12,38 +35,507 @@ class BaseModel:
     
     TABLE_NAME = None  # Sobrescrever em cada model
     PRIMARY_KEY = "ID"
+    SEQUENCE_NAME = None  # Padrão: GEN_<TABLE_NAME>_ID
+    COLUNAS = ()  # Colunas graváveis (sem a chave primária), na ordem usada em lote
+    CAMPOS = ()  # Colunas lidas por find_*/iter_all (padrão: chave primária + COLUNAS)
+    LINHA = None  # Tipo das linhas lidas (namedtuple com os CAMPOS); None = tupla
+    COLUNAS_BUSCA = {}  # Colunas normalizadas para busca: {COLUNA_BUSCA: COLUNA_ORIGEM}
+    CAMPOS_INDICE = ()  # Campos do índice de busca "contém" em memória (db/trigramas.py)
+    CAMPOS_TELEFONE = ()  # Campos comparados também sem formatação na busca "contém"
+    
+    # Versão dos dados por tabela (compartilhada entre sessões do processo)
+    _versoes = {}
+    _versoes_lock = threading.Lock()
     
     @classmethod
-    def _get_next_id(cls):
-        """Retorna próximo ID disponível (Firebird não tem AUTO_INCREMENT)"""
+    def versao_dados(cls):
+        """
+        Retorna a versão atual dos dados da tabela
+        Muda a cada escrita confirmada; usar como chave de cache
+        
+        Contador do processo: escritas de outros processos não mudam a
+        versão (um processo por banco; ver config/empresa.py)
+        """
+        return BaseModel._versoes.get(cls.TABLE_NAME, 0)
+    
+    @classmethod
+    def _registrar_alteracao(cls, record_id=None):
+        """
+        Registra escrita na tabela (chamar após INSERT/UPDATE/DELETE)
+        Os efeitos só valem quando a transação for confirmada
+        """
+        on_commit(lambda: cls._aplicar_alteracao(record_id))
+    
+    @classmethod
+    def _aplicar_alteracao(cls, record_id):
+        """Efeitos de uma escrita confirmada"""
+        with BaseModel._versoes_lock:
+            BaseModel._versoes[cls.TABLE_NAME] = BaseModel._versoes.get(cls.TABLE_NAME, 0) + 1
+        
+        cache.linhas.invalidar(cls.TABLE_NAME, record_id)
+        cls._atualizar_indice(record_id)
+    
+    @classmethod
+    def _atualizar_indice(cls, record_id):
+        """
+        Reflete a escrita no índice de trigramas (se carregado e ativo)
+        Roda depois do commit: erros são registrados e não sobem (os dados já
+        foram gravados e os demais callbacks precisam rodar)
+        """
+        indice = trigramas.indice_carregado(cls)
+        if indice is None:
+            return
+        
+        if record_id is None:
+            # Escrita em lote: relê a tabela sem bloquear
+            indice.invalidar()
+            trigramas.reconstruir_em_segundo_plano(cls)
+            return
+        
+        try:
+            sql = f"SELECT {', '.join(cls.CAMPOS_INDICE)} FROM {cls.TABLE_NAME} WHERE {cls.PRIMARY_KEY} = ?"
+            linha = execute_query(sql, (record_id,), fetch_one=True)
+            if linha is None:
+                indice.remover(record_id)
+            else:
+                indice.atualizar(record_id, linha)
+        except Exception as e:
+            # Registro não refletido: o índice é relido da tabela
+            print(f"⚠️ Erro ao atualizar índice de busca {cls.TABLE_NAME}: {e}")
+            indice.invalidar()
+            trigramas.reconstruir_em_segundo_plano(cls)
+    
+    @classmethod
+    def _sequence_name(cls):
+        """Nome da sequence (generator) que gera os IDs da tabela"""
         if not cls.TABLE_NAME:
             raise ValueError(f"TABLE_NAME não definido para {cls.__name__}")
         
+        return cls.SEQUENCE_NAME or f"GEN_{cls.TABLE_NAME}_ID"
+    
+    @classmethod
+    def criar_sequencia(cls):
+        """
+        Cria a sequence da tabela (se não existir) e a posiciona
+        no MAX(ID) atual, para não colidir com registros existentes
+        """
+        seq = cls._sequence_name()
+        
+        with get_db_cursor(commit=True) as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM RDB$GENERATORS WHERE RDB$GENERATOR_NAME = ?",
+                (seq,)
+            )
+            if not cursor.fetchone()[0]:
+                cursor.execute(f"CREATE SEQUENCE {seq}")
+                print(f"✅ Sequence {seq} criada")
+        
+        # DDL precisa estar confirmada antes de usar a sequence
+        with get_db_cursor(commit=True) as cursor:
+            cursor.execute(f"SELECT COALESCE(MAX({cls.PRIMARY_KEY}), 0) FROM {cls.TABLE_NAME}")
+            maximo = cursor.fetchone()[0]
+            cursor.execute(f"SELECT GEN_ID({seq}, 0) FROM RDB$DATABASE")
+            atual = cursor.fetchone()[0]
+            
+            # Só avança (nunca volta a sequence)
+            if maximo > atual:
+                cursor.execute(f"SELECT GEN_ID({seq}, {int(maximo - atual)}) FROM RDB$DATABASE")
+    
+    @classmethod
+    def _get_next_id(cls):
+        """Retorna próximo ID da sequence (Firebird não tem AUTO_INCREMENT)"""
+        seq = cls._sequence_name()
+        
         with get_db_cursor() as cursor:
-            cursor.execute(f"SELECT COALESCE(MAX({cls.PRIMARY_KEY}), 0) + 1 FROM {cls.TABLE_NAME}")
+            cursor.execute(f"SELECT NEXT VALUE FOR {seq} FROM RDB$DATABASE")
             return cursor.fetchone()[0]
     
     @classmethod
-    def find_by_id(cls, record_id):
-        """Busca registro por ID"""
-        if not cls.TABLE_NAME:
-            raise ValueError(f"TABLE_NAME não definido para {cls.__name__}")
+    def _reservar_ids(cls, quantidade):
+        """
+        Reserva um bloco de IDs em uma única ida ao banco
+        Útil para cargas em lote (os IDs do bloco são exclusivos desta chamada)
         
-        sql = f"SELECT * FROM {cls.TABLE_NAME} WHERE {cls.PRIMARY_KEY} = ?"
-        return execute_query(sql, (record_id,), fetch_one=True)
+        Returns:
+            range: IDs reservados
+        """
+        if quantidade <= 0:
+            return range(0)
+        
+        seq = cls._sequence_name()
+        
+        with get_db_cursor() as cursor:
+            cursor.execute(f"SELECT GEN_ID({seq}, {int(quantidade)}) FROM RDB$DATABASE")
+            ultimo = cursor.fetchone()[0]
+        
+        return range(ultimo - quantidade + 1, ultimo + 1)
     
     @classmethod
-    def find_all(cls, limit=100, offset=0):
-        """Lista todos registros com paginação"""
+    def _com_busca(cls, valores):
+        """Acrescenta ao dict {COLUNA: valor} as colunas de busca derivadas"""
+        valores = dict(valores)
+        for coluna_busca, origem in cls.COLUNAS_BUSCA.items():
+            if origem in valores:
+                valores[coluna_busca] = normalizar(valores[origem])
+        return valores
+    
+    @classmethod
+    def _derivadas(cls, colunas):
+        """
+        Colunas de busca a gravar junto com `colunas` em lote
+        
+        Returns:
+            list: [(COLUNA_BUSCA, posição da origem em colunas)]
+        """
+        return [
+            (coluna_busca, colunas.index(origem))
+            for coluna_busca, origem in cls.COLUNAS_BUSCA.items()
+            if origem in colunas and coluna_busca not in colunas
+        ]
+    
+    @classmethod
+    def _inserir(cls, valores):
+        """
+        Insere registro gerando o ID pela sequence no próprio INSERT
+        
+        Args:
+            valores (dict): {COLUNA: valor} sem a chave primária
+        
+        Returns:
+            int: ID gerado (INSERT ... RETURNING)
+        """
+        seq = cls._sequence_name()
+        valores = cls._com_busca(valores)
+        colunas = ", ".join(valores)
+        marcadores = ", ".join("?" for _ in valores)
+        
+        sql = f"""
+            INSERT INTO {cls.TABLE_NAME} ({cls.PRIMARY_KEY}, {colunas})
+            VALUES (NEXT VALUE FOR {seq}, {marcadores})
+            RETURNING {cls.PRIMARY_KEY}
+        """
+        with get_db_cursor(commit=True) as cursor:
+            cursor.execute(sql, tuple(valores.values()))
+            record_id = cursor.fetchone()[0]
+        
+        cls._registrar_alteracao(record_id)
+        return record_id
+    
+    @classmethod
+    def _valores(cls, row, colunas):
+        """Converte linha (dict por coluna ou tupla na ordem de colunas) em tupla"""
+        if isinstance(row, dict):
+            return tuple(row.get(coluna) for coluna in colunas)
+        return tuple(row)
+    
+    @classmethod
+    def bulk_insert(cls, rows, batch_size=1000, colunas=None, gerar_ids=True):
+        """
+        Insere muitos registros com executemany em uma única transação
+        
+        Args:
+            rows: Iterável (lista ou gerador) de dicts ou tuplas na ordem de `colunas`
+            batch_size: Registros enviados por executemany
+            colunas: Colunas a gravar (padrão: COLUNAS do model)
+            gerar_ids: Se True, IDs vêm da sequence (reservados em bloco por lote);
+                       se False, `colunas` deve incluir a chave primária
+        
+        Returns:
+            int: Quantidade de registros inseridos
+        """
+        colunas = tuple(colunas or cls.COLUNAS)
+        if not colunas:
+            raise ValueError(f"COLUNAS não definido para {cls.__name__}")
+        
+        derivadas = cls._derivadas(colunas)
+        colunas_sql = colunas + tuple(coluna for coluna, _ in derivadas)
+        if gerar_ids:
+            colunas_sql = (cls.PRIMARY_KEY,) + colunas_sql
+        
+        sql = (
+            f"INSERT INTO {cls.TABLE_NAME} ({', '.join(colunas_sql)}) "
+            f"VALUES ({', '.join('?' for _ in colunas_sql)})"
+        )
+        
+        total = 0
+        with transaction():
+            with get_db_cursor() as cursor:
+                for lote in _em_lotes(rows, batch_size):
+                    valores = [cls._valores(row, colunas) for row in lote]
+                    if derivadas:
+                        valores = [v + tuple(normalizar(v[i]) for _, i in derivadas) for v in valores]
+                    
+                    if gerar_ids:
+                        ids = cls._reservar_ids(len(valores))
+                        valores = [(record_id,) + v for record_id, v in zip(ids, valores)]
+                    
+                    cursor.executemany(sql, valores)
+                    total += len(valores)
+            
+            cls._registrar_alteracao()
+        
+        return total
+    
+    @classmethod
+    def bulk_update(cls, rows, batch_size=1000, colunas=None):
+        """
+        Atualiza muitos registros com executemany em uma única transação
+        
+        Args:
+            rows: Iterável de dicts (com a chave primária) ou tuplas (ID, *valores)
+            batch_size: Registros enviados por executemany
+            colunas: Colunas a atualizar (padrão: COLUNAS do model)
+        
+        Returns:
+            int: Quantidade de registros enviados
+        """
+        colunas = tuple(colunas or cls.COLUNAS)
+        if not colunas:
+            raise ValueError(f"COLUNAS não definido para {cls.__name__}")
+        
+        derivadas = cls._derivadas(colunas)
+        colunas_sql = colunas + tuple(coluna for coluna, _ in derivadas)
+        
+        sql = (
+            f"UPDATE {cls.TABLE_NAME} SET {', '.join(f'{c} = ?' for c in colunas_sql)} "
+            f"WHERE {cls.PRIMARY_KEY} = ?"
+        )
+        
+        def parametros(row):
+            if isinstance(row, dict):
+                valores, record_id = cls._valores(row, colunas), row[cls.PRIMARY_KEY]
+            else:
+                valores, record_id = tuple(row[1:]), row[0]
+            return valores + tuple(normalizar(valores[i]) for _, i in derivadas) + (record_id,)
+        
+        total = 0
+        with transaction():
+            with get_db_cursor() as cursor:
+                for lote in _em_lotes(rows, batch_size):
+                    cursor.executemany(sql, [parametros(row) for row in lote])
+                    total += len(lote)
+            
+            cls._registrar_alteracao()
+        
+        return total
+    
+    @classmethod
+    def _projecao(cls):
+        """Lista de colunas dos SELECTs genéricos (nunca SELECT *)"""
         if not cls.TABLE_NAME:
             raise ValueError(f"TABLE_NAME não definido para {cls.__name__}")
         
+        return ", ".join(cls.CAMPOS or (cls.PRIMARY_KEY,) + tuple(cls.COLUNAS))
+    
+    @classmethod
+    def find_by_id(cls, record_id):
+        """
+        Busca registro por ID
+        Passa pelo cache de linhas do processo (db/cache.py); dentro de
+        uma transaction() lê sempre do banco, para ver as próprias escritas
+        """
+        if in_transaction():
+            return cls._ler_por_id(record_id)
+        
+        linha = cache.linhas.obter(cls.TABLE_NAME, record_id)
+        if linha is not cache.AUSENTE:
+            return linha
+        
+        geracao = cache.linhas.geracao(cls.TABLE_NAME)
+        linha = cls._ler_por_id(record_id)
+        if linha is not None:
+            cache.linhas.guardar(cls.TABLE_NAME, record_id, linha, geracao)
+        return linha
+    
+    @classmethod
+    def _ler_por_id(cls, record_id):
+        """Lê o registro do banco (sem cache)"""
+        sql = f"SELECT {cls._projecao()} FROM {cls.TABLE_NAME} WHERE {cls.PRIMARY_KEY} = ?"
+        return execute_query(sql, (record_id,), fetch_one=True, tipo_linha=cls.LINHA)
+    
+    @classmethod
+    def find_all(cls, limit=100, offset=0):
+        """Lista todos registros com paginação (para páginas profundas, use find_page)"""
         sql = f"""
-            SELECT * FROM {cls.TABLE_NAME} 
+            SELECT {cls._projecao()} FROM {cls.TABLE_NAME} 
             ORDER BY {cls.PRIMARY_KEY} 
             ROWS ? TO ?
         """
-        return execute_query(sql, (offset + 1, offset + limit))
+        return execute_query(sql, (offset + 1, offset + limit), tipo_linha=cls.LINHA)
+    
+    @classmethod
+    def _paginar(cls, sql, params, colunas, indices, limit, cursor=None, com_total=False,
+                 tipo_linha=None, desc=False):
+        """
+        Executa uma página keyset (ver db/keyset.py)
+        
+        Com `com_total`, retorna também o total do filtro: na primeira página
+        (Firebird 3+) vem no mesmo SELECT (COUNT(*) OVER ()); nas demais, e
+        em servidores antigos, um COUNT à parte na mesma transação
+        
+        As linhas viram `tipo_linha` (padrão: LINHA do model); colunas
+        além dos campos do tipo (ex: chave do cursor) são descartadas
+        
+        Returns:
+            tuple: (linhas, proximo_cursor, cursor_anterior[, total])
+        """
+        if not com_total:
+            pagina = paginar(execute_query, sql, params, colunas, indices, limit, cursor, desc)
+        else:
+            with transaction():
+                pagina = paginar_com_total(
+                    execute_query, sql, params, colunas, indices, limit, cursor, desc,
+                    janela=suporta_janelas()
+                )
+        
+        tipo_linha = tipo_linha or cls.LINHA
+        if tipo_linha is None:
+            return pagina
+        
+        n = len(tipo_linha._fields)
+        return ([tipo_linha._make(linha[:n]) for linha in pagina[0]],) + tuple(pagina[1:])
+    
+    @classmethod
+    def find_page(cls, limit=100, cursor=None):
+        """
+        Lista registros em ordem de chave primária com paginação keyset
+        
+        Args:
+            limit: Registros por página
+            cursor: Cursor opaco devolvido pela página anterior (None = início)
+        
+        Returns:
+            tuple: (linhas, proximo_cursor, cursor_anterior)
+        """
+        sql = f"SELECT {cls._projecao()} FROM {cls.TABLE_NAME} WHERE 1 = 1"
+        return cls._paginar(sql, (), (cls.PRIMARY_KEY,), (0,), limit, cursor)
+    
+    @classmethod
+    def find_by_ids(cls, ids):
+        """
+        Busca vários registros por ID, na ordem recebida (sem N+1)
+        
+        IDs que estão no cache de linhas não vão ao banco; os demais são
+        lidos com WHERE ID IN (...) em lotes de até LOTE_IDS.
+        A primeira coluna de CAMPOS deve ser a chave primária.
+        
+        Args:
+            ids: IDs (lista, tupla ou gerador); repetidos voltam repetidos
+        
+        Returns:
+            list: Linhas encontradas (IDs inexistentes são omitidos)
+        """
+        ids = list(ids)
+        if not ids:
+            return []
+        
+        usar_cache = not in_transaction()
+        por_id, faltando = {}, []
+        
+        for record_id in dict.fromkeys(ids):
+            if usar_cache:
+                linha = cache.linhas.obter(cls.TABLE_NAME, record_id)
+                if linha is not cache.AUSENTE:
+                    por_id[record_id] = linha
+                    continue
+            faltando.append(record_id)
+        
+        if faltando:
+            geracao = cache.linhas.geracao(cls.TABLE_NAME)
+            projecao = cls._projecao()
+            
+            for lote in _em_lotes(faltando, LOTE_IDS):
+                sql = (
+                    f"SELECT {projecao} FROM {cls.TABLE_NAME} "
+                    f"WHERE {cls.PRIMARY_KEY} IN ({', '.join('?' for _ in lote)})"
+                )
+                for linha in execute_query(sql, tuple(lote), tipo_linha=cls.LINHA):
+                    por_id[linha[0]] = linha
+                    if usar_cache:
+                        cache.linhas.guardar(cls.TABLE_NAME, linha[0], linha, geracao)
+        
+        return [por_id[record_id] for record_id in ids if record_id in por_id]
+    
+    @classmethod
+    def _ids_indice(cls, busca):
+        """IDs ordenados pelo índice de trigramas (None se não puder responder)"""
+        indice = trigramas.indice_carregado(cls)
+        return indice.buscar(busca) if indice is not None else None
+    
+    @classmethod
+    def _iter_indice(cls, busca, batch_size=500):
+        """
+        Percorre o resultado "contém" do índice de trigramas em lotes (gerador)
+        Mesma ordem da grade; retorna None se o índice não puder responder
+        """
+        ids = cls._ids_indice(busca)
+        if ids is None:
+            return None
+        
+        def linhas():
+            for lote in _em_lotes(ids, min(batch_size, LOTE_IDS)):
+                yield from cls.find_by_ids(lote)
+        return linhas()
+    
+    @classmethod
+    def _pagina_indice(cls, busca, limit, cursor=None, com_total=False):
+        """
+        Página da busca "contém" respondida pelo índice de trigramas
+        O cursor guarda o deslocamento na lista ordenada de IDs
+        
+        Returns:
+            tuple: (linhas, proximo_cursor, cursor_anterior[, total]), ou None se o
+                   índice não puder responder (usar a consulta no banco)
+        
+        Raises:
+            CursorIncompativel: Cursor keyset emitido pela consulta no banco
+                                (o índice ficou pronto entre uma página e outra)
+        """
+        ids = cls._ids_indice(busca)
+        if ids is None:
+            return None
+        
+        inicio = 0
+        if cursor:
+            valores, direcao = decodificar_cursor(cursor)
+            if direcao != DESLOCAMENTO:
+                raise CursorIncompativel("Cursor da consulta no banco lido pelo índice")
+            inicio = max(0, int(valores[0]))
+        
+        fim = inicio + limit
+        linhas = cls.find_by_ids(ids[inicio:fim])
+        proximo = codificar_cursor((fim,), DESLOCAMENTO) if fim < len(ids) else None
+        anterior = codificar_cursor((max(0, inicio - limit),), DESLOCAMENTO) if inicio else None
+        
+        if com_total:
+            return linhas, proximo, anterior, len(ids)
+        return linhas, proximo, anterior
+    
+    @classmethod
+    def iter_all(cls, batch_size=500):
+        """Percorre todos os registros em lotes (gerador, memória constante)"""
+        sql = f"SELECT {cls._projecao()} FROM {cls.TABLE_NAME} ORDER BY {cls.PRIMARY_KEY}"
+        return iter_query(sql, batch_size=batch_size, tipo_linha=cls.LINHA)
+    
+    @classmethod
+    def _contar(cls, filtro="1 = 1", params=(), limite=None, origem=None):
+        """
+        Conta registros que atendem ao filtro (WHERE)
+        
+        Args:
+            limite: Se informado, para de contar em limite + 1
+                    (o banco lê no máximo isso; use para exibir "1000+")
+            origem: FROM alternativo (ex: tabela derivada); None = TABLE_NAME
+        """
+        origem = origem or cls.TABLE_NAME
+        if limite is None:
+            sql = f"SELECT COUNT(*) FROM {origem} WHERE {filtro}"
+        else:
+            sql = f"SELECT COUNT(*) FROM (SELECT 1 AS X FROM {origem} WHERE {filtro} ROWS ?)"
+            params = tuple(params) + (limite + 1,)
+        
+        result = execute_query(sql, params, fetch_one=True)
+        return result[0] if result else 0
     
     @classmethod
     def count_all(cls):
@@ -63,6 +555,12 @@ class BaseModel:
         
         sql = f"DELETE FROM {cls.TABLE_NAME} WHERE {cls.PRIMARY_KEY} = ?"
         execute_query(sql, (record_id,), commit=True)
+        cls._registrar_alteracao(record_id)
+    
+    @classmethod
+    def excluir(cls, record_id):
+        """Exclui registro por ID (mesmo que delete)"""
+        cls.delete(record_id)
     
     @classmethod
     def exists(cls, record_id):
@@ -0,0 +1,41 @@
+"""
+Normalização de texto para busca
+Gera a forma gravada nas colunas *_BUSCA: maiúsculas, sem acentos e
+com espaços simples, para que "joao" encontre "João" usando índice
+"""
+import unicodedata
+
+
+def normalizar(texto):
+    """
+    Normaliza texto para busca ("  João  da Silva" -> "JOAO DA SILVA")
+    
+    Returns:
+        str: Texto normalizado (None se texto for None)
+    """
+    if texto is None:
+        return None
+    
+    decomposto = unicodedata.normalize("NFKD", str(texto))
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.upper().split())
+
+
+# Formatação ignorada nos telefones ("(11) 98888-7777" -> "11988887777")
+FORMATACAO_TELEFONE = "()-. /+"
+
+
+def sem_formatacao(texto):
+    """Telefone sem os caracteres de formatação (mesma regra de sql_sem_formatacao)"""
+    return "".join(c for c in texto if c not in FORMATACAO_TELEFONE)
+
+
+def sql_sem_formatacao(coluna):
+    """
+    Expressão SQL da coluna sem os caracteres de formatação
+    ("TELEFONE1" -> REPLACE(REPLACE(TELEFONE1, '(', ''), ')', '')...)
+    """
+    expressao = coluna
+    for caractere in FORMATACAO_TELEFONE:
+        expressao = f"REPLACE({expressao}, '{caractere}', '')"
+    return expressao
@@ -0,0 +1,111 @@
+"""
+Cache de linhas por chave primária (identity map do processo)
+Guarda o resultado de find_by_id por (tabela, ID), compartilhado entre
+sessões: reaberturas de modal e reruns não voltam ao banco.
+
+LRU com validade (TTL): a validade cobre escritas feitas por outros
+processos; as escritas deste processo invalidam a entrada na hora
+(BaseModel._aplicar_alteracao, após o commit).
+"""
+import threading
+import time
+from collections import OrderedDict
+from config.empresa import CACHE_LINHAS_MAX, CACHE_LINHAS_TTL
+
+AUSENTE = object()  # Retorno de obter() quando a chave não está em cache
+
+
+class CacheLinhas:
+    """
+    LRU + TTL de linhas por (tabela, ID)
+    
+    Cada tabela tem uma geração, incrementada a cada invalidação: a
+    leitura anota a geração antes de ir ao banco e guardar() descarta
+    o resultado se houve escrita no meio (evita guardar valor antigo).
+    """
+    
+    def __init__(self, maximo=CACHE_LINHAS_MAX, ttl=CACHE_LINHAS_TTL):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._linhas = OrderedDict()  # {(tabela, ID): (expira_em, linha)}
+        self._geracoes = {}
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+    
+    def geracao(self, tabela):
+        """Geração atual da tabela (anotar antes de ler do banco)"""
+        with self._lock:
+            return self._geracoes.get(tabela, 0)
+    
+    def obter(self, tabela, record_id):
+        """Linha em cache, ou AUSENTE (não está em cache ou expirou)"""
+        chave = (tabela, record_id)
+        with self._lock:
+            item = self._linhas.get(chave)
+            if item is not None:
+                if item[0] > time.monotonic():
+                    self._linhas.move_to_end(chave)
+                    self.acertos += 1
+                    return item[1]
+                del self._linhas[chave]
+            self.falhas += 1
+            return AUSENTE
+    
+    def guardar(self, tabela, record_id, linha, geracao):
+        """Guarda a linha lida do banco (ignorado se a tabela mudou desde `geracao`)"""
+        if self.maximo <= 0:
+            return
+        
+        chave = (tabela, record_id)
+        with self._lock:
+            if self._geracoes.get(tabela, 0) != geracao:
+                return
+            self._linhas[chave] = (time.monotonic() + self.ttl, linha)
+            self._linhas.move_to_end(chave)
+            while len(self._linhas) > self.maximo:
+                self._linhas.popitem(last=False)
+    
+    def invalidar(self, tabela, record_id=None):
+        """Remove a linha (ou todas as linhas da tabela, se record_id for None)"""
+        with self._lock:
+            self._geracoes[tabela] = self._geracoes.get(tabela, 0) + 1
+            self.invalidacoes += 1
+            
+            if record_id is not None:
+                self._linhas.pop((tabela, record_id), None)
+                return
+            
+            for chave in [c for c in self._linhas if c[0] == tabela]:
+                del self._linhas[chave]
+    
+    def limpar(self):
+        """Esvazia o cache (todas as tabelas)"""
+        with self._lock:
+            for tabela in {c[0] for c in self._linhas}:
+                self._geracoes[tabela] = self._geracoes.get(tabela, 0) + 1
+            self._linhas.clear()
+    
+    def estatisticas(self):
+        """Contadores de acertos/falhas e ocupação"""
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'linhas': len(self._linhas),
+                'maximo': self.maximo,
+                'ttl_segundos': self.ttl,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': round(self.acertos / consultas, 3) if consultas else 0.0,
+                'invalidacoes': self.invalidacoes,
+            }
+
+
+# Instância do processo (usada por BaseModel)
+linhas = CacheLinhas()
+
+
+def estatisticas():
+    """Estatísticas do cache de linhas do processo"""
+    return linhas.estatisticas()
@@ -1,9 +1,17 @@
 """
 Gerenciador centralizado de conexões com banco de dados Firebird
+Mantém um pool de conexões reaproveitadas entre as chamadas
 """
+import atexit
 import fdb
+import threading
+import time
 from contextlib import contextmanager
-from config.empresa import BANCO_HOST, BANCO_CAMINHO, BANCO_USER, BANCO_PASSWORD
+from contextvars import ContextVar
+from config.empresa import (
+    BANCO_HOST, BANCO_CAMINHO, BANCO_USER, BANCO_PASSWORD, BANCO_TIMEOUT,
+    BANCO_POOL_MIN, BANCO_POOL_MAX, BANCO_POOL_OCIOSO, BANCO_POOL_VERIFICAR
+)
 
 # Pool de configurações (singleton)
 _connection_config = {
@@ -14,25 +22,317 @@ _connection_config = {
     'charset': 'UTF8'
 }
 
+
+def _nova_conexao():
+    """Abre um novo attachment no servidor (fora do pool)"""
+    try:
+        return fdb.connect(**_connection_config)
+    except Exception as e:
+        raise ConnectionError(f"Erro ao conectar ao banco de dados: {e}")
+
+
+class _ConexaoPool:
+    """
+    Conexão emprestada do pool
+    
+    Repassa tudo para a conexão fdb real, mas close() devolve
+    a conexão ao pool em vez de encerrar o attachment.
+    """
+    
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+    
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool.devolver(conn)
+    
+    @property
+    def closed(self):
+        return self._conn is None
+    
+    def __getattr__(self, nome):
+        if self._conn is None:
+            raise ConnectionError("Conexão já devolvida ao pool")
+        return getattr(self._conn, nome)
+
+
+class ConnectionPool:
+    """
+    Pool de conexões limitado e thread-safe
+    
+    - Mantém no mínimo `min_size` e no máximo `max_size` conexões
+    - Fecha conexões ociosas há mais de `idle_timeout` segundos
+    - Testa a conexão na retirada se ficou ociosa mais de `ping_after` segundos
+    - Faz rollback na devolução (a conexão volta limpa)
+    """
+    
+    def __init__(self, fabrica, min_size=1, max_size=10, idle_timeout=300,
+                 ping_after=30, timeout=30):
+        self._fabrica = fabrica
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.timeout = timeout
+        
+        self._cond = threading.Condition()
+        self._ociosas = []  # [(conexão, instante da devolução)]
+        self._total = 0     # abertas (ociosas + emprestadas)
+        self._stats = {
+            'criadas': 0,
+            'fechadas': 0,
+            'retiradas': 0,
+            'esperas': 0,
+            'timeouts': 0,
+            'descartadas': 0,
+        }
+    
+    def retirar(self):
+        """
+        Retira uma conexão do pool (bloqueia se o pool estiver cheio)
+        
+        Raises:
+            ConnectionError: Se nenhuma conexão ficar livre dentro do timeout
+        """
+        limite = time.monotonic() + self.timeout
+        
+        with self._cond:
+            while True:
+                self._fechar_expiradas()
+                
+                if self._ociosas:
+                    conn, devolvida_em = self._ociosas.pop()
+                    self._stats['retiradas'] += 1
+                    break
+                
+                if self._total < self.max_size:
+                    self._total += 1
+                    conn, devolvida_em = None, None
+                    self._stats['retiradas'] += 1
+                    break
+                
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self._stats['timeouts'] += 1
+                    raise ConnectionError(
+                        f"Pool de conexões esgotado ({self.max_size} em uso)"
+                    )
+                self._stats['esperas'] += 1
+                self._cond.wait(restante)
+        
+        # I/O fora do lock
+        if conn is None:
+            return self._abrir()
+        
+        if time.monotonic() - devolvida_em >= self.ping_after and not self._viva(conn):
+            # A substituta ocupa a vaga da conexão morta (_total não muda);
+            # se _abrir falhar, é ele quem libera a vaga
+            with self._cond:
+                self._stats['descartadas'] += 1
+            self._fechar(conn)
+            return self._abrir()
+        
+        return conn
+    
+    def devolver(self, conn):
+        """Devolve conexão ao pool, desfazendo transação pendente"""
+        try:
+            conn.rollback()
+        except Exception:
+            self._descartar(conn)
+            return
+        
+        with self._cond:
+            self._ociosas.append((conn, time.monotonic()))
+            self._cond.notify()
+    
+    def fechar_todas(self):
+        """Fecha todas as conexões ociosas (ex.: no encerramento do processo)"""
+        with self._cond:
+            ociosas, self._ociosas = self._ociosas, []
+            self._total -= len(ociosas)
+        
+        for conn, _ in ociosas:
+            self._fechar(conn)
+    
+    def stats(self):
+        """Retorna estatísticas do pool"""
+        with self._cond:
+            return {
+                **self._stats,
+                'abertas': self._total,
+                'ociosas': len(self._ociosas),
+                'em_uso': self._total - len(self._ociosas),
+                'min': self.min_size,
+                'max': self.max_size,
+            }
+    
+    def _abrir(self):
+        try:
+            conn = self._fabrica()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+        
+        with self._cond:
+            self._stats['criadas'] += 1
+        return conn
+    
+    def _viva(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM RDB$DATABASE")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except Exception:
+            return False
+    
+    def _descartar(self, conn):
+        with self._cond:
+            self._total -= 1
+            self._stats['descartadas'] += 1
+            self._cond.notify()
+        self._fechar(conn)
+    
+    def _fechar(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._stats['fechadas'] += 1
+    
+    def _fechar_expiradas(self):
+        """Remove conexões ociosas além do mínimo (chamar com lock)"""
+        if not self._ociosas or self.idle_timeout <= 0:
+            return
+        
+        agora = time.monotonic()
+        # Mais antigas no início da lista
+        while self._ociosas and self._total > self.min_size:
+            conn, devolvida_em = self._ociosas[0]
+            if agora - devolvida_em < self.idle_timeout:
+                break
+            self._ociosas.pop(0)
+            self._total -= 1
+            self._stats['fechadas'] += 1
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+_pool = ConnectionPool(
+    _nova_conexao,
+    min_size=BANCO_POOL_MIN,
+    max_size=BANCO_POOL_MAX,
+    idle_timeout=BANCO_POOL_OCIOSO,
+    ping_after=BANCO_POOL_VERIFICAR,
+    timeout=BANCO_TIMEOUT
+)
+atexit.register(lambda: _pool.fechar_todas())
+
+
 def get_connection():
     """
-    Retorna uma conexão com o banco de dados
+    Retorna uma conexão do pool
+    
+    Chamar close() devolve a conexão ao pool (com rollback do que
+    não foi confirmado), sem encerrar o attachment no servidor.
     
     Returns:
-        fdb.Connection: Conexão ativa com o banco
-        
+        Conexão ativa com o banco (interface de fdb.Connection)
+    
     Raises:
         ConnectionError: Se não conseguir conectar
     """
+    return _ConexaoPool(_pool, _pool.retirar())
+
+
+# Conexão da transação em andamento (por thread/contexto)
+_transacao_atual = ContextVar('transacao_atual', default=None)
+# Callbacks a executar quando a transação em andamento for confirmada
+_ao_confirmar = ContextVar('ao_confirmar', default=None)
+
+
+@contextmanager
+def transaction():
+    """
+    Escopo de unidade de trabalho: uma conexão e um único commit
+    
+    Tudo que usar get_db_cursor, get_db_connection ou execute_query
+    dentro do bloco reaproveita a mesma conexão e só é confirmado ao
+    sair do bloco mais externo. Pode ser aninhado; em caso de erro,
+    a transação inteira é desfeita.
+    
+    Uso:
+        with transaction():
+            cliente_id = Cliente.criar("João", "joao@email.com")
+            AuthManager.audit_log("CRIAR_CLIENTE", "CLIENTES", "...")
+    """
+    conn = _transacao_atual.get()
+    if conn is not None:
+        # Aninhado: participa da transação externa
+        yield conn
+        return
+    
+    conn = get_connection()
+    callbacks = []
+    token = _transacao_atual.set(conn)
+    token_callbacks = _ao_confirmar.set(callbacks)
     try:
-        return fdb.connect(**_connection_config)
-    except Exception as e:
-        raise ConnectionError(f"Erro ao conectar ao banco de dados: {e}")
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        _ao_confirmar.reset(token_callbacks)
+        _transacao_atual.reset(token)
+        conn.close()
+    
+    for callback in callbacks:
+        callback()
+
+
+def in_transaction():
+    """Indica se há uma transaction() ativa no contexto atual"""
+    return _transacao_atual.get() is not None
+
+
+def on_commit(callback):
+    """
+    Agenda callback para depois do commit da transaction() atual
+    
+    Fora de transação, executa imediatamente (a escrita já foi
+    confirmada por get_db_cursor/execute_query). Se a transação
+    for desfeita, o callback é descartado.
+    """
+    callbacks = _ao_confirmar.get()
+    if callbacks is None:
+        callback()
+    else:
+        callbacks.append(callback)
+
+
+def get_pool_stats():
+    """Retorna estatísticas do pool de conexões"""
+    return _pool.stats()
+
+
+def close_pool():
+    """Fecha as conexões ociosas do pool"""
+    _pool.fechar_todas()
 
 @contextmanager
 def get_db_connection():
     """
-    Context manager para conexão com auto-close
+    Context manager para conexão com devolução automática ao pool
     
     Uso:
         with get_db_connection() as conn:
@@ -40,9 +340,15 @@ def get_db_connection():
             cursor.execute("SELECT * FROM CLIENTES")
             results = cursor.fetchall()
             cursor.close()
-            
-    Garante que a conexão será fechada mesmo em caso de erro
+    
+    Garante que a conexão será devolvida mesmo em caso de erro.
+    Dentro de transaction(), retorna a conexão da transação.
     """
+    conn = _transacao_atual.get()
+    if conn is not None:
+        yield conn
+        return
+    
     conn = get_connection()
     try:
         yield conn
@@ -56,7 +362,7 @@ def get_db_cursor(commit=False):
     
     Args:
         commit (bool): Se True, faz commit automaticamente ao final
-        
+    
     Uso:
         # SELECT
         with get_db_cursor() as cursor:
@@ -66,7 +372,19 @@ def get_db_cursor(commit=False):
         # INSERT/UPDATE/DELETE
         with get_db_cursor(commit=True) as cursor:
             cursor.execute("INSERT INTO CLIENTES (NOME) VALUES (?)", ("João",))
+    
+    Dentro de transaction(), usa a conexão da transação e o commit
+    fica para o fim do bloco mais externo.
     """
+    conn = _transacao_atual.get()
+    if conn is not None:
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+        return
+    
     conn = get_connection()
     cursor = conn.cursor()
     try:
@@ -80,7 +398,7 @@ def get_db_cursor(commit=False):
         cursor.close()
         conn.close()
 
-def execute_query(sql, params=None, fetch_one=False, fetch_all=True, commit=False):
+def execute_query(sql, params=None, fetch_one=False, fetch_all=True, commit=False, tipo_linha=None):
     """
     Executa query de forma simplificada
     
@@ -90,10 +408,11 @@ def execute_query(sql, params=None, fetch_one=False, fetch_all=True, commit=Fals
         fetch_one (bool): Retorna apenas um registro
         fetch_all (bool): Retorna todos os registros
         commit (bool): Faz commit após execução
-        
+        tipo_linha: Tipo das linhas retornadas (namedtuple do model); None = tupla
+    
     Returns:
         list/tuple/None: Resultado da query
-        
+    
     Exemplos:
         # SELECT um registro
         cliente = execute_query("SELECT * FROM CLIENTES WHERE ID = ?", (1,), fetch_one=True)
@@ -111,12 +430,84 @@ def execute_query(sql, params=None, fetch_one=False, fetch_all=True, commit=Fals
         cursor.execute(sql, params or ())
         
         if fetch_one:
-            return cursor.fetchone()
+            linha = cursor.fetchone()
+            if linha is not None and tipo_linha is not None:
+                return tipo_linha._make(linha)
+            return linha
         elif fetch_all and not commit:
+            if tipo_linha is not None:
+                return list(map(tipo_linha._make, cursor.fetchall()))
             return cursor.fetchall()
         
         return None
 
+def iter_query(sql, params=None, batch_size=500, tipo_linha=None):
+    """
+    Executa SELECT e devolve as linhas aos poucos (gerador)
+    
+    O cursor fica aberto e as linhas são lidas em lotes de
+    `batch_size` (fetchmany), então a memória não cresce com o
+    tamanho do resultado. A conexão volta ao pool quando o gerador
+    termina ou é fechado (close() / saída antecipada do for).
+    
+    Args:
+        sql (str): Query SQL
+        params (tuple): Parâmetros da query
+        batch_size (int): Linhas buscadas por ida ao servidor
+        tipo_linha: Tipo das linhas retornadas (namedtuple do model); None = tupla
+    
+    Exemplo:
+        for cliente in iter_query("SELECT ID, NOME FROM CLIENTES"):
+            processar(cliente)
+    """
+    conn_transacao = _transacao_atual.get()
+    conn = conn_transacao if conn_transacao is not None else get_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute(sql, params or ())
+        
+        while True:
+            lote = cursor.fetchmany(batch_size)
+            if not lote:
+                break
+            if tipo_linha is not None:
+                yield from map(tipo_linha._make, lote)
+            else:
+                yield from lote
+    finally:
+        cursor.close()
+        if conn_transacao is None:
+            conn.close()
+
+_versao_servidor = None
+
+
+def versao_servidor():
+    """
+    Versão principal do servidor Firebird (ex: 3 para 3.0.7)
+    Consultada uma única vez por processo; 0 se não for possível identificar
+    """
+    global _versao_servidor
+    
+    if _versao_servidor is None:
+        try:
+            result = execute_query(
+                "SELECT RDB$GET_CONTEXT('SYSTEM', 'ENGINE_VERSION') FROM RDB$DATABASE",
+                fetch_one=True
+            )
+            _versao_servidor = int(str(result[0]).split(".")[0])
+        except Exception:
+            _versao_servidor = 0
+    
+    return _versao_servidor
+
+
+def suporta_janelas():
+    """Funções de janela (COUNT(*) OVER ()) existem a partir do Firebird 3"""
+    return versao_servidor() >= 3
+
+
 def test_connection():
     """
     Testa conexão com o banco de dados
@@ -0,0 +1,190 @@
+"""
+Paginação por chave (keyset / seek)
+Em vez de ROWS offset+1 TO offset+limit (que lê e descarta as linhas
+anteriores), continua a partir da última chave vista: qualquer página
+custa o mesmo que a primeira, desde que exista índice na ordenação.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+PROXIMA = "p"   # linhas depois do cursor
+ANTERIOR = "a"  # linhas antes do cursor
+DESLOCAMENTO = "i"  # posição numa lista já ordenada (índice em memória)
+
+
+class CursorIncompativel(ValueError):
+    """
+    Cursor emitido por outro caminho de paginação (ex: deslocamento do
+    índice em memória lido pela consulta keyset no banco, ou o contrário)
+    Quem pagina deve voltar à primeira página
+    """
+
+
+def _serializar(valor):
+    if isinstance(valor, datetime):
+        return {"$dt": valor.isoformat()}
+    if isinstance(valor, date):
+        return {"$d": valor.isoformat()}
+    if isinstance(valor, Decimal):
+        return {"$dec": str(valor)}
+    return valor
+
+
+def _desserializar(valor):
+    if isinstance(valor, dict):
+        if "$dt" in valor:
+            return datetime.fromisoformat(valor["$dt"])
+        if "$d" in valor:
+            return date.fromisoformat(valor["$d"])
+        if "$dec" in valor:
+            return Decimal(valor["$dec"])
+    return valor
+
+
+def codificar_cursor(valores, direcao=PROXIMA):
+    """
+    Gera cursor opaco (string segura para URL) a partir das chaves da linha
+    
+    Args:
+        valores: Valores das colunas de ordenação (ex: (NOME, ID))
+        direcao: PROXIMA ou ANTERIOR
+    """
+    dados = {"v": [_serializar(v) for v in valores], "d": direcao}
+    texto = json.dumps(dados, separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(texto.encode("utf-8")).decode("ascii")
+
+
+def decodificar_cursor(cursor):
+    """
+    Lê cursor gerado por codificar_cursor
+    
+    Returns:
+        tuple: (valores, direcao)
+    
+    Raises:
+        ValueError: Se o cursor for inválido
+    """
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return tuple(_desserializar(v) for v in dados["v"]), dados["d"]
+    except Exception as e:
+        raise ValueError(f"Cursor de paginação inválido: {e}")
+
+
+def _predicado(colunas, depois):
+    """
+    Monta WHERE de continuação
+    Com (CHAVE, ID): CHAVE >= ? AND (CHAVE > ? OR ID > ?)
+    O primeiro termo dá ao Firebird um limite inicial no índice
+    """
+    op = ">" if depois else "<"
+    
+    if len(colunas) == 1:
+        return f"{colunas[0]} {op} ?", lambda v: (v[0],)
+    
+    chave, desempate = colunas
+    sql = f"{chave} {op}= ? AND ({chave} {op} ? OR {desempate} {op} ?)"
+    return sql, lambda v: (v[0], v[0], v[1])
+
+
+def paginar(executar, sql_base, params, colunas, indices, limit, cursor=None, desc=False):
+    """
+    Executa uma página keyset
+    
+    Args:
+        executar: Função (sql, params) -> lista de linhas (ex: execute_query)
+        sql_base: SELECT ... FROM ... WHERE <filtros> (sem ORDER BY)
+        params: Parâmetros dos filtros
+        colunas: Colunas de ordenação no SQL, ex: ("NOME", "ID") ou ("ID",)
+                 A última deve ser única (desempate)
+        indices: Posição de cada coluna de ordenação na linha retornada
+        limit: Registros por página
+        cursor: Cursor opaco recebido da página anterior (None = início)
+        desc: Ordenação decrescente
+    
+    Returns:
+        tuple: (linhas, proximo_cursor, cursor_anterior) - cursores None quando
+               não há página naquela direção
+    
+    Raises:
+        CursorIncompativel: Cursor de outro tipo de paginação (ex: deslocamento)
+    """
+    direcao = PROXIMA
+    valores = None
+    if cursor:
+        valores, direcao = decodificar_cursor(cursor)
+        if direcao not in (PROXIMA, ANTERIOR):
+            raise CursorIncompativel("Cursor de outro tipo de paginação")
+    
+    voltando = direcao == ANTERIOR
+    sql = sql_base
+    params = tuple(params)
+    
+    if valores is not None:
+        # Depois do cursor na ordem pedida: ">" se crescente, "<" se decrescente
+        predicado, montar = _predicado(colunas, depois=(desc == voltando))
+        sql += f" AND {predicado}"
+        params += montar(valores)
+    
+    # Voltando, lê na ordem inversa e depois desinverte
+    decrescente = desc != voltando
+    ordem = ", ".join(f"{c} {'DESC' if decrescente else 'ASC'}" for c in colunas)
+    sql += f" ORDER BY {ordem} ROWS 1 TO ?"
+    params += (limit + 1,)
+    
+    linhas = list(executar(sql, params) or [])
+    tem_mais = len(linhas) > limit
+    linhas = linhas[:limit]
+    
+    if voltando:
+        linhas.reverse()
+    
+    if not linhas:
+        return linhas, None, None
+    
+    def chave(linha):
+        return tuple(linha[i] for i in indices)
+    
+    if voltando:
+        proximo = codificar_cursor(chave(linhas[-1]), PROXIMA)
+        anterior = codificar_cursor(chave(linhas[0]), ANTERIOR) if tem_mais else None
+    else:
+        proximo = codificar_cursor(chave(linhas[-1]), PROXIMA) if tem_mais else None
+        anterior = codificar_cursor(chave(linhas[0]), ANTERIOR) if valores is not None else None
+    
+    return linhas, proximo, anterior
+
+
+def paginar_com_total(executar, sql_base, params, colunas, indices, limit, cursor=None,
+                      desc=False, janela=True):
+    """
+    Como paginar, mas também retorna o total de linhas do filtro
+    
+    O total exato custa ler o filtro inteiro em toda página. Com cursor,
+    a página é uma leitura keyset normal (predicado e ROWS direto no índice)
+    e o total vem de um SELECT COUNT(*) à parte: um COUNT(*) OVER () numa
+    tabela derivada deixaria o predicado do cursor do lado de fora, e o
+    Firebird materializaria e ordenaria o conjunto todo a cada página.
+    
+    Na primeira página (sem cursor) o conjunto é lido inteiro de qualquer
+    forma; com `janela` (Firebird 3+), página e total vêm do mesmo SELECT.
+    As colunas de ordenação são usadas sem o prefixo de tabela
+    (ex: "U.NOME" -> "NOME"), pois a consulta externa vê a tabela derivada.
+    
+    Returns:
+        tuple: (linhas, proximo_cursor, cursor_anterior, total)
+    """
+    if cursor or not janela:
+        linhas, proximo, anterior = paginar(executar, sql_base, params, colunas, indices, limit, cursor, desc)
+        total = executar(f"SELECT COUNT(*) FROM ({sql_base}) C", tuple(params))[0][0]
+        return linhas, proximo, anterior, total
+    
+    sql = f"SELECT * FROM (SELECT Q.*, COUNT(*) OVER () AS TOTAL_LINHAS FROM ({sql_base}) Q) P WHERE 1 = 1"
+    colunas = tuple(coluna.split(".")[-1] for coluna in colunas)
+    
+    linhas, proximo, anterior = paginar(executar, sql, params, colunas, indices, limit, cursor, desc)
+    total = linhas[0][-1] if linhas else 0
+    
+    return [linha[:-1] for linha in linhas], proximo, anterior, total
@@ -0,0 +1,231 @@
+"""
+Migrações versionadas do banco de dados
+Cada migração roda uma única vez (controle na tabela SCHEMA_VERSION)
+e o conjunto é verificado uma única vez por processo
+"""
+import threading
+from db.connection import get_db_cursor, execute_query
+
+# Controle por processo: após a primeira execução, nada mais é feito
+_lock = threading.Lock()
+_executado = False
+
+
+def _tabela_existe(tabela):
+    """Verifica no catálogo se a tabela existe"""
+    result = execute_query(
+        "SELECT COUNT(*) FROM RDB$RELATIONS WHERE RDB$RELATION_NAME = ?",
+        (tabela,), fetch_one=True
+    )
+    return bool(result and result[0])
+
+
+def _coluna_existe(tabela, coluna):
+    """Verifica no catálogo se a coluna existe na tabela"""
+    result = execute_query(
+        "SELECT COUNT(*) FROM RDB$RELATION_FIELDS WHERE RDB$RELATION_NAME = ? AND RDB$FIELD_NAME = ?",
+        (tabela, coluna), fetch_one=True
+    )
+    return bool(result and result[0])
+
+
+def _indice_existe(indice):
+    """Verifica no catálogo se o índice existe"""
+    result = execute_query(
+        "SELECT COUNT(*) FROM RDB$INDICES WHERE RDB$INDEX_NAME = ?",
+        (indice,), fetch_one=True
+    )
+    return bool(result and result[0])
+
+
+def _criar_indice(indice, tabela, colunas, descendente=False):
+    """Cria índice se ainda não existir"""
+    if _indice_existe(indice):
+        return
+    
+    tipo = "DESCENDING " if descendente else ""
+    with get_db_cursor(commit=True) as cursor:
+        cursor.execute(f"CREATE {tipo}INDEX {indice} ON {tabela} ({', '.join(colunas)})")
+    print(f"✅ Índice {indice} criado")
+
+
+# ==================== MIGRAÇÕES ====================
+
+def _m001_tabelas_iniciais():
+    """Cria as tabelas do sistema (com perfis e permissões padrão)"""
+    from db.models import Cliente, Produto, Perfil, Usuario, Permissao, LogAuditoria
+    
+    # Ordem importa (foreign keys)
+    for model in (Cliente, Produto, Perfil, Usuario, Permissao, LogAuditoria):
+        if not _tabela_existe(model.TABLE_NAME):
+            model.criar_tabela()
+
+
+def _m002_telefones_clientes():
+    """Adiciona TELEFONE1/TELEFONE2 em bancos antigos de CLIENTES"""
+    from db.models import Cliente
+    Cliente.migrar_telefones()
+
+
+def _m003_sequencias():
+    """Cria as sequences de ID e sincroniza com o MAX(ID) de cada tabela"""
+    from db.models import Cliente, Produto, Usuario, Permissao, LogAuditoria
+    
+    for model in (Cliente, Produto, Usuario, Permissao, LogAuditoria):
+        model.criar_sequencia()
+
+
+def _m004_usuario_admin():
+    """Cria o usuário administrador padrão se não houver nenhum usuário"""
+    from db.models import Usuario, Perfil
+    
+    if Usuario.count_all() == 0:
+        Usuario.criar("Administrador", "admin@sistema.com", "admin123", Perfil.ADMINISTRADOR)
+        print("✅ Usuário admin@sistema.com criado")
+
+
+def _m005_indices_paginacao():
+    """
+    Índice (NOME, ID) usado pela paginação keyset de USUARIOS
+    CLIENTES e PRODUTOS paginam por (NOME_BUSCA, ID), criado na migração 6
+    """
+    _criar_indice("IDX_USUARIOS_NOME_ID", "USUARIOS", ("NOME", "ID"))
+
+
+def _m006_nome_busca():
+    """
+    Coluna NOME_BUSCA (maiúsculas, sem acentos) em CLIENTES e PRODUTOS
+    Cria a coluna, preenche os registros existentes e indexa (NOME_BUSCA, ID)
+    """
+    from db.models import Cliente, Produto
+    from db.busca import normalizar
+    
+    for model in (Cliente, Produto):
+        tabela = model.TABLE_NAME
+        
+        if not _coluna_existe(tabela, "NOME_BUSCA"):
+            with get_db_cursor(commit=True) as cursor:
+                cursor.execute(f"ALTER TABLE {tabela} ADD NOME_BUSCA VARCHAR(100)")
+            print(f"✅ Campo {tabela}.NOME_BUSCA adicionado")
+        
+        # Preenche em lotes por ID (cada lote confirmado: pode ser retomado)
+        ultimo, total = 0, 0
+        while True:
+            lote = execute_query(
+                f"SELECT ID, NOME FROM {tabela} WHERE ID > ? ORDER BY ID ROWS 1 TO 1000",
+                (ultimo,)
+            )
+            if not lote:
+                break
+            
+            total += model.bulk_update(
+                [(record_id, normalizar(nome)) for record_id, nome in lote],
+                colunas=("NOME_BUSCA",)
+            )
+            ultimo = lote[-1][0]
+        
+        if total:
+            print(f"✅ {total} registro(s) de {tabela} normalizados")
+        
+        _criar_indice(f"IDX_{tabela}_NOME_BUSCA", tabela, ("NOME_BUSCA", "ID"))
+
+
+def _m007_indices_auditoria():
+    """
+    Índices decrescentes do LOG_AUDITORIA para as consultas "mais recentes"
+    (por usuário, por módulo e geral), que leem só as primeiras entradas do índice
+    """
+    _criar_indice("IDX_LOG_AUDITORIA_USUARIO_DATA", "LOG_AUDITORIA", ("USUARIO_ID", "DATA_HORA"), descendente=True)
+    _criar_indice("IDX_LOG_AUDITORIA_MODULO_DATA", "LOG_AUDITORIA", ("MODULO", "DATA_HORA"), descendente=True)
+    _criar_indice("IDX_LOG_AUDITORIA_DATA_ID", "LOG_AUDITORIA", ("DATA_HORA", "ID"), descendente=True)
+
+
+def _m008_permissoes_auditoria():
+    """Permissões do módulo AUDITORIA para o perfil Administrador"""
+    from db.models import Perfil, Permissao
+    
+    for acao in ("VISUALIZAR", "EXPORTAR"):
+        if not Permissao.verificar_permissao(Perfil.ADMINISTRADOR, "AUDITORIA", acao):
+            Permissao.adicionar_permissao(Perfil.ADMINISTRADOR, "AUDITORIA", acao)
+
+
+# Ordem de aplicação: (versão, descrição, função)
+# Nunca alterar/renumerar migrações já publicadas; apenas acrescentar
+MIGRACOES = [
+    (1, "Tabelas iniciais", _m001_tabelas_iniciais),
+    (2, "Telefones de clientes", _m002_telefones_clientes),
+    (3, "Sequences de IDs", _m003_sequencias),
+    (4, "Usuário administrador padrão", _m004_usuario_admin),
+    (5, "Índices de paginação por chave", _m005_indices_paginacao),
+    (6, "Busca por nome normalizado", _m006_nome_busca),
+    (7, "Índices do log de auditoria", _m007_indices_auditoria),
+    (8, "Permissões de auditoria", _m008_permissoes_auditoria),
+]
+
+
+# ==================== EXECUÇÃO ====================
+
+def _criar_tabela_versao():
+    """Cria SCHEMA_VERSION se ainda não existir"""
+    if _tabela_existe("SCHEMA_VERSION"):
+        return
+    
+    with get_db_cursor(commit=True) as cursor:
+        cursor.execute("""
+            CREATE TABLE SCHEMA_VERSION (
+                VERSAO INTEGER NOT NULL PRIMARY KEY,
+                DESCRICAO VARCHAR(200),
+                DATA_APLICACAO TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+    print("✅ Tabela SCHEMA_VERSION criada")
+
+
+def versao_atual():
+    """Retorna a maior versão de migração já aplicada no banco"""
+    result = execute_query("SELECT MAX(VERSAO) FROM SCHEMA_VERSION", fetch_one=True)
+    return result[0] if result and result[0] else 0
+
+
+def executar_migracoes():
+    """
+    Aplica as migrações pendentes (uma vez por processo)
+    
+    Chamadas seguintes retornam imediatamente, sem nenhuma consulta.
+    As migrações são idempotentes: se outro processo aplicar a mesma
+    versão ao mesmo tempo, nada é duplicado.
+    
+    Returns:
+        int: Quantidade de migrações aplicadas nesta chamada
+    """
+    global _executado
+    
+    if _executado:
+        return 0
+    
+    with _lock:
+        if _executado:
+            return 0
+        
+        _criar_tabela_versao()
+        atual = versao_atual()
+        aplicadas = 0
+        
+        for versao, descricao, migracao in MIGRACOES:
+            if versao <= atual:
+                continue
+            
+            print(f"🔧 Migração {versao}: {descricao}")
+            migracao()
+            
+            execute_query(
+                "UPDATE OR INSERT INTO SCHEMA_VERSION (VERSAO, DESCRICAO) VALUES (?, ?) MATCHING (VERSAO)",
+                (versao, descricao), commit=True
+            )
+            aplicadas += 1
+        
+        if aplicadas:
+            print(f"✅ Banco atualizado para a versão {MIGRACOES[-1][0]}")
+        
+        _executado = True
+        return aplicadas
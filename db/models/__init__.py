@@ -40,10 +40,23 @@ def criar_todas_tabelas():
         print(f"❌ Erro ao criar tabelas: {e}")
         return False
 
+def iniciar_indices_busca():
+    """
+    Constrói em segundo plano os índices de busca "contém" em memória
+    Só tem efeito com BUSCA_INDICE_ATIVO (ver db/trigramas.py)
+    """
+    from db import trigramas
+    trigramas.iniciar(Cliente, Produto)
+
 def migrar_tabelas():
-    """Executa migrações necessárias"""
+    """
+    Executa migrações pendentes
+    Ver db/migracoes.py (versionadas, uma vez por processo)
+    """
+    from db.migracoes import executar_migracoes
+    
     try:
-        Cliente.migrar_telefones()
+        executar_migracoes()
         print("✅ Migrações executadas")
         return True
     except Exception as e:
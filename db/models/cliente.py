@@ -2,11 +2,23 @@
 Model de Cliente
 Gerencia operações CRUD da tabela CLIENTES
 """
+from collections import namedtuple
 from db.base import BaseModel
-from db.connection import get_db_cursor, execute_query
+from db.connection import get_db_cursor, execute_query, iter_query
+from db.busca import normalizar, sql_sem_formatacao
+
+# Linha de cliente lida do banco (cliente.nome, cliente.email, ...)
+ClienteLinha = namedtuple("ClienteLinha", "id nome email telefone1 telefone2")
+
 
 class Cliente(BaseModel):
     TABLE_NAME = "CLIENTES"
+    COLUNAS = ("NOME", "EMAIL", "TELEFONE1", "TELEFONE2")
+    CAMPOS = ("ID", "NOME", "EMAIL", "TELEFONE1", "TELEFONE2")
+    LINHA = ClienteLinha
+    COLUNAS_BUSCA = {"NOME_BUSCA": "NOME"}
+    CAMPOS_INDICE = ("NOME", "EMAIL", "TELEFONE1", "TELEFONE2")
+    CAMPOS_TELEFONE = ("TELEFONE1", "TELEFONE2")
     
     @classmethod
     def criar_tabela(cls):
@@ -19,7 +31,8 @@ class Cliente(BaseModel):
                         NOME VARCHAR(100) NOT NULL,
                         EMAIL VARCHAR(100),
                         TELEFONE1 VARCHAR(20),
-                        TELEFONE2 VARCHAR(20)
+                        TELEFONE2 VARCHAR(20),
+                        NOME_BUSCA VARCHAR(100)
                     )
                 """)
                 print("✅ Tabela CLIENTES criada")
@@ -30,62 +43,70 @@ class Cliente(BaseModel):
     def migrar_telefones(cls):
         """Adiciona campos de telefone se não existirem"""
         with get_db_cursor(commit=True) as cursor:
-            try:
-                cursor.execute("ALTER TABLE CLIENTES ADD TELEFONE1 VARCHAR(20)")
-                print("✅ Campo TELEFONE1 adicionado")
-            except:
-                pass
-            
-            try:
-                cursor.execute("ALTER TABLE CLIENTES ADD TELEFONE2 VARCHAR(20)")
-                print("✅ Campo TELEFONE2 adicionado")
-            except:
-                pass
+            for campo in ("TELEFONE1", "TELEFONE2"):
+                cursor.execute(
+                    "SELECT COUNT(*) FROM RDB$RELATION_FIELDS WHERE RDB$RELATION_NAME = 'CLIENTES' AND RDB$FIELD_NAME = ?",
+                    (campo,)
+                )
+                if not cursor.fetchone()[0]:
+                    cursor.execute(f"ALTER TABLE CLIENTES ADD {campo} VARCHAR(20)")
+                    print(f"✅ Campo {campo} adicionado")
     
     @classmethod
     def criar(cls, nome, email, telefone1=None, telefone2=None):
         """Cria novo cliente"""
-        cliente_id = cls._get_next_id()
-        
-        with get_db_cursor(commit=True) as cursor:
-            cursor.execute("""
-                INSERT INTO CLIENTES (ID, NOME, EMAIL, TELEFONE1, TELEFONE2)
-                VALUES (?, ?, ?, ?, ?)
-            """, (cliente_id, nome, email, telefone1, telefone2))
-        
-        return cliente_id
+        return cls._inserir({
+            'NOME': nome,
+            'EMAIL': email,
+            'TELEFONE1': telefone1,
+            'TELEFONE2': telefone2
+        })
     
     @classmethod
     def atualizar(cls, cliente_id, nome, email, telefone1=None, telefone2=None):
         """Atualiza cliente existente"""
         sql = """
             UPDATE CLIENTES 
-            SET NOME = ?, EMAIL = ?, TELEFONE1 = ?, TELEFONE2 = ?
+            SET NOME = ?, NOME_BUSCA = ?, EMAIL = ?, TELEFONE1 = ?, TELEFONE2 = ?
             WHERE ID = ?
         """
-        execute_query(sql, (nome, email, telefone1, telefone2, cliente_id), commit=True)
+        params = (nome, normalizar(nome), email, telefone1, telefone2, cliente_id)
+        execute_query(sql, params, commit=True)
+        cls._registrar_alteracao(cliente_id)
+    
+    @classmethod
+    def _filtro_nome(cls, busca):
+        """
+        Filtro por início do nome, sem diferenciar acentos/maiúsculas
+        STARTING WITH na coluna normalizada usa IDX_CLIENTES_NOME_BUSCA
+        """
+        return "NOME_BUSCA STARTING WITH ?", (normalizar(busca) or "",)
     
     @classmethod
     def buscar(cls, busca="", tipo_busca="nome", limit=10, offset=0):
         """
-        Busca clientes por nome ou código
+        Busca clientes por nome (prefixo) ou código
         
         Args:
             busca: Termo de busca
             tipo_busca: "nome" ou "codigo"
-            limit: Registros por página
+            limit: Registros por página (None = todos)
             offset: Ponto de início
         """
         if tipo_busca == "nome":
-            sql = """
+            filtro, params = cls._filtro_nome(busca)
+            sql = f"""
                 SELECT ID, NOME, EMAIL, TELEFONE1, TELEFONE2
                 FROM CLIENTES
-                WHERE UPPER(NOME) LIKE UPPER(?)
-                ORDER BY NOME
-                ROWS ? TO ?
+                WHERE {filtro}
+                ORDER BY NOME_BUSCA, ID
             """
-            params = (f'%{busca}%', offset + 1, offset + limit)
-            return execute_query(sql, params)
+            
+            if limit is not None:
+                sql += " ROWS ? TO ?"
+                params += (offset + 1, offset + limit)
+            
+            return execute_query(sql, params, tipo_linha=ClienteLinha)
         
         else:  # busca por código
             if not busca:
@@ -102,17 +123,122 @@ class Cliente(BaseModel):
                 return []
     
     @classmethod
-    def contar(cls, busca="", tipo_busca="nome"):
-        """Conta clientes conforme filtro"""
+    def buscar_pagina(cls, busca="", limit=10, cursor=None, com_total=False):
+        """
+        Busca clientes por nome (prefixo) com paginação keyset (ordem NOME_BUSCA, ID)
+        Custo constante em qualquer página (índice IDX_CLIENTES_NOME_BUSCA)
+        
+        Args:
+            busca: Termo de busca
+            limit: Registros por página
+            cursor: Cursor opaco da página anterior (None = primeira página)
+        
+        Returns:
+            tuple: (clientes, proximo_cursor, cursor_anterior)
+                   Com com_total=True: (..., total); no mesmo SELECT só na primeira página
+        """
+        filtro, params = cls._filtro_nome(busca)
+        sql = f"""
+            SELECT ID, NOME, EMAIL, TELEFONE1, TELEFONE2, NOME_BUSCA
+            FROM CLIENTES
+            WHERE {filtro}
+        """
+        return cls._paginar(sql, params, ("NOME_BUSCA", "ID"), (5, 0), limit, cursor, com_total)
+    
+    @classmethod
+    def _filtro_contem(cls, busca):
+        """
+        Filtro "contém" em nome, email e telefones (varre a tabela)
+        Telefones também sem formatação, como no índice de trigramas
+        """
+        termo = normalizar(busca) or ""
+        condicoes = ["NOME_BUSCA CONTAINING ?", "EMAIL CONTAINING ?"]
+        for campo in cls.CAMPOS_TELEFONE:
+            condicoes += [f"{campo} CONTAINING ?", f"{sql_sem_formatacao(campo)} CONTAINING ?"]
+        return f"({' OR '.join(condicoes)})", (termo,) * len(condicoes)
+    
+    @classmethod
+    def buscar_contendo(cls, busca="", limit=10, cursor=None, com_total=False):
+        """
+        Busca clientes cujo nome, email ou telefone contém o termo
+        Usa o índice de trigramas em memória quando disponível (IDs ordenados
+        por relevância e lidos pela chave primária); senão consulta o banco
+        
+        Returns:
+            tuple: (clientes, proximo_cursor, cursor_anterior)
+                   Com com_total=True: (..., total); no mesmo SELECT só na primeira página
+        """
+        pagina = cls._pagina_indice(busca, limit, cursor, com_total)
+        if pagina is not None:
+            return pagina
+        
+        filtro, params = cls._filtro_contem(busca)
+        sql = f"""
+            SELECT ID, NOME, EMAIL, TELEFONE1, TELEFONE2, NOME_BUSCA
+            FROM CLIENTES
+            WHERE {filtro}
+        """
+        return cls._paginar(sql, params, ("NOME_BUSCA", "ID"), (5, 0), limit, cursor, com_total)
+    
+    @classmethod
+    def contar_contendo(cls, busca="", limite=None):
+        """Conta clientes cujo nome, email ou telefone contém o termo (ver contar)"""
+        ids = cls._ids_indice(busca)
+        if ids is not None:
+            return len(ids) if limite is None else min(len(ids), limite + 1)
+        
+        filtro, params = cls._filtro_contem(busca)
+        return cls._contar(filtro, params, limite)
+    
+    @classmethod
+    def iter_buscar(cls, busca="", batch_size=500):
+        """
+        Percorre os clientes filtrados por nome em lotes (gerador)
+        Para exportações e rotinas em lote sem carregar tudo na memória
+        """
+        filtro, params = cls._filtro_nome(busca)
+        sql = f"""
+            SELECT ID, NOME, EMAIL, TELEFONE1, TELEFONE2
+            FROM CLIENTES
+            WHERE {filtro}
+            ORDER BY NOME_BUSCA, ID
+        """
+        return iter_query(sql, params, batch_size=batch_size, tipo_linha=ClienteLinha)
+    
+    @classmethod
+    def iter_contendo(cls, busca="", batch_size=500):
+        """
+        Percorre os clientes da busca "contém" em lotes (gerador)
+        Mesmo caminho da grade: índice de trigramas ou, sem ele, o banco
+        """
+        linhas = cls._iter_indice(busca, batch_size)
+        if linhas is not None:
+            return linhas
+        
+        filtro, params = cls._filtro_contem(busca)
+        sql = f"""
+            SELECT ID, NOME, EMAIL, TELEFONE1, TELEFONE2
+            FROM CLIENTES
+            WHERE {filtro}
+            ORDER BY NOME_BUSCA, ID
+        """
+        return iter_query(sql, params, batch_size=batch_size, tipo_linha=ClienteLinha)
+    
+    @classmethod
+    def contar(cls, busca="", tipo_busca="nome", limite=None):
+        """
+        Conta clientes conforme filtro
+        
+        Args:
+            limite: Contagem limitada (retorna no máximo limite + 1)
+        """
         if tipo_busca == "nome":
-            sql = "SELECT COUNT(*) FROM CLIENTES WHERE UPPER(NOME) LIKE UPPER(?)"
-            params = (f'%{busca}%',)
-            result = execute_query(sql, params, fetch_one=True)
-            return result[0] if result else 0
+            filtro, params = cls._filtro_nome(busca)
+            return cls._contar(filtro, params, limite)
         
         else:  # código
             if not busca:
-                return cls.count_all()
+                return cls._contar(limite=limite)
             
             try:
                 int(busca)
@@ -2,12 +2,20 @@
 Model de Log de Auditoria
 Registra ações dos usuários
 """
+from collections import namedtuple
 from db.base import BaseModel
-from db.connection import get_db_cursor, execute_query
-from datetime import datetime
+from db.connection import get_db_cursor, execute_query, iter_query, transaction
+from datetime import datetime, timedelta
+from config.empresa import AUDITORIA_RETENCAO_DIAS
+
+# Linha do log com o nome do usuário (listagens e exportação)
+LogLinha = namedtuple("LogLinha", "id usuario_id usuario_nome acao modulo detalhes data_hora")
+
 
 class LogAuditoria(BaseModel):
     TABLE_NAME = "LOG_AUDITORIA"
+    COLUNAS = ("USUARIO_ID", "ACAO", "MODULO", "DETALHES")
+    CAMPOS = ("ID", "USUARIO_ID", "ACAO", "MODULO", "DETALHES", "DATA_HORA")
     
     @classmethod
     def criar_tabela(cls):
@@ -32,15 +40,25 @@ class LogAuditoria(BaseModel):
     @classmethod
     def registrar(cls, usuario_id, acao, modulo, detalhes=""):
         """Registra ação no log"""
-        log_id = cls._get_next_id()
-        
-        with get_db_cursor(commit=True) as cursor:
-            cursor.execute("""
-                INSERT INTO LOG_AUDITORIA (ID, USUARIO_ID, ACAO, MODULO, DETALHES)
-                VALUES (?, ?, ?, ?, ?)
-            """, (log_id, usuario_id, acao, modulo, detalhes))
+        return cls._inserir({
+            'USUARIO_ID': usuario_id,
+            'ACAO': acao,
+            'MODULO': modulo,
+            'DETALHES': detalhes
+        })
+    
+    @classmethod
+    def registrar_lote(cls, eventos):
+        """
+        Grava vários eventos de uma vez (usado por db/auditoria.py)
         
-        return log_id
+        Args:
+            eventos: Tuplas (USUARIO_ID, ACAO, MODULO, DETALHES, DATA_HORA)
+        """
+        return cls.bulk_insert(
+            eventos, batch_size=len(eventos) or 1,
+            colunas=("USUARIO_ID", "ACAO", "MODULO", "DETALHES", "DATA_HORA")
+        )
     
     @classmethod
     def listar_por_usuario(cls, usuario_id, limit=50):
@@ -49,7 +67,7 @@ class LogAuditoria(BaseModel):
             SELECT ID, ACAO, MODULO, DETALHES, DATA_HORA
             FROM LOG_AUDITORIA
             WHERE USUARIO_ID = ?
-            ORDER BY DATA_HORA DESC
+            ORDER BY USUARIO_ID DESC, DATA_HORA DESC
             ROWS 1 TO ?
         """
         return execute_query(sql, (usuario_id, limit))
@@ -62,11 +80,141 @@ class LogAuditoria(BaseModel):
             FROM LOG_AUDITORIA L
             LEFT JOIN USUARIOS U ON L.USUARIO_ID = U.ID
             WHERE L.MODULO = ?
-            ORDER BY L.DATA_HORA DESC
+            ORDER BY L.MODULO DESC, L.DATA_HORA DESC
             ROWS 1 TO ?
         """
         return execute_query(sql, (modulo, limit))
     
+    @staticmethod
+    def _filtro(data_inicio=None, data_fim=None, usuario_id=None, modulo=None, alias=""):
+        """
+        WHERE dos filtros do log
+        
+        Args:
+            data_inicio: datetime inicial (inclusive) ou None
+            data_fim: datetime final (exclusive) ou None
+            alias: Prefixo das colunas (ex: "L.")
+        
+        Returns:
+            tuple: (sql, params)
+        """
+        condicoes, params = ["1 = 1"], ()
+        
+        if data_inicio is not None:
+            condicoes.append(f"{alias}DATA_HORA >= ?")
+            params += (data_inicio,)
+        
+        if data_fim is not None:
+            condicoes.append(f"{alias}DATA_HORA < ?")
+            params += (data_fim,)
+        
+        if usuario_id is not None:
+            condicoes.append(f"{alias}USUARIO_ID = ?")
+            params += (usuario_id,)
+        
+        if modulo:
+            condicoes.append(f"{alias}MODULO = ?")
+            params += (modulo,)
+        
+        return " AND ".join(condicoes), params
+    
+    @classmethod
+    def _tabelas_periodo(cls, data_inicio=None, data_fim=None):
+        """
+        Tabelas com logs do período: LOG_AUDITORIA e, se o período começa
+        antes da retenção (AUDITORIA_RETENCAO_DIAS), as de arquivo dos meses
+        do período (LOG_AUDITORIA_AAAAMM)
+        """
+        tabelas = ["LOG_AUDITORIA"]
+        corte = datetime.now() - timedelta(days=AUDITORIA_RETENCAO_DIAS)
+        if data_inicio is not None and data_inicio >= corte:
+            return tabelas
+        
+        primeira = cls.tabela_arquivo(data_inicio) if data_inicio is not None else ""
+        ultima = cls.tabela_arquivo(data_fim) if data_fim is not None else None
+        for tabela in cls.tabelas_arquivo():
+            if tabela >= primeira and (ultima is None or tabela <= ultima):
+                tabelas.append(tabela)
+        return tabelas
+    
+    @classmethod
+    def _origem(cls, data_inicio=None, data_fim=None, usuario_id=None, modulo=None):
+        """
+        FROM do log (alias L) com os filtros
+        
+        Dentro da retenção é só LOG_AUDITORIA. Além dela, é uma tabela
+        derivada com UNION ALL das tabelas de arquivo do período, cada
+        SELECT já filtrado (usa o índice de cada tabela). Os IDs vêm do
+        mesmo generator, então (DATA_HORA, ID) continua único.
+        
+        Returns:
+            tuple: (origem, filtro, params) para "FROM {origem} ... WHERE {filtro}"
+        """
+        tabelas = cls._tabelas_periodo(data_inicio, data_fim)
+        if len(tabelas) == 1:
+            filtro, params = cls._filtro(data_inicio, data_fim, usuario_id, modulo, alias="L.")
+            return "LOG_AUDITORIA L", filtro, params
+        
+        filtro, params = cls._filtro(data_inicio, data_fim, usuario_id, modulo)
+        colunas = ", ".join(cls.CAMPOS)
+        uniao = " UNION ALL ".join(
+            f"SELECT {colunas} FROM {tabela} WHERE {filtro}" for tabela in tabelas
+        )
+        return f"({uniao}) L", "1 = 1", params * len(tabelas)
+    
+    @classmethod
+    def buscar_pagina(cls, data_inicio=None, data_fim=None, usuario_id=None, modulo=None,
+                      limit=50, cursor=None):
+        """
+        Página do log, mais recentes primeiro (paginação keyset por DATA_HORA, ID)
+        Usa o índice decrescente (DATA_HORA, ID): qualquer página custa o mesmo
+        Períodos além da retenção incluem as tabelas de arquivo
+        
+        Returns:
+            tuple: (linhas LogLinha, proximo_cursor, cursor_anterior)
+        """
+        origem, filtro, params = cls._origem(data_inicio, data_fim, usuario_id, modulo)
+        sql = f"""
+            SELECT L.ID, L.USUARIO_ID, U.NOME as USUARIO_NOME,
+                   L.ACAO, L.MODULO, L.DETALHES, L.DATA_HORA
+            FROM {origem}
+            LEFT JOIN USUARIOS U ON L.USUARIO_ID = U.ID
+            WHERE {filtro}
+        """
+        return cls._paginar(
+            sql, params, ("L.DATA_HORA", "L.ID"), (6, 0), limit, cursor,
+            tipo_linha=LogLinha, desc=True
+        )
+    
+    @classmethod
+    def contar(cls, data_inicio=None, data_fim=None, usuario_id=None, modulo=None, limite=None):
+        """Conta logs dos filtros (com `limite`, para de contar em limite + 1)"""
+        origem, filtro, params = cls._origem(data_inicio, data_fim, usuario_id, modulo)
+        return cls._contar(filtro, params, limite, origem=origem)
+    
+    @classmethod
+    def iter_periodo(cls, data_inicio=None, data_fim=None, batch_size=500, usuario_id=None, modulo=None):
+        """
+        Percorre os logs de um período em ordem cronológica (gerador)
+        Um único cursor no servidor, lido em lotes (memória constante)
+        Períodos além da retenção incluem as tabelas de arquivo
+        
+        Args:
+            data_inicio: datetime inicial (inclusive) ou None
+            data_fim: datetime final (exclusive) ou None
+            usuario_id, modulo: Filtros opcionais
+        """
+        origem, filtro, params = cls._origem(data_inicio, data_fim, usuario_id, modulo)
+        sql = f"""
+            SELECT L.ID, L.USUARIO_ID, U.NOME as USUARIO_NOME,
+                   L.ACAO, L.MODULO, L.DETALHES, L.DATA_HORA
+            FROM {origem}
+            LEFT JOIN USUARIOS U ON L.USUARIO_ID = U.ID
+            WHERE {filtro}
+            ORDER BY L.DATA_HORA, L.ID
+        """
+        return iter_query(sql, params, batch_size=batch_size, tipo_linha=LogLinha)
+    
     @classmethod
     def listar_recentes(cls, limit=100):
         """Lista logs mais recentes (todos os usuários)"""
@@ -75,7 +223,111 @@ class LogAuditoria(BaseModel):
                    L.ACAO, L.MODULO, L.DETALHES, L.DATA_HORA
             FROM LOG_AUDITORIA L
             LEFT JOIN USUARIOS U ON L.USUARIO_ID = U.ID
-            ORDER BY L.DATA_HORA DESC
+            ORDER BY L.DATA_HORA DESC, L.ID DESC
             ROWS 1 TO ?
         """
-        return execute_query(sql, (limit,))
+        return execute_query(sql, (limit,), tipo_linha=LogLinha)
+    
+    # ==================== ARQUIVAMENTO ====================
+    
+    @staticmethod
+    def tabela_arquivo(data_hora):
+        """Nome da tabela de arquivo do mês (ex: LOG_AUDITORIA_202501)"""
+        return f"LOG_AUDITORIA_{data_hora.year:04d}{data_hora.month:02d}"
+    
+    @classmethod
+    def _criar_tabela_arquivo(cls, tabela):
+        """Cria a tabela de arquivo do mês (mesmas colunas, sem FK) se não existir"""
+        result = execute_query(
+            "SELECT COUNT(*) FROM RDB$RELATIONS WHERE RDB$RELATION_NAME = ?",
+            (tabela,), fetch_one=True
+        )
+        if result and result[0]:
+            return
+        
+        with get_db_cursor(commit=True) as cursor:
+            cursor.execute(f"""
+                CREATE TABLE {tabela} (
+                    ID INTEGER NOT NULL PRIMARY KEY,
+                    USUARIO_ID INTEGER,
+                    ACAO VARCHAR(100),
+                    MODULO VARCHAR(50),
+                    DETALHES VARCHAR(500),
+                    DATA_HORA TIMESTAMP
+                )
+            """)
+        print(f"✅ Tabela {tabela} criada")
+    
+    @classmethod
+    def tabelas_arquivo(cls):
+        """Tabelas de arquivo existentes, da mais antiga para a mais nova"""
+        sql = """
+            SELECT TRIM(RDB$RELATION_NAME) FROM RDB$RELATIONS
+            WHERE RDB$RELATION_NAME STARTING WITH 'LOG_AUDITORIA_'
+            ORDER BY 1
+        """
+        return [linha[0] for linha in execute_query(sql) if linha[0][14:].isdigit()]
+    
+    @classmethod
+    def arquivar(cls, dias=AUDITORIA_RETENCAO_DIAS, lote=5000):
+        """
+        Move os logs mais antigos que `dias` para tabelas mensais de arquivo
+        
+        Cada lote (até `lote` linhas de um mês, em ordem de DATA_HORA, ID)
+        é copiado com INSERT ... SELECT e apagado na mesma transação:
+        pode ser interrompido e retomado sem perder nem duplicar linhas.
+        
+        Returns:
+            int: Quantidade de linhas arquivadas
+        """
+        limite = datetime.now() - timedelta(days=dias)
+        colunas = ", ".join(cls.CAMPOS)
+        total = 0
+        
+        while True:
+            result = execute_query(
+                "SELECT MIN(DATA_HORA) FROM LOG_AUDITORIA WHERE DATA_HORA < ?",
+                (limite,), fetch_one=True
+            )
+            if not result or result[0] is None:
+                break
+            
+            # Mês da linha mais antiga: [início, fim) limitado à data de corte
+            inicio = result[0].replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            proximo = (inicio + timedelta(days=32)).replace(day=1)
+            fim = min(proximo, limite)
+            tabela = cls.tabela_arquivo(inicio)
+            cls._criar_tabela_arquivo(tabela)
+            
+            while True:
+                filtro = "DATA_HORA >= ? AND DATA_HORA < ?"
+                params = (inicio, fim)
+                
+                # Última chave do lote; sem ela, o resto do mês cabe num lote só
+                ultima = execute_query(
+                    f"SELECT DATA_HORA, ID FROM LOG_AUDITORIA WHERE {filtro} "
+                    f"ORDER BY DATA_HORA, ID ROWS ? TO ?",
+                    params + (lote, lote), fetch_one=True
+                )
+                if ultima:
+                    filtro += " AND (DATA_HORA < ? OR (DATA_HORA = ? AND ID <= ?))"
+                    params += (ultima[0], ultima[0], ultima[1])
+                
+                with transaction():
+                    with get_db_cursor() as cursor:
+                        cursor.execute(
+                            f"INSERT INTO {tabela} ({colunas}) "
+                            f"SELECT {colunas} FROM LOG_AUDITORIA WHERE {filtro}",
+                            params
+                        )
+                        cursor.execute(f"DELETE FROM LOG_AUDITORIA WHERE {filtro}", params)
+                        movidas = cursor.rowcount
+                    cls._registrar_alteracao()
+                
+                total += max(movidas, 0)
+                if not ultima:
+                    break
+        
+        if total:
+            print(f"✅ {total} registro(s) de auditoria arquivados")
+        return total
@@ -2,11 +2,18 @@
 Model de Perfil
 Gerencia perfis de usuário (Visualizador, Operador, Admin)
 """
+from collections import namedtuple
 from db.base import BaseModel
 from db.connection import get_db_cursor, execute_query
 
+# Linha de perfil lida do banco (perfil.nome, perfil.descricao)
+PerfilLinha = namedtuple("PerfilLinha", "id nome descricao")
+
+
 class Perfil(BaseModel):
     TABLE_NAME = "PERFIS"
+    COLUNAS = ("NOME", "DESCRICAO")
+    LINHA = PerfilLinha
     
     # Constantes de perfis
     VISUALIZADOR = 1
@@ -34,11 +41,10 @@ class Perfil(BaseModel):
                     (cls.ADMINISTRADOR, 'Administrador', 'Acesso total ao sistema')
                 ]
                 
-                for perfil_id, nome, descricao in perfis_padrao:
-                    cursor.execute(
-                        "INSERT INTO PERFIS (ID, NOME, DESCRICAO) VALUES (?, ?, ?)",
-                        (perfil_id, nome, descricao)
-                    )
+                cursor.executemany(
+                    "INSERT INTO PERFIS (ID, NOME, DESCRICAO) VALUES (?, ?, ?)",
+                    perfis_padrao
+                )
                 
                 print("✅ Tabela PERFIS criada com perfis padrão")
                 
@@ -49,10 +55,10 @@ class Perfil(BaseModel):
     def listar_todos(cls):
         """Lista todos os perfis"""
         sql = "SELECT ID, NOME, DESCRICAO FROM PERFIS ORDER BY ID"
-        return execute_query(sql)
+        return execute_query(sql, tipo_linha=PerfilLinha)
     
     @classmethod
     def obter_nome(cls, perfil_id):
         """Retorna nome do perfil"""
         perfil = cls.find_by_id(perfil_id)
-        return perfil[1] if perfil else "Desconhecido"
+        return perfil.nome if perfil else "Desconhecido"
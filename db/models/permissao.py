@@ -2,11 +2,20 @@
 Model de Permissão
 Gerencia permissões por perfil
 """
+import threading
 from db.base import BaseModel
 from db.connection import get_db_cursor, execute_query
 
 class Permissao(BaseModel):
     TABLE_NAME = "PERMISSOES"
+    COLUNAS = ("PERFIL_ID", "MODULO", "ACAO")
+    
+    # Matriz em memória compartilhada entre sessões:
+    # {perfil_id: frozenset({(MODULO, ACAO), ...})}
+    _matriz = None
+    _matriz_lock = threading.Lock()
+    _carga_lock = threading.Lock()  # Uma carga por vez
+    _matriz_geracao = 0  # Incrementada a cada invalidação
     
     @classmethod
     def criar_tabela(cls):
@@ -34,10 +43,7 @@ class Permissao(BaseModel):
     
     @classmethod
     def _inserir_permissoes_padrao(cls, cursor):
-        """Insere permissões padrão do sistema"""
-        
-        # Contador de ID
-        perm_id = 1
+        """Insere permissões padrão do sistema (um único executemany)"""
         
         # VISUALIZADOR (ID=1) - Apenas visualizar
         visualizador_perms = [
@@ -47,13 +53,6 @@ class Permissao(BaseModel):
             ('PRODUTOS', 'EXPORTAR'),
         ]
         
-        for modulo, acao in visualizador_perms:
-            cursor.execute(
-                "INSERT INTO PERMISSOES (ID, PERFIL_ID, MODULO, ACAO) VALUES (?, ?, ?, ?)",
-                (perm_id, 1, modulo, acao)
-            )
-            perm_id += 1
-        
         # OPERADOR (ID=2) - Visualizar + Criar + Editar
         operador_perms = [
             ('CLIENTES', 'VISUALIZAR'),
@@ -66,13 +65,6 @@ class Permissao(BaseModel):
             ('PRODUTOS', 'EXPORTAR'),
         ]
         
-        for modulo, acao in operador_perms:
-            cursor.execute(
-                "INSERT INTO PERMISSOES (ID, PERFIL_ID, MODULO, ACAO) VALUES (?, ?, ?, ?)",
-                (perm_id, 2, modulo, acao)
-            )
-            perm_id += 1
-        
         # ADMINISTRADOR (ID=3) - Todas as permissões
         admin_perms = [
             ('CLIENTES', 'VISUALIZAR'),
@@ -89,15 +81,22 @@ class Permissao(BaseModel):
             ('USUARIOS', 'CRIAR'),
             ('USUARIOS', 'EDITAR'),
             ('USUARIOS', 'DESATIVAR'),
+            ('AUDITORIA', 'VISUALIZAR'),
+            ('AUDITORIA', 'EXPORTAR'),
             ('CONFIGURACOES', 'EDITAR'),
         ]
         
-        for modulo, acao in admin_perms:
-            cursor.execute(
-                "INSERT INTO PERMISSOES (ID, PERFIL_ID, MODULO, ACAO) VALUES (?, ?, ?, ?)",
-                (perm_id, 3, modulo, acao)
-            )
-            perm_id += 1
+        permissoes = (
+            [(1, modulo, acao) for modulo, acao in visualizador_perms] +
+            [(2, modulo, acao) for modulo, acao in operador_perms] +
+            [(3, modulo, acao) for modulo, acao in admin_perms]
+        )
+        
+        # IDs sequenciais a partir de 1 (tabela recém-criada)
+        cursor.executemany(
+            "INSERT INTO PERMISSOES (ID, PERFIL_ID, MODULO, ACAO) VALUES (?, ?, ?, ?)",
+            [(perm_id, *permissao) for perm_id, permissao in enumerate(permissoes, start=1)]
+        )
     
     @classmethod
     def buscar_por_perfil(cls, perfil_id):
@@ -110,9 +109,59 @@ class Permissao(BaseModel):
         """
         return execute_query(sql, (perfil_id,))
     
+    @classmethod
+    def carregar_matriz(cls):
+        """
+        Carrega toda a tabela PERMISSOES para a memória (uma consulta)
+        Se a matriz for invalidada durante a leitura, o resultado é devolvido
+        mas não guardado (pode ser anterior à alteração)
+        """
+        geracao = cls._matriz_geracao
+        linhas = execute_query("SELECT PERFIL_ID, MODULO, ACAO FROM PERMISSOES")
+        
+        matriz = {}
+        for perfil_id, modulo, acao in linhas or []:
+            matriz.setdefault(perfil_id, set()).add((modulo, acao))
+        matriz = {perfil_id: frozenset(perms) for perfil_id, perms in matriz.items()}
+        
+        with cls._matriz_lock:
+            if cls._matriz_geracao == geracao:
+                cls._matriz = matriz
+        return matriz
+    
+    @classmethod
+    def invalidar_matriz(cls):
+        """Descarta a matriz em memória (recarregada no próximo uso)"""
+        with cls._matriz_lock:
+            cls._matriz_geracao += 1
+            cls._matriz = None
+    
+    @classmethod
+    def permissoes_do_perfil(cls, perfil_id):
+        """Retorna frozenset de (MODULO, ACAO) do perfil, a partir da matriz em memória"""
+        matriz = cls._matriz
+        if matriz is None:
+            with cls._carga_lock:
+                matriz = cls._matriz
+                if matriz is None:
+                    matriz = cls.carregar_matriz()
+        
+        return matriz.get(perfil_id, frozenset())
+    
+    @classmethod
+    def tem_permissao(cls, perfil_id, modulo, acao):
+        """Verifica permissão pela matriz em memória (sem acesso ao banco)"""
+        return (modulo, acao) in cls.permissoes_do_perfil(perfil_id)
+    
+    @classmethod
+    def _aplicar_alteracao(cls, record_id):
+        """Escrita confirmada em PERMISSOES invalida a matriz"""
+        super()._aplicar_alteracao(record_id)
+        cls.invalidar_matriz()
+    
     @classmethod
     def verificar_permissao(cls, perfil_id, modulo, acao):
-        """Verifica se perfil tem permissão específica"""
+        """Verifica se perfil tem permissão específica (consulta direta ao banco)"""
         sql = """
             SELECT COUNT(*) 
             FROM PERMISSOES 
@@ -124,18 +173,11 @@ class Permissao(BaseModel):
     @classmethod
     def adicionar_permissao(cls, perfil_id, modulo, acao):
         """Adiciona nova permissão a um perfil"""
-        perm_id = cls._get_next_id()
-        
-        with get_db_cursor(commit=True) as cursor:
-            cursor.execute(
-                "INSERT INTO PERMISSOES (ID, PERFIL_ID, MODULO, ACAO) VALUES (?, ?, ?, ?)",
-                (perm_id, perfil_id, modulo, acao)
-            )
-        
-        return perm_id
+        return cls._inserir({'PERFIL_ID': perfil_id, 'MODULO': modulo, 'ACAO': acao})
     
     @classmethod
     def remover_permissao(cls, perfil_id, modulo, acao):
         """Remove permissão de um perfil"""
         sql = "DELETE FROM PERMISSOES WHERE PERFIL_ID = ? AND MODULO = ? AND ACAO = ?"
         execute_query(sql, (perfil_id, modulo, acao), commit=True)
+        cls._registrar_alteracao()
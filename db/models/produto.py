@@ -2,11 +2,22 @@
 Model de Produto
 Gerencia operações CRUD da tabela PRODUTOS
 """
+from collections import namedtuple
 from db.base import BaseModel
-from db.connection import get_db_cursor, execute_query
+from db.connection import get_db_cursor, execute_query, iter_query
+from db.busca import normalizar
+
+# Linha de produto lida do banco (produto.nome, produto.preco)
+ProdutoLinha = namedtuple("ProdutoLinha", "id nome preco")
+
 
 class Produto(BaseModel):
     TABLE_NAME = "PRODUTOS"
+    COLUNAS = ("NOME", "PRECO")
+    CAMPOS = ("ID", "NOME", "PRECO")
+    LINHA = ProdutoLinha
+    COLUNAS_BUSCA = {"NOME_BUSCA": "NOME"}
+    CAMPOS_INDICE = ("NOME",)
     
     @classmethod
     def criar_tabela(cls):
@@ -17,7 +28,8 @@ class Produto(BaseModel):
                     CREATE TABLE PRODUTOS (
                         ID INTEGER NOT NULL PRIMARY KEY,
                         NOME VARCHAR(100) NOT NULL,
-                        PRECO DECIMAL(10,2) NOT NULL
+                        PRECO DECIMAL(10,2) NOT NULL,
+                        NOME_BUSCA VARCHAR(100)
                     )
                 """)
                 print("✅ Tabela PRODUTOS criada")
@@ -27,39 +39,41 @@ class Produto(BaseModel):
     @classmethod
     def criar(cls, nome, preco):
         """Cria novo produto"""
-        produto_id = cls._get_next_id()
-        
-        with get_db_cursor(commit=True) as cursor:
-            cursor.execute("""
-                INSERT INTO PRODUTOS (ID, NOME, PRECO)
-                VALUES (?, ?, ?)
-            """, (produto_id, nome, preco))
-        
-        return produto_id
+        return cls._inserir({'NOME': nome, 'PRECO': preco})
     
     @classmethod
     def atualizar(cls, produto_id, nome, preco):
         """Atualiza produto existente"""
         sql = """
             UPDATE PRODUTOS 
-            SET NOME = ?, PRECO = ?
+            SET NOME = ?, NOME_BUSCA = ?, PRECO = ?
             WHERE ID = ?
         """
-        execute_query(sql, (nome, preco, produto_id), commit=True)
+        execute_query(sql, (nome, normalizar(nome), preco, produto_id), commit=True)
+        cls._registrar_alteracao(produto_id)
+    
+    @classmethod
+    def _filtro_nome(cls, busca):
+        """Filtro por início do nome normalizado (usa IDX_PRODUTOS_NOME_BUSCA)"""
+        return "NOME_BUSCA STARTING WITH ?", (normalizar(busca) or "",)
     
     @classmethod
     def buscar(cls, busca="", tipo_busca="nome", limit=10, offset=0):
-        """Busca produtos por nome ou código"""
+        """Busca produtos por nome (prefixo) ou código (limit=None = todos)"""
         if tipo_busca == "nome":
-            sql = """
+            filtro, params = cls._filtro_nome(busca)
+            sql = f"""
                 SELECT ID, NOME, PRECO
                 FROM PRODUTOS
-                WHERE UPPER(NOME) LIKE UPPER(?)
-                ORDER BY NOME
-                ROWS ? TO ?
+                WHERE {filtro}
+                ORDER BY NOME_BUSCA, ID
             """
-            params = (f'%{busca}%', offset + 1, offset + limit)
-            return execute_query(sql, params)
+            
+            if limit is not None:
+                sql += " ROWS ? TO ?"
+                params += (offset + 1, offset + limit)
+            
+            return execute_query(sql, params, tipo_linha=ProdutoLinha)
         
         else:  # código
             if not busca:
@@ -73,16 +87,95 @@ class Produto(BaseModel):
                 return []
     
     @classmethod
-    def contar(cls, busca="", tipo_busca="nome"):
-        """Conta produtos conforme filtro"""
+    def buscar_pagina(cls, busca="", limit=10, cursor=None, com_total=False):
+        """
+        Busca produtos por nome (prefixo) com paginação keyset (ordem NOME_BUSCA, ID)
+        
+        Returns:
+            tuple: (produtos, proximo_cursor, cursor_anterior)
+                   Com com_total=True: (..., total); no mesmo SELECT só na primeira página
+        """
+        filtro, params = cls._filtro_nome(busca)
+        sql = f"""
+            SELECT ID, NOME, PRECO, NOME_BUSCA
+            FROM PRODUTOS
+            WHERE {filtro}
+        """
+        return cls._paginar(sql, params, ("NOME_BUSCA", "ID"), (3, 0), limit, cursor, com_total)
+    
+    @classmethod
+    def buscar_contendo(cls, busca="", limit=10, cursor=None, com_total=False):
+        """
+        Busca produtos cujo nome contém o termo
+        Usa o índice de trigramas em memória quando disponível
+        
+        Returns:
+            tuple: (produtos, proximo_cursor, cursor_anterior)
+                   Com com_total=True: (..., total); no mesmo SELECT só na primeira página
+        """
+        pagina = cls._pagina_indice(busca, limit, cursor, com_total)
+        if pagina is not None:
+            return pagina
+        
+        sql = """
+            SELECT ID, NOME, PRECO, NOME_BUSCA
+            FROM PRODUTOS
+            WHERE NOME_BUSCA CONTAINING ?
+        """
+        params = (normalizar(busca) or "",)
+        return cls._paginar(sql, params, ("NOME_BUSCA", "ID"), (3, 0), limit, cursor, com_total)
+    
+    @classmethod
+    def contar_contendo(cls, busca="", limite=None):
+        """Conta produtos cujo nome contém o termo (ver contar)"""
+        ids = cls._ids_indice(busca)
+        if ids is not None:
+            return len(ids) if limite is None else min(len(ids), limite + 1)
+        
+        return cls._contar("NOME_BUSCA CONTAINING ?", (normalizar(busca) or "",), limite)
+    
+    @classmethod
+    def iter_buscar(cls, busca="", batch_size=500):
+        """
+        Percorre os produtos filtrados por nome em lotes (gerador)
+        Para exportações e rotinas em lote sem carregar tudo na memória
+        """
+        filtro, params = cls._filtro_nome(busca)
+        sql = f"""
+            SELECT ID, NOME, PRECO
+            FROM PRODUTOS
+            WHERE {filtro}
+            ORDER BY NOME_BUSCA, ID
+        """
+        return iter_query(sql, params, batch_size=batch_size, tipo_linha=ProdutoLinha)
+    
+    @classmethod
+    def iter_contendo(cls, busca="", batch_size=500):
+        """
+        Percorre os produtos da busca "contém" em lotes (gerador)
+        Mesmo caminho da grade: índice de trigramas ou, sem ele, o banco
+        """
+        linhas = cls._iter_indice(busca, batch_size)
+        if linhas is not None:
+            return linhas
+        
+        sql = """
+            SELECT ID, NOME, PRECO
+            FROM PRODUTOS
+            WHERE NOME_BUSCA CONTAINING ?
+            ORDER BY NOME_BUSCA, ID
+        """
+        return iter_query(sql, (normalizar(busca) or "",), batch_size=batch_size, tipo_linha=ProdutoLinha)
+    
+    @classmethod
+    def contar(cls, busca="", tipo_busca="nome", limite=None):
+        """Conta produtos conforme filtro (limite: retorna no máximo limite + 1)"""
         if tipo_busca == "nome":
-            sql = "SELECT COUNT(*) FROM PRODUTOS WHERE UPPER(NOME) LIKE UPPER(?)"
-            params = (f'%{busca}%',)
-            result = execute_query(sql, params, fetch_one=True)
-            return result[0] if result else 0
+            filtro, params = cls._filtro_nome(busca)
+            return cls._contar(filtro, params, limite)
         else:
             if not busca:
-                return cls.count_all()
+                return cls._contar(limite=limite)
             try:
                 int(busca)
                 return 1 if cls.exists(int(busca)) else 0
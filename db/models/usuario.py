@@ -2,12 +2,25 @@
 Model de Usuario
 Gerencia usuários do sistema
 """
+from collections import namedtuple
 from db.base import BaseModel
 from db.connection import get_db_cursor, execute_query
 from auth.password import hash_password
 
+# Linhas lidas do banco (usuario.nome, usuario.perfil_id, ...)
+# O hash da senha só é lido no login (UsuarioAutenticacao)
+UsuarioLinha = namedtuple("UsuarioLinha", "id nome email perfil_id ativo")
+UsuarioListagem = namedtuple("UsuarioListagem", "id nome email perfil_id ativo perfil_nome")
+UsuarioAutenticacao = namedtuple(
+    "UsuarioAutenticacao", "id nome email senha_hash perfil_id ativo perfil_nome"
+)
+
+
 class Usuario(BaseModel):
     TABLE_NAME = "USUARIOS"
+    COLUNAS = ("NOME", "EMAIL", "SENHA_HASH", "PERFIL_ID", "ATIVO")
+    CAMPOS = ("ID", "NOME", "EMAIL", "PERFIL_ID", "ATIVO")
+    LINHA = UsuarioLinha
     
     @classmethod
     def criar_tabela(cls):
@@ -33,16 +46,15 @@ class Usuario(BaseModel):
     @classmethod
     def criar(cls, nome, email, senha, perfil_id):
         """Cria novo usuário"""
-        usuario_id = cls._get_next_id()
         senha_hash = hash_password(senha)
         
-        with get_db_cursor(commit=True) as cursor:
-            cursor.execute("""
-                INSERT INTO USUARIOS (ID, NOME, EMAIL, SENHA_HASH, PERFIL_ID, ATIVO)
-                VALUES (?, ?, ?, ?, ?, 1)
-            """, (usuario_id, nome, email, senha_hash, perfil_id))
-        
-        return usuario_id
+        return cls._inserir({
+            'NOME': nome,
+            'EMAIL': email,
+            'SENHA_HASH': senha_hash,
+            'PERFIL_ID': perfil_id,
+            'ATIVO': 1
+        })
     
     @classmethod
     def atualizar(cls, usuario_id, nome, email, perfil_id):
@@ -53,25 +65,33 @@ class Usuario(BaseModel):
             WHERE ID = ?
         """
         execute_query(sql, (nome, email, perfil_id, usuario_id), commit=True)
+        cls._registrar_alteracao(usuario_id)
     
     @classmethod
     def atualizar_senha(cls, usuario_id, nova_senha):
         """Atualiza apenas a senha"""
-        senha_hash = hash_password(nova_senha)
+        cls.atualizar_hash(usuario_id, hash_password(nova_senha))
+    
+    @classmethod
+    def atualizar_hash(cls, usuario_id, senha_hash):
+        """Grava um hash já calculado (ex: regravação com custo novo no login)"""
         sql = "UPDATE USUARIOS SET SENHA_HASH = ? WHERE ID = ?"
         execute_query(sql, (senha_hash, usuario_id), commit=True)
+        cls._registrar_alteracao(usuario_id)
     
     @classmethod
     def desativar(cls, usuario_id):
         """Desativa usuário (soft delete)"""
         sql = "UPDATE USUARIOS SET ATIVO = 0 WHERE ID = ?"
         execute_query(sql, (usuario_id,), commit=True)
+        cls._registrar_alteracao(usuario_id)
     
     @classmethod
     def ativar(cls, usuario_id):
         """Ativa usuário"""
         sql = "UPDATE USUARIOS SET ATIVO = 1 WHERE ID = ?"
         execute_query(sql, (usuario_id,), commit=True)
+        cls._registrar_alteracao(usuario_id)
     
     @classmethod
     def buscar_por_email(cls, email):
@@ -83,7 +103,7 @@ class Usuario(BaseModel):
         INNER JOIN PERFIS P ON U.PERFIL_ID = P.ID
         WHERE UPPER(U.EMAIL) = UPPER(?)
         """
-        return execute_query(sql, (email,), fetch_one=True)
+        return execute_query(sql, (email,), fetch_one=True, tipo_linha=UsuarioAutenticacao)
     
     @classmethod
     def listar_todos(cls, apenas_ativos=False):
@@ -99,7 +119,7 @@ class Usuario(BaseModel):
         
         sql += " ORDER BY U.NOME"
         
-        return execute_query(sql)
+        return execute_query(sql, tipo_linha=UsuarioListagem)
     
     @classmethod
     def buscar(cls, busca="", limit=10, offset=0):
@@ -113,15 +133,31 @@ class Usuario(BaseModel):
             ROWS ? TO ?
         """
         params = (f'%{busca}%', f'%{busca}%', offset + 1, offset + limit)
-        return execute_query(sql, params)
+        return execute_query(sql, params, tipo_linha=UsuarioListagem)
     
     @classmethod
-    def contar(cls, busca=""):
-        """Conta usuários"""
+    def buscar_pagina(cls, busca="", limit=10, cursor=None, com_total=False):
+        """
+        Busca usuários por nome ou email com paginação keyset (ordem NOME, ID)
+        
+        Returns:
+            tuple: (usuarios, proximo_cursor, cursor_anterior)
+                   Com com_total=True: (..., total); no mesmo SELECT só na primeira página
+        """
         sql = """
-            SELECT COUNT(*) 
-            FROM USUARIOS 
-            WHERE UPPER(NOME) LIKE UPPER(?) OR UPPER(EMAIL) LIKE UPPER(?)
+            SELECT U.ID, U.NOME, U.EMAIL, U.PERFIL_ID, U.ATIVO, P.NOME as PERFIL_NOME
+            FROM USUARIOS U
+            INNER JOIN PERFIS P ON U.PERFIL_ID = P.ID
+            WHERE (UPPER(U.NOME) LIKE UPPER(?) OR UPPER(U.EMAIL) LIKE UPPER(?))
         """
-        result = execute_query(sql, (f'%{busca}%', f'%{busca}%'), fetch_one=True)
-        return result[0] if result else 0
+        params = (f'%{busca}%', f'%{busca}%')
+        return cls._paginar(
+            sql, params, ("U.NOME", "U.ID"), (1, 0), limit, cursor, com_total,
+            tipo_linha=UsuarioListagem
+        )
+    
+    @classmethod
+    def contar(cls, busca="", limite=None):
+        """Conta usuários (limite: retorna no máximo limite + 1)"""
+        filtro = "(UPPER(NOME) LIKE UPPER(?) OR UPPER(EMAIL) LIKE UPPER(?))"
+        return cls._contar(filtro, (f'%{busca}%', f'%{busca}%'), limite)
@@ -0,0 +1,393 @@
+"""
+Índice invertido de trigramas em memória (busca "contém")
+LIKE '%termo%' não usa índice B-tree no Firebird; este índice devolve
+os IDs candidatos em memória e o banco só é consultado pela chave primária.
+
+Opcional: ativado por BUSCA_INDICE_ATIVO. Construído em segundo plano
+na subida (leitura em lotes) e mantido a cada escrita confirmada.
+"""
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from db.busca import normalizar, sem_formatacao
+from db.connection import iter_query
+from config.empresa import BUSCA_INDICE_ATIVO, BUSCA_INDICE_MAX_REGISTROS
+
+SEPARADOR = "\x1f"  # Entre campos do texto guardado (não aparece em buscas)
+TAMANHO_MINIMO = 3  # Termos menores não têm trigrama: usar a busca por prefixo
+MAX_RESULTADOS = 32  # Buscas recentes guardadas (paginação e contagem repetem o termo)
+
+
+def _trigramas(texto):
+    """Conjunto de trigramas de um texto já normalizado"""
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _campos_normalizados(valores, telefones=()):
+    """
+    Normaliza os campos de um registro
+    Campos de telefone (posições em `telefones`) também entram sem a
+    formatação, para que "988887777" encontre "(11) 98888-7777"; a busca
+    no banco faz a mesma comparação (Cliente._filtro_contem)
+    """
+    campos = []
+    for posicao, valor in enumerate(valores):
+        texto = normalizar(valor)
+        if not texto:
+            continue
+        campos.append(texto)
+        
+        if posicao in telefones:
+            limpo = sem_formatacao(texto)
+            if len(limpo) >= TAMANHO_MINIMO and limpo != texto:
+                campos.append(limpo)
+    return campos
+
+
+class IndiceTrigramas:
+    """
+    Índice trigrama -> IDs (array de inteiros de 4 bytes)
+    
+    As listas só recebem inclusões; alterações e exclusões deixam entradas
+    antigas que são descartadas na verificação (o texto atual de cada ID
+    fica em `_textos`) e removidas na compactação, feita em segundo plano.
+    """
+    
+    def __init__(self, nome, telefones=()):
+        self.nome = nome
+        self.telefones = frozenset(telefones)  # Posições dos campos de telefone
+        self.pronto = False
+        self.desativado = False  # Passou de BUSCA_INDICE_MAX_REGISTROS: não volta a ser montado
+        self._lock = threading.RLock()
+        self._lock_construcao = threading.Lock()  # Uma construção por vez
+        self._postings = {}
+        self._textos = {}
+        self._pendentes = {}  # Escritas durante a construção: {ID: valores ou None}
+        self._construindo = False
+        self._resultados = OrderedDict()  # {termo: IDs}, limpo a cada alteração
+        self._geracao = 0
+        self._obsoletas = 0
+        self._entradas = 0
+        self._compactando = False
+        self._alterados_compactacao = set()  # IDs escritos durante a compactação
+        self._construido_em = None
+        self._duracao = 0.0
+    
+    # ==================== CONSTRUÇÃO ====================
+    
+    def construir(self, linhas, max_registros=None):
+        """
+        Monta o índice a partir de linhas (ID, campo1, campo2, ...)
+        
+        Returns:
+            bool: False se passou de max_registros (índice fica desativado)
+        """
+        with self._lock_construcao:
+            with self._lock:
+                self._construindo = True
+            try:
+                return self._construir(linhas, max_registros)
+            finally:
+                with self._lock:
+                    self._construindo = False
+                    self._pendentes.clear()
+    
+    def _construir(self, linhas, max_registros):
+        inicio = time.perf_counter()
+        postings, textos, entradas = {}, {}, 0
+        
+        for linha in linhas:
+            if max_registros and len(textos) >= max_registros:
+                print(f"⚠️ Índice de busca {self.nome}: mais de {max_registros} registros, desativado")
+                with self._lock:
+                    self.pronto = False
+                    self.desativado = True
+                return False
+            
+            entradas += self._incluir(postings, textos, linha[0], linha[1:])
+        
+        with self._lock:
+            self._postings, self._textos = postings, textos
+            self._alterado()
+            self._entradas, self._obsoletas = entradas, 0
+            self._construido_em = time.time()
+            self._duracao = time.perf_counter() - inicio
+            self.pronto = True
+            
+            # Escritas confirmadas enquanto a tabela era lida
+            pendentes, self._pendentes = self._pendentes, {}
+            for record_id, valores in pendentes.items():
+                if valores is None:
+                    self.remover(record_id)
+                else:
+                    self.atualizar(record_id, valores)
+        return True
+    
+    def _incluir(self, postings, textos, record_id, valores):
+        campos = _campos_normalizados(valores, self.telefones)
+        textos[record_id] = SEPARADOR.join(campos)
+        return self._indexar(postings, record_id, campos)
+    
+    @staticmethod
+    def _indexar(postings, record_id, campos):
+        trigramas = set()
+        for campo in campos:
+            trigramas |= _trigramas(campo)
+        
+        for trigrama in trigramas:
+            lista = postings.get(trigrama)
+            if lista is None:
+                lista = postings[trigrama] = array("i")
+            lista.append(record_id)
+        return len(trigramas)
+    
+    # ==================== MANUTENÇÃO ====================
+    
+    def atualizar(self, record_id, valores):
+        """Inclui ou substitui o registro no índice"""
+        with self._lock:
+            if not self.pronto:
+                if self._construindo:
+                    self._pendentes[record_id] = valores
+                return
+            if record_id in self._textos:
+                self._obsoletas += 1
+            if self._compactando:
+                self._alterados_compactacao.add(record_id)
+            self._entradas += self._incluir(self._postings, self._textos, record_id, valores)
+            self._alterado()
+            self._compactar_se_preciso()
+    
+    def remover(self, record_id):
+        """Remove o registro (as entradas antigas ficam até a compactação)"""
+        with self._lock:
+            if not self.pronto:
+                if self._construindo:
+                    self._pendentes[record_id] = None
+                return
+            if self._textos.pop(record_id, None) is not None:
+                self._obsoletas += 1
+                if self._compactando:
+                    self._alterados_compactacao.add(record_id)
+                self._alterado()
+                self._compactar_se_preciso()
+    
+    def _alterado(self):
+        self._geracao += 1
+        self._resultados.clear()
+    
+    def invalidar(self):
+        """
+        Marca o índice como desatualizado (buscas voltam ao banco até reconstruir)
+        Escritas só são guardadas em `_pendentes` durante uma construção; fora
+        dela são ignoradas, pois a próxima construção lê a tabela inteira
+        (ver reconstruir_em_segundo_plano)
+        """
+        with self._lock:
+            self.pronto = False
+    
+    def _compactar_se_preciso(self):
+        """
+        Dispara a compactação quando 20% dos registros tiveram alterações
+        Chamado com o lock (após o commit): só copia os textos e sobe a thread
+        """
+        if self._compactando or self._obsoletas <= max(1000, len(self._textos) // 5):
+            return
+        
+        self._compactando = True
+        self._alterados_compactacao = set()
+        threading.Thread(
+            target=self._compactar, args=(dict(self._textos), self._postings),
+            name=f"compactar-{self.nome}", daemon=True
+        ).start()
+    
+    def _compactar(self, textos, base):
+        """
+        Reconstrói as listas a partir da cópia dos textos, sem o lock,
+        e troca pelas atuais sob o lock
+        """
+        try:
+            postings, entradas = {}, 0
+            for record_id, texto in textos.items():
+                entradas += self._indexar(postings, record_id, texto.split(SEPARADOR))
+            
+            with self._lock:
+                if self._postings is not base or not self.pronto:
+                    return  # Reconstruído ou invalidado no meio: descarta
+                
+                # Escritas feitas durante a compactação entram por cima da cópia
+                alterados = self._alterados_compactacao
+                for record_id in alterados:
+                    texto = self._textos.get(record_id)
+                    if texto is not None:
+                        entradas += self._indexar(postings, record_id, texto.split(SEPARADOR))
+                
+                self._postings, self._entradas, self._obsoletas = postings, entradas, len(alterados)
+        except Exception as e:
+            print(f"❌ Erro ao compactar índice de busca {self.nome}: {e}")
+        finally:
+            with self._lock:
+                self._compactando = False
+                self._alterados_compactacao = set()
+    
+    # ==================== BUSCA ====================
+    
+    def buscar(self, termo):
+        """
+        IDs cujo texto contém o termo, ordenados por relevância:
+        início de campo/palavra primeiro, depois posição da ocorrência, depois ID
+        
+        Returns:
+            list: IDs ordenados, ou None se o índice não puder responder
+                  (desativado, em construção ou termo curto demais)
+        """
+        termo = normalizar(termo) or ""
+        if len(termo) < TAMANHO_MINIMO:
+            return None
+        
+        with self._lock:
+            if not self.pronto:
+                return None
+            
+            if termo in self._resultados:
+                self._resultados.move_to_end(termo)
+                return self._resultados[termo]
+            geracao = self._geracao
+            
+            # Parte da lista mais curta e confere o texto atual de cada candidato
+            listas = [self._postings.get(t) for t in _trigramas(termo)]
+            if not all(listas):
+                return []
+            
+            candidatos = set(min(listas, key=len))
+            textos = self._textos
+            encontrados = []
+            
+            for record_id in candidatos:
+                texto = textos.get(record_id)
+                if texto is None:
+                    continue
+                posicao = texto.find(termo)
+                if posicao < 0:
+                    continue
+                
+                inicio_palavra = posicao == 0 or texto[posicao - 1] in (SEPARADOR, " ")
+                encontrados.append((not inicio_palavra, posicao, record_id))
+        
+        encontrados.sort()
+        ids = [record_id for _, _, record_id in encontrados]
+        
+        with self._lock:
+            if geracao == self._geracao:
+                self._resultados[termo] = ids
+                if len(self._resultados) > MAX_RESULTADOS:
+                    self._resultados.popitem(last=False)
+        return ids
+    
+    def estatisticas(self):
+        """Tamanho do índice (memória estimada em bytes)"""
+        with self._lock:
+            memoria = sys.getsizeof(self._postings) + sys.getsizeof(self._textos)
+            memoria += sum(sys.getsizeof(t) + sys.getsizeof(lista) for t, lista in self._postings.items())
+            memoria += sum(sys.getsizeof(texto) for texto in self._textos.values())
+            
+            return {
+                'pronto': self.pronto,
+                'desativado': self.desativado,
+                'registros': len(self._textos),
+                'trigramas': len(self._postings),
+                'entradas': self._entradas,
+                'obsoletas': self._obsoletas,
+                'buscas_em_cache': len(self._resultados),
+                'memoria_bytes': memoria,
+                'construcao_segundos': round(self._duracao, 3),
+                'construido_em': self._construido_em,
+            }
+
+
+# ==================== ÍNDICES POR MODEL ====================
+
+_indices = {}
+_indices_lock = threading.Lock()
+
+
+def indice_de(model):
+    """Índice do model (None se desativado ou model sem CAMPOS_INDICE)"""
+    if not BUSCA_INDICE_ATIVO or not model.CAMPOS_INDICE:
+        return None
+    
+    with _indices_lock:
+        indice = _indices.get(model.TABLE_NAME)
+        if indice is None:
+            telefones = [i for i, campo in enumerate(model.CAMPOS_INDICE) if campo in model.CAMPOS_TELEFONE]
+            indice = _indices[model.TABLE_NAME] = IndiceTrigramas(model.TABLE_NAME, telefones)
+        return indice
+
+
+def indice_carregado(model):
+    """Índice do model já criado neste processo (None se não houver ou se desativado)"""
+    if not BUSCA_INDICE_ATIVO:
+        return None
+    
+    with _indices_lock:
+        indice = _indices.get(model.TABLE_NAME)
+    return None if indice is None or indice.desativado else indice
+
+
+def construir(model):
+    """Lê a tabela em lotes e (re)constrói o índice do model"""
+    indice = indice_de(model)
+    if indice is None:
+        return None
+    
+    sql = (
+        f"SELECT {model.PRIMARY_KEY}, {', '.join(model.CAMPOS_INDICE)} "
+        f"FROM {model.TABLE_NAME} ORDER BY {model.PRIMARY_KEY}"
+    )
+    if indice.construir(iter_query(sql, batch_size=5000), BUSCA_INDICE_MAX_REGISTROS):
+        stats = indice.estatisticas()
+        print(
+            f"✅ Índice de busca {model.TABLE_NAME}: {stats['registros']} registros, "
+            f"{stats['memoria_bytes'] // (1024 * 1024)} MB, {stats['construcao_segundos']}s"
+        )
+    return indice
+
+
+def reconstruir_em_segundo_plano(model):
+    """Reconstrói o índice sem bloquear quem chamou (nada se desativado)"""
+    indice = indice_de(model)
+    if indice is None or indice.desativado:
+        return
+    
+    def executar():
+        try:
+            construir(model)
+        except Exception as e:
+            print(f"❌ Erro ao construir índice de busca {model.TABLE_NAME}: {e}")
+    
+    threading.Thread(target=executar, name=f"indice-{model.TABLE_NAME}", daemon=True).start()
+
+
+_iniciado = False
+
+
+def iniciar(*models):
+    """Constrói em segundo plano os índices dos models (uma vez por processo)"""
+    global _iniciado
+    
+    with _indices_lock:
+        if _iniciado or not BUSCA_INDICE_ATIVO:
+            return
+        _iniciado = True
+    
+    for model in models:
+        reconstruir_em_segundo_plano(model)
+
+
+def estatisticas():
+    """Estatísticas de todos os índices carregados"""
+    with _indices_lock:
+        indices = list(_indices.values())
+    return {indice.nome: indice.estatisticas() for indice in indices}
@@ -151,6 +151,10 @@ def get():
 # Montar rotas de clientes
 app.mount('/clientes', clientes.app)
 
+# Sem índice de busca "contém" em memória neste processo: ele só vê as
+# escritas do próprio processo, e as do Streamlit não chegariam aqui.
+# A busca "contém" vai ao banco (Cliente._filtro_contem)
+
 if __name__ == '__main__':
     print(f"\n{'='*50}")
     print(f"🚀 {SISTEMA_NOME} v{SISTEMA_VERSAO}")
@@ -4,27 +4,58 @@ Rotas para gerenciamento de clientes
 from fasthtml.common import *
 import sys
 import os
+from urllib.parse import urlencode
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
-import db.models as db
+from db.models import Cliente
 from components.layout import base_layout, navbar
 
 app, rt = fast_app()
 
+# Acima disso a contagem para e a lista mostra "1000+"
+LIMITE_CONTAGEM = 1000
+
 @rt('/')
-def get(busca: str = "", tipo: str = "nome", page: int = 1):
-    """Listar clientes com busca e paginação"""
+def get(busca: str = "", tipo: str = "nome", page: int = 1, cursor: str = ""):
+    """Listar clientes com busca e paginação (keyset: cursor opaco na URL)"""
     
     # Configuração
     limit = 10
-    offset = (page - 1) * limit
-    tipo_db = "nome" if tipo == "nome" else "codigo"
+    tipo_db = tipo if tipo in ("nome", "contem") else "codigo"
     
     # Buscar dados
-    clientes = db.listar_clientes(busca, tipo_db, limit, offset)
-    total = db.contar_clientes(busca, tipo_db)
-    total_pages = max(1, (total + limit - 1) // limit)
+    if tipo_db == "codigo" and busca:
+        clientes, proximo, anterior = Cliente.buscar(busca, tipo_db), None, None
+    else:
+        # Por nome: ordem NOME, ID; contém: relevância; código sem filtro: ordem de ID
+        def paginar(c):
+            if tipo_db == "nome":
+                return Cliente.buscar_pagina(busca, limit, c)
+            if tipo_db == "contem":
+                return Cliente.buscar_contendo(busca, limit, c)
+            return Cliente.find_page(limit, c)
+        
+        try:
+            clientes, proximo, anterior = paginar(cursor or None)
+        except ValueError:
+            # Cursor inválido/adulterado: volta à primeira página
+            page = 1
+            clientes, proximo, anterior = paginar(None)
+    
+    # Total só quando há mais de uma página, e limitado (evita COUNT(*) completo)
+    if not proximo and not anterior:
+        total, total_pages = len(clientes), 1
+    else:
+        if tipo_db == "contem":
+            total = Cliente.contar_contendo(busca, limite=LIMITE_CONTAGEM)
+        else:
+            total = Cliente.contar(busca, tipo_db, limite=LIMITE_CONTAGEM)
+        total_pages = None if total > LIMITE_CONTAGEM else max(1, (total + limit - 1) // limit)
+    
+    page = max(1, page)
+    if total_pages:
+        page = min(page, total_pages)
     
     return base_layout(
         navbar(),
@@ -48,6 +79,7 @@ def get(busca: str = "", tipo: str = "nome", page: int = 1):
                             Label("Buscar por:", cls="form-label small text-muted"),
                             Select(
                                 Option("Nome", value="nome", selected=(tipo=="nome")),
+                                Option("Contém", value="contem", selected=(tipo=="contem")),
                                 Option("Código", value="codigo", selected=(tipo=="codigo")),
                                 name="tipo",
                                 id="tipo-busca",
@@ -98,14 +130,14 @@ def get(busca: str = "", tipo: str = "nome", page: int = 1):
             # Lista de clientes
             Div(
                 id="lista-clientes-wrapper",
-                *[clientes_list(clientes, total, page, total_pages, busca, tipo)]
+                *[clientes_list(clientes, total, page, total_pages, busca, tipo, proximo, anterior)]
             ),
             
             cls="container mt-4"
         )
     )
 
-def clientes_list(clientes, total, page, total_pages, busca, tipo):
+def clientes_list(clientes, total, page, total_pages, busca, tipo, proximo=None, anterior=None):
     """Componente de lista de clientes - REUTILIZÁVEL"""
     
     if not clientes:
@@ -119,13 +151,16 @@ def clientes_list(clientes, total, page, total_pages, busca, tipo):
             cls="alert alert-light"
         )
     
+    # total_pages None = contagem limitada em LIMITE_CONTAGEM
+    total_texto = str(total) if total_pages else f"{LIMITE_CONTAGEM}+"
+    
     return Div(
         # Informações
         Div(
             P(
-                Strong(f"Total: {total} cliente{'s' if total != 1 else ''}"),
+                Strong(f"Total: {total_texto} cliente{'s' if total != 1 else ''}"),
                 Span(" | ", cls="text-muted mx-2"),
-                Span(f"Página {page} de {total_pages}", cls="text-muted"),
+                Span(f"Página {page} de {total_pages}" if total_pages else f"Página {page}", cls="text-muted"),
                 cls="mb-3"
             ),
             cls="d-flex justify-content-between align-items-center"
@@ -153,19 +188,19 @@ def clientes_list(clientes, total, page, total_pages, busca, tipo):
         ),
         
         # Paginação
-        paginacao(page, total_pages, busca, tipo) if total_pages > 1 else None
+        paginacao(page, total_pages, busca, tipo, proximo, anterior) if (proximo or anterior) else None
     )
 
 def cliente_row(cliente):
     """Linha individual de cliente"""
     return Tr(
         Td(
-            Span(f"#{cliente[0]}", cls="badge bg-secondary"),
+            Span(f"#{cliente.id}", cls="badge bg-secondary"),
         ),
-        Td(Strong(cliente[1])),
+        Td(Strong(cliente.nome)),
         Td(
             I(cls="bi bi-envelope-fill text-muted me-1"),
-            Span(cliente[2], cls="text-muted small")
+            Span(cliente.email, cls="text-muted small")
         ),
         Td(
             Div(
@@ -177,77 +212,43 @@ def cliente_row(cliente):
                 cls="text-center"
             )
         ),
-        id=f"cliente-{cliente[0]}",
+        id=f"cliente-{cliente.id}",
         cls="animate-fade-in"
     )
 
-def paginacao(current_page, total_pages, busca, tipo):
-    """Componente de paginação"""
+def paginacao(current_page, total_pages, busca, tipo, proximo, anterior):
+    """Componente de paginação (anterior/próxima por cursor)"""
     
-    def page_item(num):
-        is_active = num == current_page
+    def link(page, cursor):
+        return "/clientes?" + urlencode({"page": page, "busca": busca, "tipo": tipo, "cursor": cursor})
+    
+    def nav_item(icone, page, cursor):
+        url = link(page, cursor) if cursor else "#"
         return Li(
             A(
-                str(num),
-                href=f"/clientes?page={num}&busca={busca}&tipo={tipo}",
-                cls="page-link" + (" active" if is_active else ""),
-                hx_get=f"/clientes?page={num}&busca={busca}&tipo={tipo}",
+                I(cls=f"bi {icone}"),
+                href=url,
+                cls="page-link" + ("" if cursor else " disabled"),
+                hx_get=url if cursor else None,
                 hx_target="#lista-clientes-wrapper",
                 hx_swap="innerHTML"
             ),
-            cls="page-item" + (" active" if is_active else "")
+            cls="page-item" + ("" if cursor else " disabled")
         )
     
-    # Calcular range de páginas visíveis
-    start = max(1, current_page - 2)
-    end = min(total_pages, current_page + 2)
-    
-    pages = []
-    
-    # Primeira página
-    if start > 1:
-        pages.append(page_item(1))
-        if start > 2:
-            pages.append(Li(Span("...", cls="page-link"), cls="page-item disabled"))
-    
-    # Páginas do meio
-    for i in range(start, end + 1):
-        pages.append(page_item(i))
-    
-    # Última página
-    if end < total_pages:
-        if end < total_pages - 1:
-            pages.append(Li(Span("...", cls="page-link"), cls="page-item disabled"))
-        pages.append(page_item(total_pages))
-    
     return Nav(
         Ul(
             # Anterior
+            nav_item("bi-chevron-left", current_page - 1, anterior),
+            
+            # Página atual
             Li(
-                A(
-                    I(cls="bi bi-chevron-left"),
-                    href=f"/clientes?page={current_page-1}&busca={busca}&tipo={tipo}",
-                    cls="page-link" + (" disabled" if current_page == 1 else ""),
-                    hx_get=f"/clientes?page={current_page-1}&busca={busca}&tipo={tipo}",
-                    hx_target="#lista-clientes-wrapper"
-                ),
-                cls="page-item" + (" disabled" if current_page == 1 else "")
+                Span(f"{current_page} / {total_pages}" if total_pages else str(current_page), cls="page-link"),
+                cls="page-item active"
             ),
             
-            # Páginas
-            *pages,
-            
             # Próxima
-            Li(
-                A(
-                    I(cls="bi bi-chevron-right"),
-                    href=f"/clientes?page={current_page+1}&busca={busca}&tipo={tipo}",
-                    cls="page-link" + (" disabled" if current_page == total_pages else ""),
-                    hx_get=f"/clientes?page={current_page+1}&busca={busca}&tipo={tipo}",
-                    hx_target="#lista-clientes-wrapper"
-                ),
-                cls="page-item" + (" disabled" if current_page == total_pages else "")
-            ),
+            nav_item("bi-chevron-right", current_page + 1, proximo),
             
             cls="pagination pagination-sm justify-content-center mb-0"
         ),
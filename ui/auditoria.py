@@ -0,0 +1,179 @@
+"""
+Interface de Auditoria
+Consulta do log por período, usuário e módulo (mais recentes primeiro)
+e exportação CSV em fluxo
+"""
+import streamlit as st
+from datetime import date, datetime, time, timedelta
+from db.models import LogAuditoria, Usuario
+from ui.paginacao import obter_cursor, reiniciar_paginacao, contar_resultados, render_paginacao
+from ui.grade import render_grade
+from auth.auth_manager import AuthManager
+from utils.csv_export import gerar_csv
+from config.empresa import AUDITORIA_CSV_MAX
+
+# Módulos que registram ações no log
+MODULOS = ["SISTEMA", "CLIENTES", "PRODUTOS", "USUARIOS"]
+
+CABECALHO_CSV = ["ID", "USUARIO_ID", "USUARIO", "ACAO", "MODULO", "DETALHES", "DATA_HORA"]
+
+# Colunas da grade do log (campo da linha: título)
+COLUNAS_GRADE = {
+    'data_hora': st.column_config.DatetimeColumn("Data/hora", format="DD/MM/YYYY HH:mm:ss"),
+    'usuario_nome': "Usuário",
+    'modulo': "Módulo",
+    'acao': "Ação",
+    'detalhes': st.column_config.TextColumn("Detalhes", width="large"),
+}
+
+
+def _periodo(valor):
+    """
+    Converte o valor do date_input em (inicio, fim) para o filtro
+    `fim` é exclusivo: meia-noite do dia seguinte ao último dia escolhido
+    """
+    if not isinstance(valor, (list, tuple)):
+        valor = (valor,)
+    if not valor:
+        return None, None
+    
+    inicio = datetime.combine(valor[0], time.min)
+    ultimo = valor[1] if len(valor) > 1 else valor[0]
+    return inicio, datetime.combine(ultimo + timedelta(days=1), time.min)
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _usuarios(versao):
+    """
+    Opções do filtro de usuário: {id: "nome (email)"} (cacheado entre sessões)
+    `versao` é Usuario.versao_dados(): muda quando USUARIOS é alterada
+    """
+    return {u.id: f"{u.nome} ({u.email})" for u in Usuario.listar_todos()}
+
+
+def tela_auditoria():
+    """Renderiza tela de auditoria"""
+    
+    if not AuthManager.has_permission('AUDITORIA', 'VISUALIZAR'):
+        st.error("❌ Sem permissão para visualizar a auditoria")
+        return
+    
+    st.markdown("# 🕵️ Auditoria")
+    
+    # ========================================
+    # LINHA 1: LABELS DOS FILTROS
+    # ========================================
+    col1, col2, col3, col4, col5 = st.columns([2, 2, 1.5, 1, 1])
+    
+    col1.markdown("**Período**")
+    col2.markdown("**Usuário**")
+    col3.markdown("**Módulo**")
+    col4.markdown("**Por página**")
+    col5.markdown("**Exportar**")
+    
+    # ========================================
+    # LINHA 2: FILTROS + CSV
+    # ========================================
+    with col1:
+        hoje = date.today()
+        periodo = st.date_input(
+            "periodo",
+            value=(hoje - timedelta(days=30), hoje),
+            format="DD/MM/YYYY",
+            label_visibility="collapsed",
+            key="periodo_aud"
+        )
+    
+    with col2:
+        # Opções por ID (nomes podem se repetir); None = todos
+        usuarios = _usuarios(Usuario.versao_dados())
+        usuario_id = st.selectbox(
+            "usuario",
+            [None] + list(usuarios),
+            format_func=lambda uid: "Todos" if uid is None else usuarios.get(uid, f"#{uid}"),
+            label_visibility="collapsed",
+            key="usuario_aud"
+        )
+    
+    with col3:
+        modulo = st.selectbox(
+            "modulo",
+            ["Todos"] + MODULOS,
+            label_visibility="collapsed",
+            key="modulo_aud"
+        )
+    
+    with col4:
+        registros_por_pagina = st.selectbox(
+            "regs",
+            [50, 100, 200],
+            index=0,
+            label_visibility="collapsed",
+            key="reg_aud"
+        )
+    
+    data_inicio, data_fim = _periodo(periodo)
+    filtros = {
+        'data_inicio': data_inicio,
+        'data_fim': data_fim,
+        'usuario_id': usuario_id,
+        'modulo': modulo if modulo != "Todos" else None,
+    }
+    
+    with col5:
+        if AuthManager.has_permission('AUDITORIA', 'EXPORTAR'):
+            # Gerado só quando pedido; as linhas vêm do banco em lotes.
+            # O download fica inteiro na memória da sessão: no máximo
+            # AUDITORIA_CSV_MAX registros por arquivo
+            if st.button("CSV", use_container_width=True, key="btn_csv_aud",
+                         help=f"Até {AUDITORIA_CSV_MAX} registros por arquivo"):
+                if LogAuditoria.contar(limite=AUDITORIA_CSV_MAX, **filtros) > AUDITORIA_CSV_MAX:
+                    st.warning(f"⚠️ Mais de {AUDITORIA_CSV_MAX} registros: reduza o período")
+                else:
+                    with st.spinner("Gerando CSV..."):
+                        dados, total = gerar_csv(
+                            CABECALHO_CSV, LogAuditoria.iter_periodo(batch_size=1000, **filtros)
+                        )
+                    st.download_button(
+                        label=f"⬇️ {total} registro(s)",
+                        data=dados,
+                        file_name=f"auditoria_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                        mime="text/csv",
+                        on_click="ignore",
+                        use_container_width=True
+                    )
+    
+    st.markdown("---")
+    
+    # ========================================
+    # LISTAR LOG (keyset por DATA_HORA, ID)
+    # ========================================
+    try:
+        cursor = obter_cursor('pagina_atual_auditoria', (tuple(filtros.values()), registros_por_pagina))
+        
+        logs_pagina, proximo, anterior = LogAuditoria.buscar_pagina(
+            limit=registros_por_pagina, cursor=cursor, **filtros
+        )
+        
+        if not logs_pagina and cursor:
+            # Registros da página arquivados: volta ao início
+            reiniciar_paginacao('pagina_atual_auditoria')
+            st.rerun()
+        
+        total_logs, total_paginas = contar_resultados(
+            logs_pagina, proximo, anterior,
+            lambda limite: LogAuditoria.contar(limite=limite, **filtros), registros_por_pagina
+        )
+        st.caption(f"{total_logs} registro(s)")
+        
+        if logs_pagina:
+            # Página inteira em uma grade (só leitura)
+            render_grade("grade_aud", logs_pagina, COLUNAS_GRADE)
+            
+            # Paginação
+            render_paginacao('pagina_atual_auditoria', total_paginas, "aud", proximo, anterior)
+        else:
+            st.info("📭 Nenhum registro no período")
+    
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar auditoria: {e}")
@@ -4,13 +4,31 @@ Com labels organizados e alinhados
 """
 import streamlit as st
 from db.models import Cliente
+from db.connection import transaction
+from db.keyset import CursorIncompativel
+from ui.paginacao import obter_cursor, reiniciar_paginacao, contar_resultados, render_paginacao
+from ui.grade import render_grade
 from auth.auth_manager import AuthManager
+from config.empresa import LISTAGEM_TOTAL_EXATO
 from datetime import datetime
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Paragraph
 from reportlab.lib.styles import getSampleStyleSheet
+from utils.pdf_generator import ESTILO_TABELA, tabelas_em_lotes
+
+# Colunas da grade de clientes (campo da linha: título)
+COLUNAS_GRADE = {
+    'id': st.column_config.NumberColumn("ID", format="#%d", width="small"),
+    'nome': "Nome",
+    'email': "Email",
+    'telefone1': "Telefone 1",
+    'telefone2': "Telefone 2",
+}
+
+# Larguras das colunas da tabela do PDF
+LARGURAS_PDF = [1.2*cm, 5*cm, 5*cm, 2.9*cm, 2.9*cm]
 
 
 def exportar_clientes_pdf(clientes):
@@ -23,33 +41,39 @@ def exportar_clientes_pdf(clientes):
     titulo = Paragraph("<b>Relatório de Clientes</b>", styles['Title'])
     elements.append(titulo)
     
-    data = [['ID', 'Nome', 'Email', 'Telefone 1', 'Telefone 2']]
-    for cliente in clientes:
-        data.append([
-            str(cliente[0]),
-            cliente[1],
-            cliente[2] or '-',
-            cliente[3] or '-',
-            cliente[4] or '-'
-        ])
-    
-    table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    # Uma Table por lote; as linhas são lidas inteiras (e a conexão
+    # liberada) antes do doc.build
+    linhas = (
+        [
+            str(cliente.id),
+            cliente.nome,
+            cliente.email or '-',
+            cliente.telefone1 or '-',
+            cliente.telefone2 or '-'
+        ]
+        for cliente in clientes
+    )
+    elements.extend(tabelas_em_lotes(
+        ['ID', 'Nome', 'Email', 'Telefone 1', 'Telefone 2'], linhas, ESTILO_TABELA, LARGURAS_PDF
+    ))
     
-    elements.append(table)
     doc.build(elements)
     buffer.seek(0)
     return buffer
 
 
+@st.cache_data(max_entries=20, show_spinner="Gerando PDF...")
+def _pdf_clientes(busca, contem, versao):
+    """
+    Gera o PDF de clientes filtrados (cacheado entre sessões)
+    `contem` segue o tipo de busca da grade ("Contém" ou início do nome)
+    `versao` é Cliente.versao_dados(): muda quando os dados mudam
+    """
+    # Leitura em lotes; a conexão volta ao pool antes da montagem do PDF
+    clientes = Cliente.iter_contendo(busca) if contem else Cliente.iter_buscar(busca)
+    return exportar_clientes_pdf(clientes).getvalue()
+
+
 def tela_cliente():
     """Renderiza tela de gestão de clientes"""
     
@@ -75,7 +99,7 @@ def tela_cliente():
     with col1:
         tipo_busca = st.selectbox(
             "tipo", 
-            ["Nome"], 
+            ["Nome", "Contém"], 
             key="tipo_busca_cli",
             label_visibility="collapsed"
         )
@@ -83,7 +107,7 @@ def tela_cliente():
     with col2:
         busca = st.text_input(
             "busca", 
-            placeholder="🔍 Nome do cliente...", 
+            placeholder="🔍 Parte do nome, email ou telefone..." if tipo_busca == "Contém" else "🔍 Início do nome do cliente...", 
             label_visibility="collapsed", 
             key="busca_cli"
         )
@@ -99,19 +123,23 @@ def tela_cliente():
     
     with col4:
         if AuthManager.has_permission('CLIENTES', 'EXPORTAR'):
-            try:
-                clientes_export = Cliente.buscar("", "nome", 9999, 0)
-                if clientes_export:
-                    pdf_buffer = exportar_clientes_pdf(clientes_export)
+            # PDF só é gerado quando o usuário pede (e reaproveitado do cache)
+            chave_pdf = (busca if busca else "", tipo_busca == "Contém", Cliente.versao_dados())
+            
+            if st.session_state.get('pdf_cli_chave') == chave_pdf:
+                try:
                     st.download_button(
-                        label="PDF",
-                        data=pdf_buffer,
+                        label="⬇️ PDF",
+                        data=_pdf_clientes(*chave_pdf),
                         file_name=f"clientes_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
                         mime="application/pdf",
                         use_container_width=True
                     )
-            except:
-                pass
+                except:
+                    pass
+            elif st.button("PDF", use_container_width=True, key="btn_pdf_cli"):
+                st.session_state.pdf_cli_chave = chave_pdf
+                st.rerun()
     
     # ========================================
     # LINHA 3: BOTÃO NOVO CLIENTE
@@ -127,74 +155,60 @@ def tela_cliente():
     # BUSCAR E LISTAR CLIENTES
     # ========================================
     try:
-        clientes = Cliente.buscar(busca if busca else "", "nome", 9999, 0)
-        total_clientes = Cliente.contar(busca if busca else "", "nome")
+        termo = busca if busca else ""
+        contem = tipo_busca == "Contém"
+        
+        # Paginação no banco: busca apenas a página atual (limit+1 diz se há próxima)
+        cursor = obter_cursor('pagina_atual_cliente', (tipo_busca, termo, registros_por_pagina))
         
+        buscar = Cliente.buscar_contendo if contem else Cliente.buscar_pagina
+        total = None
+        try:
+            if LISTAGEM_TOTAL_EXATO:
+                # Página e total exato na mesma transação (mesmo SELECT na primeira página)
+                clientes_pagina, proximo, anterior, total = buscar(
+                    termo, registros_por_pagina, cursor, com_total=True
+                )
+            else:
+                clientes_pagina, proximo, anterior = buscar(termo, registros_por_pagina, cursor)
+        except CursorIncompativel:
+            # Índice de busca ficou pronto (ou saiu do ar) entre uma página
+            # e outra: o cursor é do outro caminho, volta ao início
+            reiniciar_paginacao('pagina_atual_cliente')
+            st.rerun()
+        
+        if not clientes_pagina and cursor:
+            # Registros da página removidos: volta ao início
+            reiniciar_paginacao('pagina_atual_cliente')
+            st.rerun()
+        
+        # Total só quando há mais de uma página, e limitado (ex: "1000+")
+        contar = Cliente.contar_contendo if contem else Cliente.contar
+        total_clientes, total_paginas = contar_resultados(
+            clientes_pagina, proximo, anterior,
+            lambda limite: contar(termo, limite=limite), registros_por_pagina, total
+        )
         st.caption(f"{total_clientes} cliente(s)")
         
-        if clientes:
-            # Paginação manual
-            if 'pagina_atual_cliente' not in st.session_state:
-                st.session_state.pagina_atual_cliente = 1
-            
-            total_paginas = (total_clientes + registros_por_pagina - 1) // registros_por_pagina
-            inicio = (st.session_state.pagina_atual_cliente - 1) * registros_por_pagina
-            fim = inicio + registros_por_pagina
-            clientes_pagina = clientes[inicio:fim]
-            
-            # Cabeçalho da tabela
-            col1, col2, col3, col4, col5, col6 = st.columns([0.5, 2, 2, 1.5, 1.5, 1])
-            col1.markdown("**ID**")
-            col2.markdown("**Nome**")
-            col3.markdown("**Email**")
-            col4.markdown("**Telefone 1**")
-            col5.markdown("**Telefone 2**")
-            col6.markdown("**Ações**")
+        if clientes_pagina:
+            # Página inteira em uma grade; a linha selecionada recebe a ação
+            acoes = {}
+            if AuthManager.has_permission('CLIENTES', 'EDITAR'):
+                acoes['editar'] = "✏️ Editar"
+            if AuthManager.has_permission('CLIENTES', 'EXCLUIR'):
+                acoes['excluir'] = "🗑️ Excluir"
             
-            st.markdown("---")
+            acao, cliente = render_grade("grade_cli", clientes_pagina, COLUNAS_GRADE, acoes)
             
-            # Linhas da tabela
-            for cliente in clientes_pagina:
-                col1, col2, col3, col4, col5, col6 = st.columns([0.5, 2, 2, 1.5, 1.5, 1])
-                
-                col1.caption(f"#{cliente[0]}")
-                col2.write(cliente[1])
-                col3.caption(cliente[2] if cliente[2] else "—")
-                col4.caption(cliente[3] if cliente[3] else "—")
-                col5.caption(cliente[4] if cliente[4] else "—")
-                
-                with col6:
-                    c1, c2 = st.columns(2)
-                    
-                    with c1:
-                        if AuthManager.has_permission('CLIENTES', 'EDITAR'):
-                            if st.button("✏️", key=f"edit_cli_{cliente[0]}", help="Editar"):
-                                st.session_state.editar_cliente_id = cliente[0]
-                                st.rerun()
-                    
-                    with c2:
-                        if AuthManager.has_permission('CLIENTES', 'EXCLUIR'):
-                            if st.button("🗑️", key=f"del_cli_{cliente[0]}", help="Excluir"):
-                                st.session_state.excluir_cliente_id = cliente[0]
-                                st.rerun()
+            if acao == 'editar':
+                st.session_state.editar_cliente_id = cliente.id
+                st.rerun()
+            elif acao == 'excluir':
+                st.session_state.excluir_cliente_id = cliente.id
+                st.rerun()
             
             # Paginação
-            if total_paginas > 1:
-                st.markdown("---")
-                col1, col2, col3 = st.columns([1, 2, 1])
-                
-                with col1:
-                    if st.button("⬅️ Anterior", disabled=st.session_state.pagina_atual_cliente == 1):
-                        st.session_state.pagina_atual_cliente -= 1
-                        st.rerun()
-                
-                with col2:
-                    st.markdown(f"<center>Página {st.session_state.pagina_atual_cliente}/{total_paginas}</center>", unsafe_allow_html=True)
-                
-                with col3:
-                    if st.button("Próxima ➡️", disabled=st.session_state.pagina_atual_cliente == total_paginas):
-                        st.session_state.pagina_atual_cliente += 1
-                        st.rerun()
+            render_paginacao('pagina_atual_cliente', total_paginas, "cli", proximo, anterior)
         else:
             st.info("📭 Nenhum cliente encontrado")
     
@@ -240,9 +254,10 @@ def modal_adicionar_cliente():
         if submitted:
             if nome:
                 try:
-                    cliente_id = Cliente.criar(nome, email, telefone1, telefone2)
+                    with transaction():
+                        cliente_id = Cliente.criar(nome, email, telefone1, telefone2)
+                        AuthManager.audit_log("CRIAR_CLIENTE", "CLIENTES", f"Criou cliente: {nome}")
                     st.success(f"✅ Cliente '{nome}' criado! ID: {cliente_id}")
-                    AuthManager.audit_log("CRIAR_CLIENTE", "CLIENTES", f"Criou cliente: {nome}")
                     import time
                     time.sleep(1)
                     st.rerun()
@@ -261,14 +276,14 @@ def modal_editar_cliente(cliente_id):
         return
     
     with st.form("form_edit_cliente"):
-        nome = st.text_input("Nome *", value=cliente[1])
-        email = st.text_input("Email", value=cliente[2] or "")
+        nome = st.text_input("Nome *", value=cliente.nome)
+        email = st.text_input("Email", value=cliente.email or "")
         
         col1, col2 = st.columns(2)
         with col1:
-            telefone1 = st.text_input("Telefone 1", value=cliente[3] or "")
+            telefone1 = st.text_input("Telefone 1", value=cliente.telefone1 or "")
         with col2:
-            telefone2 = st.text_input("Telefone 2", value=cliente[4] or "")
+            telefone2 = st.text_input("Telefone 2", value=cliente.telefone2 or "")
         
         col_btn1, col_btn2 = st.columns(2)
         with col_btn1:
@@ -280,9 +295,10 @@ def modal_editar_cliente(cliente_id):
         if submitted:
             if nome:
                 try:
-                    Cliente.atualizar(cliente_id, nome, email, telefone1, telefone2)
+                    with transaction():
+                        Cliente.atualizar(cliente_id, nome, email, telefone1, telefone2)
+                        AuthManager.audit_log("EDITAR_CLIENTE", "CLIENTES", f"Editou cliente ID: {cliente_id}")
                     st.success(f"✅ Cliente '{nome}' atualizado!")
-                    AuthManager.audit_log("EDITAR_CLIENTE", "CLIENTES", f"Editou cliente ID: {cliente_id}")
                     import time
                     time.sleep(1)
                     st.rerun()
@@ -300,16 +316,17 @@ def modal_excluir_cliente(cliente_id):
         st.error("❌ Cliente não encontrado")
         return
     
-    st.warning(f"⚠️ Tem certeza que deseja excluir o cliente **{cliente[1]}**?")
+    st.warning(f"⚠️ Tem certeza que deseja excluir o cliente **{cliente.nome}**?")
     st.caption("Esta ação não pode ser desfeita.")
     
     col1, col2 = st.columns(2)
     with col1:
         if st.button("🗑️ Sim, excluir", type="primary", use_container_width=True):
             try:
-                Cliente.excluir(cliente_id)
-                st.success(f"✅ Cliente '{cliente[1]}' excluído!")
-                AuthManager.audit_log("EXCLUIR_CLIENTE", "CLIENTES", f"Excluiu cliente: {cliente[1]}")
+                with transaction():
+                    Cliente.excluir(cliente_id)
+                    AuthManager.audit_log("EXCLUIR_CLIENTE", "CLIENTES", f"Excluiu cliente: {cliente.nome}")
+                st.success(f"✅ Cliente '{cliente.nome}' excluído!")
                 import time
                 time.sleep(1)
                 st.rerun()
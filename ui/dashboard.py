@@ -47,9 +47,9 @@ def tela_dashboard():
             for cliente in ultimos_clientes:
                 col1, col2 = st.columns([3, 1])
                 with col1:
-                    st.write(f"**{cliente[1]}** · {cliente[2] if cliente[2] else 'Sem email'}")
+                    st.write(f"**{cliente.nome}** · {cliente.email if cliente.email else 'Sem email'}")
                 with col2:
-                    st.caption(f"ID: #{cliente[0]}")
+                    st.caption(f"ID: #{cliente.id}")
                 st.divider()
         else:
             st.info("Nenhum cliente cadastrado ainda")
@@ -66,9 +66,9 @@ def tela_dashboard():
             for produto in ultimos_produtos:
                 col1, col2 = st.columns([3, 1])
                 with col1:
-                    st.write(f"**{produto[1]}** · R$ {float(produto[2]):,.2f}")
+                    st.write(f"**{produto.nome}** · R$ {float(produto.preco):,.2f}")
                 with col2:
-                    st.caption(f"ID: #{produto[0]}")
+                    st.caption(f"ID: #{produto.id}")
                 st.divider()
         else:
             st.info("Nenhum produto cadastrado ainda")
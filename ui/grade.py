@@ -0,0 +1,79 @@
+"""
+Grade compartilhada pelas telas de listagem
+A página inteira vira um único st.dataframe (dados em colunas, via
+pandas), em vez de um st.columns com caption/botões por linha. A seleção
+de uma linha habilita os botões de ação (editar, excluir...) abaixo da grade.
+"""
+import pandas as pd
+import streamlit as st
+
+
+def montar_tabela(linhas, colunas=None):
+    """
+    DataFrame da página a partir das linhas tipadas (namedtuples do model)
+    Os nomes das colunas são os campos da linha (id, nome, email...)
+    Campos exibidos com CheckboxColumn (ex: ATIVO 0/1) viram bool
+    """
+    if not linhas:
+        return pd.DataFrame()
+    
+    tabela = pd.DataFrame.from_records(linhas, columns=linhas[0]._fields)
+    for campo, config in (colunas or {}).items():
+        if isinstance(config, dict) and config.get('type_config', {}).get('type') == 'checkbox':
+            tabela[campo] = tabela[campo].fillna(0).astype(bool)
+    return tabela
+
+
+def render_grade(chave, linhas, colunas, acoes=None, condicoes=None):
+    """
+    Renderiza a página como uma grade com seleção de linha
+    
+    Args:
+        chave: Prefixo das keys dos widgets (ex: 'grade_cli')
+        linhas: Linhas da página (namedtuples)
+        colunas: {campo: título ou st.column_config.*}, na ordem de exibição
+        acoes: {nome: rótulo do botão} das ações permitidas ao usuário
+            (ex: {'editar': "✏️ Editar"}); vazio = grade só de leitura
+        condicoes: {nome da ação: função(linha) -> bool}; o botão só fica
+            habilitado se a linha selecionada atender (ex: desativar só ativos)
+    
+    Returns:
+        tuple: (nome da ação clicada ou None, linha selecionada ou None)
+    """
+    acoes = acoes or {}
+    condicoes = condicoes or {}
+    
+    # A key muda com o conteúdo da página: trocar de página (ou excluir um
+    # registro) limpa a seleção, que é guardada por posição
+    ids = tuple(linha.id for linha in linhas)
+    evento = st.dataframe(
+        montar_tabela(linhas, colunas),
+        hide_index=True,
+        column_order=list(colunas),
+        column_config=colunas,
+        key=f"{chave}_{hash(ids)}",
+        on_select="rerun" if acoes else "ignore",
+        selection_mode="single-row"
+    )
+    
+    if not acoes:
+        return None, None
+    
+    posicoes = evento["selection"]["rows"]
+    selecionada = linhas[posicoes[0]] if posicoes and posicoes[0] < len(linhas) else None
+    
+    # Botões de ação (habilitados com uma linha selecionada)
+    acao = None
+    cols = st.columns([1] * len(acoes) + [max(1, 6 - len(acoes))])
+    for col, (nome, rotulo) in zip(cols, acoes.items()):
+        condicao = condicoes.get(nome)
+        habilitado = selecionada is not None and (condicao is None or condicao(selecionada))
+        with col:
+            if st.button(rotulo, key=f"{chave}_{nome}", disabled=not habilitado,
+                         use_container_width=True) and habilitado:
+                acao = nome
+    
+    if selecionada is None:
+        cols[-1].caption("☝️ Selecione uma linha na grade")
+    
+    return acao, selecionada
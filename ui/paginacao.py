@@ -0,0 +1,97 @@
+"""
+Paginação compartilhada pelas telas de listagem
+Paginação por chave (keyset): a sessão guarda o cursor da página atual
+e o número da página apenas para exibição
+"""
+import streamlit as st
+
+# Acima disso a contagem para e a tela mostra "1000+"
+LIMITE_CONTAGEM = 1000
+
+
+def obter_cursor(chave, filtros):
+    """
+    Retorna o cursor da página atual guardado na sessão (None = primeira página)
+    
+    Args:
+        chave: Chave da página no session_state (ex: 'pagina_atual_cliente')
+        filtros: Valores dos filtros da tela; se mudarem, volta à página 1
+    """
+    chave_filtros = f"{chave}_filtros"
+    
+    if st.session_state.get(chave_filtros) != filtros:
+        st.session_state[chave_filtros] = filtros
+        reiniciar_paginacao(chave)
+    
+    st.session_state.setdefault(chave, 1)
+    return st.session_state.get(f"{chave}_cursor")
+
+
+def reiniciar_paginacao(chave):
+    """Volta para a primeira página"""
+    st.session_state[chave] = 1
+    st.session_state[f"{chave}_cursor"] = None
+
+
+def contar_resultados(linhas, proximo, anterior, contar, por_pagina, total=None):
+    """
+    Total para exibição, evitando COUNT(*) sempre que possível
+    
+    - Total já conhecido (buscar_pagina(..., com_total=True)): exato
+    - Página única (sem anterior/próxima): total = linhas da página, sem consulta
+    - Senão: contar(LIMITE_CONTAGEM), que para de contar no limite
+    
+    Args:
+        contar: Função limite -> total (ex: lambda limite: Cliente.contar(termo, limite=limite))
+        total: Total exato, se já veio junto com a página
+    
+    Returns:
+        tuple: (texto do total, total de páginas ou None se a contagem foi limitada)
+    """
+    if total is None:
+        if not proximo and not anterior:
+            return str(len(linhas)), 1
+        
+        total = contar(LIMITE_CONTAGEM)
+        if total > LIMITE_CONTAGEM:
+            return f"{LIMITE_CONTAGEM}+", None
+    
+    return str(total), max(1, (total + por_pagina - 1) // por_pagina)
+
+
+def render_paginacao(chave, total_paginas, sufixo, proximo, anterior):
+    """
+    Renderiza botões Anterior/Próxima e indicador de página
+    
+    Args:
+        chave: Chave da página no session_state
+        total_paginas: Total de páginas (apenas para exibição; None = desconhecido)
+        sufixo: Sufixo para as keys dos botões (ex: 'cli')
+        proximo: Cursor da próxima página (None = última)
+        anterior: Cursor da página anterior (None = primeira)
+    """
+    if not proximo and not anterior:
+        return
+    
+    pagina = st.session_state.get(chave, 1)
+    if total_paginas:
+        pagina = min(pagina, total_paginas)
+    
+    st.markdown("---")
+    col1, col2, col3 = st.columns([1, 2, 1])
+    
+    with col1:
+        if st.button("⬅️ Anterior", disabled=not anterior, key=f"pag_ant_{sufixo}"):
+            st.session_state[chave] = max(1, pagina - 1)
+            st.session_state[f"{chave}_cursor"] = anterior
+            st.rerun()
+    
+    with col2:
+        indicador = f"Página {pagina}/{total_paginas}" if total_paginas else f"Página {pagina}"
+        st.markdown(f"<center>{indicador}</center>", unsafe_allow_html=True)
+    
+    with col3:
+        if st.button("Próxima ➡️", disabled=not proximo, key=f"pag_prox_{sufixo}"):
+            st.session_state[chave] = pagina + 1
+            st.session_state[f"{chave}_cursor"] = proximo
+            st.rerun()
@@ -4,13 +4,29 @@ Com labels organizados e botão ajustado
 """
 import streamlit as st
 from db.models import Produto
+from db.connection import transaction
+from db.keyset import CursorIncompativel
+from ui.paginacao import obter_cursor, reiniciar_paginacao, contar_resultados, render_paginacao
+from ui.grade import render_grade
 from auth.auth_manager import AuthManager
+from config.empresa import LISTAGEM_TOTAL_EXATO
 from datetime import datetime
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Paragraph
 from reportlab.lib.styles import getSampleStyleSheet
+from utils.pdf_generator import ESTILO_TABELA, tabelas_em_lotes
+
+# Colunas da grade de produtos (campo da linha: título)
+COLUNAS_GRADE = {
+    'id': st.column_config.NumberColumn("ID", format="#%d", width="small"),
+    'nome': "Nome",
+    'preco': st.column_config.NumberColumn("Preço", format="R$ %.2f"),
+}
+
+# Larguras das colunas da tabela do PDF
+LARGURAS_PDF = [2*cm, 11*cm, 4*cm]
 
 
 def exportar_produtos_pdf(produtos):
@@ -23,31 +39,37 @@ def exportar_produtos_pdf(produtos):
     titulo = Paragraph("<b>Relatório de Produtos</b>", styles['Title'])
     elements.append(titulo)
     
-    data = [['ID', 'Nome', 'Preço']]
-    for produto in produtos:
-        data.append([
-            str(produto[0]),
-            produto[1],
-            f"R$ {float(produto[2]):,.2f}"
-        ])
-    
-    table = Table(data)
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
+    # Uma Table por lote; as linhas são lidas inteiras (e a conexão
+    # liberada) antes do doc.build
+    linhas = (
+        [
+            str(produto.id),
+            produto.nome,
+            f"R$ {float(produto.preco):,.2f}"
+        ]
+        for produto in produtos
+    )
+    elements.extend(tabelas_em_lotes(
+        ['ID', 'Nome', 'Preço'], linhas, ESTILO_TABELA, LARGURAS_PDF
+    ))
     
-    elements.append(table)
     doc.build(elements)
     buffer.seek(0)
     return buffer
 
 
+@st.cache_data(max_entries=20, show_spinner="Gerando PDF...")
+def _pdf_produtos(busca, contem, versao):
+    """
+    Gera o PDF de produtos filtrados (cacheado entre sessões)
+    `contem` segue o tipo de busca da grade ("Contém" ou início do nome)
+    `versao` é Produto.versao_dados(): muda quando os dados mudam
+    """
+    # Leitura em lotes; a conexão volta ao pool antes da montagem do PDF
+    produtos = Produto.iter_contendo(busca) if contem else Produto.iter_buscar(busca)
+    return exportar_produtos_pdf(produtos).getvalue()
+
+
 def tela_produto():
     """Renderiza tela de gestão de produtos"""
     
@@ -73,7 +95,7 @@ def tela_produto():
     with col1:
         tipo_busca = st.selectbox(
             "tipo", 
-            ["Nome"], 
+            ["Nome", "Contém"], 
             key="tipo_busca_prod",
             label_visibility="collapsed"
         )
@@ -81,7 +103,7 @@ def tela_produto():
     with col2:
         busca = st.text_input(
             "busca", 
-            placeholder="🔍 Nome do produto...", 
+            placeholder="🔍 Parte do nome do produto..." if tipo_busca == "Contém" else "🔍 Início do nome do produto...", 
             label_visibility="collapsed", 
             key="busca_prod"
         )
@@ -97,19 +119,23 @@ def tela_produto():
     
     with col4:
         if AuthManager.has_permission('PRODUTOS', 'EXPORTAR'):
-            try:
-                produtos_export = Produto.buscar("", "nome", 9999, 0)
-                if produtos_export:
-                    pdf_buffer = exportar_produtos_pdf(produtos_export)
+            # PDF só é gerado quando o usuário pede (e reaproveitado do cache)
+            chave_pdf = (busca if busca else "", tipo_busca == "Contém", Produto.versao_dados())
+            
+            if st.session_state.get('pdf_prod_chave') == chave_pdf:
+                try:
                     st.download_button(
-                        label="PDF",
-                        data=pdf_buffer,
+                        label="⬇️ PDF",
+                        data=_pdf_produtos(*chave_pdf),
                         file_name=f"produtos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
                         mime="application/pdf",
                         use_container_width=True
                     )
-            except:
-                pass
+                except:
+                    pass
+            elif st.button("PDF", use_container_width=True, key="btn_pdf_prod"):
+                st.session_state.pdf_prod_chave = chave_pdf
+                st.rerun()
     
     # ========================================
     # LINHA 3: BOTÃO NOVO PRODUTO
@@ -125,70 +151,60 @@ def tela_produto():
     # BUSCAR E LISTAR PRODUTOS
     # ========================================
     try:
-        produtos = Produto.buscar(busca if busca else "", "nome", 9999, 0)
-        total_produtos = Produto.contar(busca if busca else "", "nome")
+        termo = busca if busca else ""
+        contem = tipo_busca == "Contém"
+        
+        # Paginação no banco: busca apenas a página atual (limit+1 diz se há próxima)
+        cursor = obter_cursor('pagina_atual_produto', (tipo_busca, termo, registros_por_pagina))
         
+        buscar = Produto.buscar_contendo if contem else Produto.buscar_pagina
+        total = None
+        try:
+            if LISTAGEM_TOTAL_EXATO:
+                # Página e total exato na mesma transação (mesmo SELECT na primeira página)
+                produtos_pagina, proximo, anterior, total = buscar(
+                    termo, registros_por_pagina, cursor, com_total=True
+                )
+            else:
+                produtos_pagina, proximo, anterior = buscar(termo, registros_por_pagina, cursor)
+        except CursorIncompativel:
+            # Índice de busca ficou pronto (ou saiu do ar) entre uma página
+            # e outra: o cursor é do outro caminho, volta ao início
+            reiniciar_paginacao('pagina_atual_produto')
+            st.rerun()
+        
+        if not produtos_pagina and cursor:
+            # Registros da página removidos: volta ao início
+            reiniciar_paginacao('pagina_atual_produto')
+            st.rerun()
+        
+        # Total só quando há mais de uma página, e limitado (ex: "1000+")
+        contar = Produto.contar_contendo if contem else Produto.contar
+        total_produtos, total_paginas = contar_resultados(
+            produtos_pagina, proximo, anterior,
+            lambda limite: contar(termo, limite=limite), registros_por_pagina, total
+        )
         st.caption(f"{total_produtos} produto(s)")
         
-        if produtos:
-            # Paginação manual
-            if 'pagina_atual_produto' not in st.session_state:
-                st.session_state.pagina_atual_produto = 1
-            
-            total_paginas = (total_produtos + registros_por_pagina - 1) // registros_por_pagina
-            inicio = (st.session_state.pagina_atual_produto - 1) * registros_por_pagina
-            fim = inicio + registros_por_pagina
-            produtos_pagina = produtos[inicio:fim]
-            
-            # Cabeçalho da tabela
-            col1, col2, col3, col4 = st.columns([0.5, 4, 2, 1])
-            col1.markdown("**ID**")
-            col2.markdown("**Nome**")
-            col3.markdown("**Preço**")
-            col4.markdown("**Ações**")
+        if produtos_pagina:
+            # Página inteira em uma grade; a linha selecionada recebe a ação
+            acoes = {}
+            if AuthManager.has_permission('PRODUTOS', 'EDITAR'):
+                acoes['editar'] = "✏️ Editar"
+            if AuthManager.has_permission('PRODUTOS', 'EXCLUIR'):
+                acoes['excluir'] = "🗑️ Excluir"
             
-            st.markdown("---")
+            acao, produto = render_grade("grade_prod", produtos_pagina, COLUNAS_GRADE, acoes)
             
-            # Linhas da tabela
-            for produto in produtos_pagina:
-                col1, col2, col3, col4 = st.columns([0.5, 4, 2, 1])
-                
-                col1.caption(f"#{produto[0]}")
-                col2.write(produto[1])
-                col3.markdown(f"**R$ {float(produto[2]):,.2f}**")
-                
-                with col4:
-                    c1, c2 = st.columns(2)
-                    
-                    with c1:
-                        if AuthManager.has_permission('PRODUTOS', 'EDITAR'):
-                            if st.button("✏️", key=f"edit_prod_{produto[0]}", help="Editar"):
-                                st.session_state.editar_produto_id = produto[0]
-                                st.rerun()
-                    
-                    with c2:
-                        if AuthManager.has_permission('PRODUTOS', 'EXCLUIR'):
-                            if st.button("🗑️", key=f"del_prod_{produto[0]}", help="Excluir"):
-                                st.session_state.excluir_produto_id = produto[0]
-                                st.rerun()
+            if acao == 'editar':
+                st.session_state.editar_produto_id = produto.id
+                st.rerun()
+            elif acao == 'excluir':
+                st.session_state.excluir_produto_id = produto.id
+                st.rerun()
             
             # Paginação
-            if total_paginas > 1:
-                st.markdown("---")
-                col1, col2, col3 = st.columns([1, 2, 1])
-                
-                with col1:
-                    if st.button("⬅️ Anterior", disabled=st.session_state.pagina_atual_produto == 1, key="pag_ant_prod"):
-                        st.session_state.pagina_atual_produto -= 1
-                        st.rerun()
-                
-                with col2:
-                    st.markdown(f"<center>Página {st.session_state.pagina_atual_produto}/{total_paginas}</center>", unsafe_allow_html=True)
-                
-                with col3:
-                    if st.button("Próxima ➡️", disabled=st.session_state.pagina_atual_produto == total_paginas, key="pag_prox_prod"):
-                        st.session_state.pagina_atual_produto += 1
-                        st.rerun()
+            render_paginacao('pagina_atual_produto', total_paginas, "prod", proximo, anterior)
         else:
             st.info("📭 Nenhum produto encontrado")
     
@@ -228,9 +244,10 @@ def modal_adicionar_produto():
         if submitted:
             if nome and preco > 0:
                 try:
-                    produto_id = Produto.criar(nome, preco)
+                    with transaction():
+                        produto_id = Produto.criar(nome, preco)
+                        AuthManager.audit_log("CRIAR_PRODUTO", "PRODUTOS", f"Criou produto: {nome}")
                     st.success(f"✅ Produto '{nome}' criado! ID: {produto_id}")
-                    AuthManager.audit_log("CRIAR_PRODUTO", "PRODUTOS", f"Criou produto: {nome}")
                     import time
                     time.sleep(1)
                     st.rerun()
@@ -249,8 +266,8 @@ def modal_editar_produto(produto_id):
         return
     
     with st.form("form_edit_produto"):
-        nome = st.text_input("Nome *", value=produto[1])
-        preco = st.number_input("Preço (R$) *", min_value=0.0, value=float(produto[2]), step=0.01, format="%.2f")
+        nome = st.text_input("Nome *", value=produto.nome)
+        preco = st.number_input("Preço (R$) *", min_value=0.0, value=float(produto.preco), step=0.01, format="%.2f")
         
         col_btn1, col_btn2 = st.columns(2)
         with col_btn1:
@@ -262,9 +279,10 @@ def modal_editar_produto(produto_id):
         if submitted:
             if nome and preco > 0:
                 try:
-                    Produto.atualizar(produto_id, nome, preco)
+                    with transaction():
+                        Produto.atualizar(produto_id, nome, preco)
+                        AuthManager.audit_log("EDITAR_PRODUTO", "PRODUTOS", f"Editou produto ID: {produto_id}")
                     st.success(f"✅ Produto '{nome}' atualizado!")
-                    AuthManager.audit_log("EDITAR_PRODUTO", "PRODUTOS", f"Editou produto ID: {produto_id}")
                     import time
                     time.sleep(1)
                     st.rerun()
@@ -282,16 +300,17 @@ def modal_excluir_produto(produto_id):
         st.error("❌ Produto não encontrado")
         return
     
-    st.warning(f"⚠️ Tem certeza que deseja excluir o produto **{produto[1]}**?")
+    st.warning(f"⚠️ Tem certeza que deseja excluir o produto **{produto.nome}**?")
     st.caption("Esta ação não pode ser desfeita.")
     
     col1, col2 = st.columns(2)
     with col1:
         if st.button("🗑️ Sim, excluir", type="primary", use_container_width=True):
             try:
-                Produto.excluir(produto_id)
-                st.success(f"✅ Produto '{produto[1]}' excluído!")
-                AuthManager.audit_log("EXCLUIR_PRODUTO", "PRODUTOS", f"Excluiu produto: {produto[1]}")
+                with transaction():
+                    Produto.excluir(produto_id)
+                    AuthManager.audit_log("EXCLUIR_PRODUTO", "PRODUTOS", f"Excluiu produto: {produto.nome}")
+                st.success(f"✅ Produto '{produto.nome}' excluído!")
                 import time
                 time.sleep(1)
                 st.rerun()
@@ -3,9 +3,22 @@ Interface de Gestão de Usuários - VERSÃO DEFINITIVA
 """
 import streamlit as st
 from db.models import Usuario, Perfil
+from db.connection import transaction
+from ui.paginacao import obter_cursor, reiniciar_paginacao, contar_resultados, render_paginacao
+from ui.grade import render_grade
 from auth.auth_manager import AuthManager
+from config.empresa import LISTAGEM_TOTAL_EXATO
 from auth.password import hash_password
 
+# Colunas da grade de usuários (campo da linha: título)
+COLUNAS_GRADE = {
+    'id': st.column_config.NumberColumn("ID", format="#%d", width="small"),
+    'nome': "Nome",
+    'email': "Email",
+    'perfil_nome': "Perfil",
+    'ativo': st.column_config.CheckboxColumn("Ativo", width="small"),
+}
+
 
 def tela_usuarios():
     """Renderiza tela de gestão de usuários"""
@@ -67,74 +80,58 @@ def tela_usuarios():
     # BUSCAR E LISTAR USUÁRIOS
     # ========================================
     try:
-        # Usar métodos corretos: buscar(busca, limit, offset) e contar(busca)
-        usuarios = Usuario.buscar(busca if busca else "", 9999, 0)
-        total_usuarios = Usuario.contar(busca if busca else "")
+        # Usar métodos corretos: buscar_pagina(busca, limit, cursor) e contar(busca, limite)
+        termo = busca if busca else ""
+        
+        # Paginação no banco: busca apenas a página atual (limit+1 diz se há próxima)
+        cursor = obter_cursor('pagina_atual_usuario', (termo, registros_por_pagina))
+        
+        total = None
+        if LISTAGEM_TOTAL_EXATO:
+            # Página e total exato na mesma transação (mesmo SELECT na primeira página)
+            usuarios_pagina, proximo, anterior, total = Usuario.buscar_pagina(
+                termo, registros_por_pagina, cursor, com_total=True
+            )
+        else:
+            usuarios_pagina, proximo, anterior = Usuario.buscar_pagina(
+                termo, registros_por_pagina, cursor
+            )
         
+        if not usuarios_pagina and cursor:
+            # Registros da página removidos: volta ao início
+            reiniciar_paginacao('pagina_atual_usuario')
+            st.rerun()
+        
+        # Total só quando há mais de uma página, e limitado (ex: "1000+")
+        total_usuarios, total_paginas = contar_resultados(
+            usuarios_pagina, proximo, anterior,
+            lambda limite: Usuario.contar(termo, limite=limite), registros_por_pagina, total
+        )
         st.caption(f"{total_usuarios} usuário(s)")
         
-        if usuarios:
-            # Paginação manual
-            if 'pagina_atual_usuario' not in st.session_state:
-                st.session_state.pagina_atual_usuario = 1
-            
-            total_paginas = (total_usuarios + registros_por_pagina - 1) // registros_por_pagina
-            inicio = (st.session_state.pagina_atual_usuario - 1) * registros_por_pagina
-            fim = inicio + registros_por_pagina
-            usuarios_pagina = usuarios[inicio:fim]
+        if usuarios_pagina:
+            # Página inteira em uma grade; a linha selecionada recebe a ação
+            acoes = {}
+            if AuthManager.has_permission('USUARIOS', 'EDITAR'):
+                acoes['editar'] = "✏️ Editar"
+            if AuthManager.has_permission('USUARIOS', 'DESATIVAR'):
+                acoes['desativar'] = "🗑️ Desativar"
             
-            # Cabeçalho da tabela
-            col1, col2, col3, col4, col5 = st.columns([0.5, 3, 3, 2, 1])
-            col1.markdown("**ID**")
-            col2.markdown("**Nome**")
-            col3.markdown("**Email**")
-            col4.markdown("**Perfil**")
-            col5.markdown("**Ações**")
+            # Desativar só vale para usuário ainda ativo
+            acao, usuario = render_grade(
+                "grade_user", usuarios_pagina, COLUNAS_GRADE, acoes,
+                condicoes={'desativar': lambda linha: bool(linha.ativo)}
+            )
             
-            st.markdown("---")
-            
-            # Linhas da tabela
-            # Estrutura: ID, NOME, EMAIL, PERFIL_ID, ATIVO, PERFIL_NOME
-            for usuario in usuarios_pagina:
-                col1, col2, col3, col4, col5 = st.columns([0.5, 3, 3, 2, 1])
-                
-                col1.caption(f"#{usuario[0]}")  # ID
-                col2.write(usuario[1])  # NOME
-                col3.caption(usuario[2] if usuario[2] else "—")  # EMAIL
-                col4.caption(usuario[5] if len(usuario) > 5 and usuario[5] else "—")  # PERFIL_NOME
-                
-                with col5:
-                    c1, c2 = st.columns(2)
-                    
-                    with c1:
-                        if AuthManager.has_permission('USUARIOS', 'EDITAR'):
-                            if st.button("✏️", key=f"edit_user_{usuario[0]}", help="Editar"):
-                                st.session_state.editar_usuario_id = usuario[0]
-                                st.rerun()
-                    
-                    with c2:
-                        if AuthManager.has_permission('USUARIOS', 'DESATIVAR'):
-                            if st.button("🗑️", key=f"del_user_{usuario[0]}", help="Desativar"):
-                                st.session_state.desativar_usuario_id = usuario[0]
-                                st.rerun()
+            if acao == 'editar':
+                st.session_state.editar_usuario_id = usuario.id
+                st.rerun()
+            elif acao == 'desativar':
+                st.session_state.desativar_usuario_id = usuario.id
+                st.rerun()
             
             # Paginação
-            if total_paginas > 1:
-                st.markdown("---")
-                col1, col2, col3 = st.columns([1, 2, 1])
-                
-                with col1:
-                    if st.button("⬅️ Anterior", disabled=st.session_state.pagina_atual_usuario == 1, key="pag_ant_user"):
-                        st.session_state.pagina_atual_usuario -= 1
-                        st.rerun()
-                
-                with col2:
-                    st.markdown(f"<center>Página {st.session_state.pagina_atual_usuario}/{total_paginas}</center>", unsafe_allow_html=True)
-                
-                with col3:
-                    if st.button("Próxima ➡️", disabled=st.session_state.pagina_atual_usuario == total_paginas, key="pag_prox_user"):
-                        st.session_state.pagina_atual_usuario += 1
-                        st.rerun()
+            render_paginacao('pagina_atual_usuario', total_paginas, "user", proximo, anterior)
         else:
             st.info("📭 Nenhum usuário encontrado")
     
@@ -164,7 +161,7 @@ def modal_adicionar_usuario():
     """Modal para adicionar usuário"""
     # Buscar perfis
     perfis = Perfil.listar_todos()
-    perfis_dict = {perfil[1]: perfil[0] for perfil in perfis}
+    perfis_dict = {perfil.nome: perfil.id for perfil in perfis}
     
     with st.form("form_add_usuario"):
         nome = st.text_input("Nome *", placeholder="Nome completo")
@@ -186,9 +183,10 @@ def modal_adicionar_usuario():
                 else:
                     try:
                         perfil_id = perfis_dict[perfil_nome]
-                        usuario_id = Usuario.criar(nome, email, senha, perfil_id)
+                        with transaction():
+                            usuario_id = Usuario.criar(nome, email, senha, perfil_id)
+                            AuthManager.audit_log("CRIAR_USUARIO", "USUARIOS", f"Criou usuário: {nome}")
                         st.success(f"✅ Usuário '{nome}' criado! ID: {usuario_id}")
-                        AuthManager.audit_log("CRIAR_USUARIO", "USUARIOS", f"Criou usuário: {nome}")
                         import time
                         time.sleep(1)
                         st.rerun()
@@ -208,15 +206,15 @@ def modal_editar_usuario(usuario_id):
     
     # Buscar perfis
     perfis = Perfil.listar_todos()
-    perfis_dict = {perfil[1]: perfil[0] for perfil in perfis}
+    perfis_dict = {perfil.nome: perfil.id for perfil in perfis}
     
     # Perfil atual
-    perfil_atual = Perfil.find_by_id(usuario[4])
-    perfil_atual_nome = perfil_atual[1] if perfil_atual else list(perfis_dict.keys())[0]
+    perfil_atual = Perfil.find_by_id(usuario.perfil_id)
+    perfil_atual_nome = perfil_atual.nome if perfil_atual else list(perfis_dict.keys())[0]
     
     with st.form("form_edit_usuario"):
-        nome = st.text_input("Nome *", value=usuario[1])
-        email = st.text_input("Email *", value=usuario[2])
+        nome = st.text_input("Nome *", value=usuario.nome)
+        email = st.text_input("Email *", value=usuario.email)
         perfil_nome = st.selectbox("Perfil *", list(perfis_dict.keys()), 
                                    index=list(perfis_dict.keys()).index(perfil_atual_nome) if perfil_atual_nome in perfis_dict else 0)
         
@@ -235,18 +233,21 @@ def modal_editar_usuario(usuario_id):
                 try:
                     perfil_id = perfis_dict[perfil_nome]
                     
-                    # Atualizar dados básicos
-                    Usuario.atualizar(usuario_id, nome, email, perfil_id)
+                    if nova_senha and len(nova_senha) < 6:
+                        st.warning("⚠️ Senha deve ter no mínimo 6 caracteres!")
+                        return
                     
-                    # Atualizar senha se fornecida
-                    if nova_senha:
-                        if len(nova_senha) < 6:
-                            st.warning("⚠️ Senha deve ter no mínimo 6 caracteres!")
-                            return
-                        Usuario.atualizar_senha(usuario_id, nova_senha)
+                    with transaction():
+                        # Atualizar dados básicos
+                        Usuario.atualizar(usuario_id, nome, email, perfil_id)
+                        
+                        # Atualizar senha se fornecida
+                        if nova_senha:
+                            Usuario.atualizar_senha(usuario_id, nova_senha)
+                        
+                        AuthManager.audit_log("EDITAR_USUARIO", "USUARIOS", f"Editou usuário ID: {usuario_id}")
                     
                     st.success(f"✅ Usuário '{nome}' atualizado!")
-                    AuthManager.audit_log("EDITAR_USUARIO", "USUARIOS", f"Editou usuário ID: {usuario_id}")
                     import time
                     time.sleep(1)
                     st.rerun()
@@ -264,16 +265,17 @@ def modal_desativar_usuario(usuario_id):
         st.error("❌ Usuário não encontrado")
         return
     
-    st.warning(f"⚠️ Tem certeza que deseja desativar o usuário **{usuario[1]}**?")
+    st.warning(f"⚠️ Tem certeza que deseja desativar o usuário **{usuario.nome}**?")
     st.caption("O usuário não poderá mais fazer login no sistema.")
     
     col1, col2 = st.columns(2)
     with col1:
         if st.button("🗑️ Sim, desativar", type="primary", use_container_width=True):
             try:
-                Usuario.desativar(usuario_id)
-                st.success(f"✅ Usuário '{usuario[1]}' desativado!")
-                AuthManager.audit_log("DESATIVAR_USUARIO", "USUARIOS", f"Desativou usuário: {usuario[1]}")
+                with transaction():
+                    Usuario.desativar(usuario_id)
+                    AuthManager.audit_log("DESATIVAR_USUARIO", "USUARIOS", f"Desativou usuário: {usuario.nome}")
+                st.success(f"✅ Usuário '{usuario.nome}' desativado!")
                 import time
                 time.sleep(1)
                 st.rerun()
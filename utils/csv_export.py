@@ -0,0 +1,60 @@
+"""
+Exportação CSV em fluxo
+As linhas vêm de um gerador (ex: iter_query, cursor no servidor lido em
+lotes) e são gravadas conforme chegam: a lista de registros nunca fica
+inteira em memória.
+"""
+import csv
+import io
+from datetime import datetime
+
+
+def _valor(valor):
+    """Valor pronto para o CSV (datas em formato ISO, None vazio)"""
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        return valor.strftime("%Y-%m-%d %H:%M:%S")
+    return valor
+
+
+def escrever_csv(destino, cabecalho, linhas):
+    """
+    Grava cabeçalho e linhas em um arquivo de texto já aberto
+    
+    Args:
+        destino: Arquivo texto (aberto com newline="")
+        cabecalho: Nomes das colunas
+        linhas: Iterável de tuplas (pode ser gerador)
+    
+    Returns:
+        int: Quantidade de linhas gravadas
+    """
+    writer = csv.writer(destino, delimiter=";")
+    writer.writerow(cabecalho)
+    
+    total = 0
+    for linha in linhas:
+        writer.writerow([_valor(v) for v in linha])
+        total += 1
+    return total
+
+
+def gerar_csv(cabecalho, linhas):
+    """
+    Gera o CSV em memória (UTF-8 com BOM, para o Excel reconhecer os acentos)
+    
+    O st.download_button guarda o conteúdo inteiro na sessão; quem chama
+    limita a quantidade de linhas (ex: AUDITORIA_CSV_MAX)
+    
+    Returns:
+        tuple: (conteúdo em bytes, quantidade de linhas)
+    """
+    buffer = io.BytesIO()
+    texto = io.TextIOWrapper(buffer, encoding="utf-8-sig", newline="")
+    
+    total = escrever_csv(texto, cabecalho, linhas)
+    
+    texto.flush()
+    texto.detach()
+    return buffer.getvalue(), total
@@ -1,80 +1,158 @@
 """
 Builder do Menu Hierárquico
 Constrói menu baseado em permissões do usuário
+
+O menu é compilado uma vez por perfil (filtrado, achatado, com rótulos e
+chaves dos botões prontos) e guardado no processo; a renderização só
+percorre a lista compilada. A compilação é refeita quando PERMISSOES é
+alterada ou a estrutura em config/menu_config.py muda (recarga do módulo).
 """
+import threading
 import streamlit as st
-from config.menu_config import get_menu_structure
+from collections import namedtuple
+from config import menu_config
+from db.models import Permissao
 from auth.auth_manager import AuthManager
 
+# Grupo do menu compilado: rotulo do expander (None = botões soltos) e botões
+GrupoMenu = namedtuple("GrupoMenu", "rotulo botoes")
+
+# Botão do menu compilado: texto, chave do widget e página de destino
+BotaoMenu = namedtuple("BotaoMenu", "rotulo chave pagina")
+
 
 class MenuBuilder:
     """Construtor de menu hierárquico"""
     
+    # Menus compilados compartilhados entre sessões:
+    # {perfil_id: (versao, menu)}
+    _compilados = {}
+    _lock = threading.Lock()
+    
     @staticmethod
-    def build_sidebar_menu():
+    def versao_menu():
         """
-        Constrói menu lateral hierárquico
-        Filtra itens baseado em permissões do usuário
+        Versão da estrutura do menu (muda quando config/menu_config.py é recarregado)
         """
-        if not AuthManager.is_authenticated():
-            return
-        
-        menu_structure = get_menu_structure()
+        return id(menu_config.get_menu_structure())
+    
+    @classmethod
+    def menu_do_perfil(cls, perfil_id, permissoes):
+        """
+        Menu compilado do perfil (do cache do processo, se ainda válido)
         
-        st.markdown("### 🧭 Menu")
+        Args:
+            perfil_id: ID do perfil (chave do cache)
+            permissoes: frozenset de (MODULO, ACAO) do perfil
+        """
+        versao = (Permissao.versao_dados(), cls.versao_menu())
+        item = cls._compilados.get(perfil_id)
+        if item is not None and item[0] == versao:
+            return item[1]
         
-        for item in menu_structure:
-            MenuBuilder._render_menu_item(item)
+        menu = cls.compilar(menu_config.get_menu_structure(), permissoes)
+        with cls._lock:
+            cls._compilados[perfil_id] = (versao, menu)
+        return menu
+    
+    @classmethod
+    def invalidar(cls):
+        """Descarta os menus compilados (recompilados no próximo uso)"""
+        with cls._lock:
+            cls._compilados = {}
     
     @staticmethod
-    def _render_menu_item(item, level=0):
+    def compilar(estrutura, permissoes):
         """
-        Renderiza item do menu (recursivo para subitens)
+        Filtra a estrutura pelas permissões e achata em grupos de botões
+        
+        Itens soltos consecutivos ficam num GrupoMenu sem rótulo; cada
+        grupo com filhos visíveis vira um expander com todos os botões
+        dos seus níveis (o Streamlit não aninha expanders).
+        
+        Returns:
+            tuple: GrupoMenu na ordem do menu
         """
-        # Verificar permissão
-        if not MenuBuilder._has_permission(item):
-            return
+        grupos = []
+        soltos = []
         
-        # Se tem filhos, renderizar como expander
-        if 'children' in item and item['children']:
-            # Filtrar filhos com permissão
-            visible_children = [
-                child for child in item['children']
-                if MenuBuilder._has_permission(child)
-            ]
+        for item in estrutura:
+            # Verificar permissão
+            if not MenuBuilder._has_permission(item, permissoes):
+                continue
             
-            # Só mostrar grupo se tiver filhos visíveis
-            if not visible_children:
-                return
-            
-            # Renderizar grupo com expander
-            with st.expander(f"{item['icon']} **{item['label']}**", expanded=True):
-                for child in visible_children:
-                    MenuBuilder._render_menu_item(child, level + 1)
+            if item.get('children'):
+                botoes = MenuBuilder._botoes(item['children'], permissoes, 1)
+                
+                # Só mostrar grupo se tiver filhos visíveis
+                if not botoes:
+                    continue
+                
+                if soltos:
+                    grupos.append(GrupoMenu(None, tuple(soltos)))
+                    soltos = []
+                grupos.append(GrupoMenu(f"{item['icon']} **{item['label']}**", tuple(botoes)))
+            else:
+                soltos.append(MenuBuilder._botao(item, 0))
         
-        else:
-            # Item final (folha) - renderizar como botão
-            label = f"{item['icon']} {item['label']}"
-            
-            # Usar chave única para evitar conflitos
-            button_key = f"menu_{item['label'].lower().replace(' ', '_')}_{level}"
+        if soltos:
+            grupos.append(GrupoMenu(None, tuple(soltos)))
+        return tuple(grupos)
+    
+    @staticmethod
+    def _botoes(itens, permissoes, level):
+        """Botões visíveis de um grupo (subgrupos achatados no mesmo nível)"""
+        botoes = []
+        for item in itens:
+            if not MenuBuilder._has_permission(item, permissoes):
+                continue
             
-            if st.button(label, use_container_width=True, key=button_key):
-                if item.get('page'):
-                    st.switch_page(item['page'])
-                else:
-                    # Dashboard (página principal)
-                    st.switch_page("app.py")
+            if item.get('children'):
+                botoes.extend(MenuBuilder._botoes(item['children'], permissoes, level + 1))
+            else:
+                botoes.append(MenuBuilder._botao(item, level))
+        return botoes
+    
+    @staticmethod
+    def _botao(item, level):
+        """Item final (folha) com rótulo, chave única e destino já resolvidos"""
+        return BotaoMenu(
+            f"{item['icon']} {item['label']}",
+            f"menu_{item['label'].lower().replace(' ', '_')}_{level}",
+            item.get('page') or "app.py"  # None = Dashboard (página principal)
+        )
+    
+    @staticmethod
+    def build_sidebar_menu():
+        """
+        Constrói menu lateral hierárquico
+        Usa o menu compilado da autorização da sessão
+        """
+        autorizacao = AuthManager.autorizacao()
+        if autorizacao is None:
+            return
+        
+        st.markdown("### 🧭 Menu")
+        
+        for grupo in autorizacao.menu:
+            if grupo.rotulo is None:
+                MenuBuilder._render_botoes(grupo.botoes)
+            else:
+                with st.expander(grupo.rotulo, expanded=True):
+                    MenuBuilder._render_botoes(grupo.botoes)
+    
+    @staticmethod
+    def _render_botoes(botoes):
+        for botao in botoes:
+            if st.button(botao.rotulo, use_container_width=True, key=botao.chave):
+                st.switch_page(botao.pagina)
     
     @staticmethod
-    def _has_permission(item):
-        """Verifica se usuário tem permissão para ver o item"""
+    def _has_permission(item, permissoes):
+        """Verifica se o conjunto de permissões permite ver o item"""
         # Se não especificou permissão, é público (ou grupo)
         if not item.get('permission_module') or not item.get('permission_action'):
             return True
         
         # Verificar permissão específica
-        return AuthManager.has_permission(
-            item['permission_module'],
-            item['permission_action']
-        )
+        return (item['permission_module'], item['permission_action']) in permissoes
@@ -233,9 +233,9 @@ def gerar_relatorio_clientes_pdf(clientes, filtros=None):
     
     for cliente in clientes:
         data.append([
-            str(cliente[0]),
-            str(cliente[1]),
-            str(cliente[2])
+            str(cliente.id),
+            str(cliente.nome),
+            str(cliente.email)
         ])
     
     # Criar e estilizar tabela
@@ -348,7 +348,7 @@ def gerar_relatorio_produtos_pdf(produtos, filtros=None):
     
     # Calcular totais
     total_produtos = len(produtos)
-    valor_total = sum([float(p[2]) for p in produtos]) if produtos else 0
+    valor_total = sum([float(p.preco) for p in produtos]) if produtos else 0
     
     # Box com informações resumidas
     info_box_data = [[
@@ -373,9 +373,9 @@ def gerar_relatorio_produtos_pdf(produtos, filtros=None):
     
     for produto in produtos:
         data.append([
-            str(produto[0]),
-            str(produto[1]),
-            f"R$ {float(produto[2]):,.2f}"
+            str(produto.id),
+            str(produto.nome),
+            f"R$ {float(produto.preco):,.2f}"
         ])
     
     # Criar e estilizar tabela
@@ -411,3 +411,51 @@ def gerar_relatorio_produtos_pdf(produtos, filtros=None):
     doc.build(elements, onFirstPage=adicionar_cabecalho_rodape_produtos, onLaterPages=adicionar_cabecalho_rodape_produtos)
     buffer.seek(0)
     return buffer
+
+# Estilo da tabela dos relatórios de listagem (clientes, produtos)
+ESTILO_TABELA = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+]
+
+def tabelas_em_lotes(cabecalho, linhas, estilo, larguras, lote=500):
+    """
+    Monta a tabela do relatório em várias Tables de até `lote` linhas
+    
+    As linhas podem vir de um gerador (ex: iter_query): ele é consumido
+    inteiro aqui, então o cursor e a conexão são liberados antes do
+    doc.build (a parte demorada). Tables menores também evitam que o
+    ReportLab meça e divida uma tabela única com todas as linhas.
+    
+    Args:
+        cabecalho: Títulos das colunas (repetidos no início de cada Table)
+        linhas: Iterável de listas de células já formatadas
+        estilo: Comandos do TableStyle (linha 0 = cabeçalho)
+        larguras: Largura de cada coluna (iguais em todas as Tables)
+        lote: Linhas de dados por Table
+    
+    Returns:
+        list: Tables na ordem, para acrescentar aos elementos do documento
+    """
+    tabelas = []
+    data = [cabecalho]
+    
+    def fechar():
+        table = Table(data, colWidths=larguras, repeatRows=1)
+        table.setStyle(TableStyle(estilo))
+        tabelas.append(table)
+    
+    for linha in linhas:
+        data.append(linha)
+        if len(data) > lote:
+            fechar()
+            data = [cabecalho]
+    
+    if len(data) > 1 or not tabelas:
+        fechar()
+    return tabelas